@@ -0,0 +1,150 @@
+"""
+Handler latency under concurrent updates, sync vs async sessions.
+
+Replays the same open-loop burst of updates twice against a throwaway database:
+once with handlers using the sync SessionLocal inside `async def` (how every
+handler worked before the async layer), once with AsyncSessionLocal. Every update
+reads the user and counts their transactions, like a profile view; a fraction of
+them also write a transaction, like a wallet action. Meanwhile another connection
+keeps taking the write lock for a few milliseconds at a time, the way a batch job
+or a second process does. A heartbeat task measures how long the event loop stalls.
+
+    python benchmarks/bench_handler_latency.py [--rate 300] [--seconds 3] [--writes 0.2] [--hold-ms 30]
+
+Latency is measured from each update's scheduled arrival to its last statement,
+so time spent waiting behind a blocked event loop counts. Pass --hold-ms 0 to
+run without the competing writer.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+os.environ["DATABASE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="bench_latency_"), "bench.db")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, select, text
+
+import database
+from config import DATABASE_PATH
+from database import SessionLocal, AsyncSessionLocal, User, Transaction
+
+
+def read_work(db_session, telegram_id):
+    """A profile view: the user row and their transaction count."""
+    user = db_session.scalar(select(User).where(User.telegram_id == telegram_id))
+    db_session.scalar(select(func.count()).select_from(Transaction).where(Transaction.user_id == user.id))
+    return user
+
+async def sync_handler(telegram_id: int, writes: bool):
+    """The pre-async pattern: blocking queries straight from a coroutine."""
+    db_session = SessionLocal()
+    try:
+        user = read_work(db_session, telegram_id)
+        if writes:
+            db_session.add(Transaction(user_id=user.id, type='deposit', amount=1.0, status='pending'))
+            db_session.commit()
+    finally:
+        db_session.close()
+
+async def async_handler(telegram_id: int, writes: bool):
+    async with AsyncSessionLocal() as db_session:
+        user = await db_session.run_sync(read_work, telegram_id)
+        if writes:
+            db_session.add(Transaction(user_id=user.id, type='deposit', amount=1.0, status='pending'))
+            await db_session.commit()
+
+def background_writer(stop: threading.Event, hold: float, pause: float):
+    """Another writer on the same file, holding the write lock for `hold` seconds at a time."""
+    conn = sqlite3.connect(DATABASE_PATH, timeout=30, isolation_level=None)
+    while not stop.is_set():
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("UPDATE users SET balance = balance WHERE id = 1")
+        time.sleep(hold)
+        conn.execute("COMMIT")
+        time.sleep(pause)
+    conn.close()
+
+async def heartbeat(lags: list, stop: asyncio.Event, interval: float = 0.005):
+    while not stop.is_set():
+        expected = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, time.perf_counter() - expected) * 1000)
+
+async def run_burst(handler, arrivals, user_count: int, write_share: float):
+    latencies, lags, stop = {True: [], False: []}, [], asyncio.Event()
+    beat = asyncio.create_task(heartbeat(lags, stop))
+    rng = random.Random(1)
+    start = time.perf_counter()
+
+    async def one(arrival, writes):
+        await handler(rng.randint(1, user_count), writes)
+        latencies[writes].append((time.perf_counter() - start - arrival) * 1000)
+
+    tasks = []
+    for arrival in arrivals:
+        delay = arrival - (time.perf_counter() - start)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(one(arrival, rng.random() < write_share)))
+    await asyncio.gather(*tasks)
+    stop.set()
+    await beat
+    await database.async_engine.dispose()
+    return latencies, lags
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def seed(user_count: int):
+    database.init_db()
+    with database.engine.begin() as conn:
+        conn.execute(text("INSERT INTO users (telegram_id, first_name, balance, status) VALUES (:telegram_id, 'u', 100, 'active')"),
+                     [{'telegram_id': telegram_id} for telegram_id in range(1, user_count + 1)])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rate", type=float, default=300, help="updates per second")
+    parser.add_argument("--seconds", type=float, default=3)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--writes", type=float, default=0.2, help="share of updates that write")
+    parser.add_argument("--hold-ms", type=float, default=30, help="how long the competing writer holds the lock")
+    parser.add_argument("--pause-ms", type=float, default=200, help="gap between the competing writer's transactions")
+    args = parser.parse_args()
+
+    seed(args.users)
+    count = int(args.rate * args.seconds)
+    arrivals = [index / args.rate for index in range(count)]
+    print(f"{count} updates at {args.rate:.0f}/s, {args.writes:.0%} writing, "
+          f"competing writer holds {args.hold_ms:.0f} ms every {args.pause_ms:.0f} ms, profile {database.DB_PROFILE}\n")
+    print(f"{'session':<8}{'updates':<8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}{'loop lag p99':>14}{'loop lag max':>14}")
+    for label, handler in (("sync", sync_handler), ("async", async_handler)):
+        stop = threading.Event()
+        writer = threading.Thread(target=background_writer, args=(stop, args.hold_ms / 1000, args.pause_ms / 1000))
+        if args.hold_ms > 0:
+            writer.start()
+        try:
+            latencies, lags = asyncio.run(run_burst(handler, arrivals, args.users, args.writes))
+        finally:
+            stop.set()
+            if writer.is_alive():
+                writer.join()
+        for kind, writes in (("reads", False), ("writes", True)):
+            values = latencies[writes]
+            if not values:
+                continue
+            print(
+                f"{label:<8}{kind:<8}{statistics.median(values):>9.1f}{percentile(values, 0.95):>9.1f}"
+                f"{percentile(values, 0.99):>9.1f}{max(values):>9.1f}"
+                f"{percentile(lags, 0.99):>14.1f}{max(lags):>14.1f}"
+            )
+
+if __name__ == "__main__":
+    main()
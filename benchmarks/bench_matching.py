@@ -0,0 +1,116 @@
+"""
+Ranked top-K job alerts vs notify-everyone on 100,000 freelancers.
+
+Builds the skill index and ranking signals in memory for a synthetic population
+(Zipf-skewed skills, ratings, completed jobs and last activity), then runs
+notify_matching_freelancers() for jobs across every MATCH_TOP_K_TIERS budget tier.
+For each tier it reports how many freelancers notify-everyone would alert, how
+many the ranked top-K alerts, the mean match score of each group, and how long
+matching takes.
+
+    python benchmarks/bench_matching.py [--freelancers 100000] [--skills 300] [--jobs 200]
+"""
+import argparse
+import datetime
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ["DATABASE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="bench_matching_"), "bench.db")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from config import MATCH_TOP_K_TIERS
+from modules import matching
+from modules.alert_digest import AlertDigest
+from modules.open_jobs import OpenJob
+from modules.ranking import freelancer_stats, rank_candidates, top_k_for_budget
+from modules.skill_bitmask import SkillBitmaskMatrix
+from modules.skill_index import freelancer_index
+
+
+def populate(rng, freelancer_count: int, skill_count: int):
+    """Fills the module-level index and stats with a synthetic population."""
+    weights = 1 / np.arange(1, skill_count + 1) ** 1.1
+    weights /= weights.sum()
+    now = time.time()
+    freelancer_index.bitmasks = SkillBitmaskMatrix(range(1, skill_count + 1))
+    for user_id in range(1, freelancer_count + 1):
+        skills = rng.choice(skill_count, size=int(rng.integers(1, 11)), replace=False, p=weights) + 1
+        freelancer_index.set_freelancer(user_id, 10_000_000 + user_id, skills.tolist())
+        review_count = int(rng.poisson(3)) if rng.random() < 0.6 else 0
+        if review_count:
+            freelancer_stats.rating_count[user_id] = review_count
+            freelancer_stats.rating_sum[user_id] = int(rng.integers(1, 6, size=review_count).sum())
+        completed = int(rng.geometric(0.3)) - 1
+        if completed:
+            freelancer_stats.completed_jobs[user_id] = completed
+        freelancer_stats.touch(user_id, now - float(rng.exponential(30)) * 86400)
+    return weights
+
+def mean_score(user_ids, overlap_counts, required_count: int, now: float) -> float:
+    return statistics.fmean(
+        freelancer_stats.score(user_id, overlap_counts[user_id] / required_count, now) for user_id in user_ids
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--freelancers", type=int, default=100_000)
+    parser.add_argument("--skills", type=int, default=300)
+    parser.add_argument("--jobs", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(14)
+    start = time.perf_counter()
+    weights = populate(rng, args.freelancers, args.skills)
+    print(f"Built {args.freelancers:,} freelancers over {args.skills} skills in {time.perf_counter() - start:.1f} s\n")
+
+    # Alerts stay buffered: nothing is sent while benchmarking
+    matching.alert_digest = AlertDigest(window=3600)
+    tiers = sorted(MATCH_TOP_K_TIERS)
+    rows = {min_budget: [] for min_budget, _ in tiers}
+    for job_id in range(1, args.jobs + 1):
+        min_budget, _ = tiers[job_id % len(tiers)]
+        budget = min_budget + float(rng.integers(0, 100))
+        skill_ids = (rng.choice(args.skills, size=int(rng.integers(1, 5)), replace=False, p=weights) + 1).tolist()
+        job = OpenJob(job_id, f"Job {job_id}", "", budget, frozenset(skill_ids), 1, datetime.datetime.now(), 0)
+
+        started = time.perf_counter()
+        alerted = matching.notify_matching_freelancers(job, skill_ids)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        overlap_counts = freelancer_index.overlap_counts(skill_ids)
+        if not overlap_counts:
+            continue
+        now = time.time()
+        ranked = rank_candidates(overlap_counts, len(skill_ids), top_k_for_budget(budget))
+        rows[min_budget].append((
+            len(overlap_counts), alerted, elapsed_ms,
+            mean_score(overlap_counts, overlap_counts, len(skill_ids), now),
+            mean_score([user_id for _, user_id in ranked], overlap_counts, len(skill_ids), now),
+        ))
+
+    print(f"{'budget tier':>12}{'K':>5}{'jobs':>6}{'everyone':>10}{'top-K':>7}{'fan-out cut':>13}"
+          f"{'score all':>11}{'score top-K':>13}{'median ms':>11}{'p95 ms':>9}")
+    for min_budget, k in tiers:
+        results = rows[min_budget]
+        if not results:
+            continue
+        everyone, alerted, elapsed, score_all, score_top = (list(column) for column in zip(*results))
+        elapsed.sort()
+        print(
+            f"{'$' + format(min_budget, ','):>12}{k:>5}{len(results):>6}{statistics.fmean(everyone):>10,.0f}"
+            f"{statistics.fmean(alerted):>7.0f}{sum(everyone) / max(1, sum(alerted)):>12.0f}x"
+            f"{statistics.fmean(score_all):>11.3f}{statistics.fmean(score_top):>13.3f}"
+            f"{statistics.median(elapsed):>11.2f}{elapsed[int(len(elapsed) * 0.95) - 1]:>9.2f}"
+        )
+    total_everyone = sum(row[0] for tier in rows.values() for row in tier)
+    total_alerted = sum(row[1] for tier in rows.values() for row in tier)
+    print(f"\nAlerts for {args.jobs} jobs: notify-everyone {total_everyone:,}, top-K {total_alerted:,} "
+          f"({total_everyone / max(1, total_alerted):.0f}x fewer).")
+
+if __name__ == "__main__":
+    main()
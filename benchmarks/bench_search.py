@@ -0,0 +1,136 @@
+"""
+Benchmark for /search on a large jobs table.
+
+Fills a throwaway database with 1,000,000 jobs, 100,000 of them open (only open
+jobs are in the jobs_fts index), then times the first results page of a set of
+searches through parse_search() and SEARCH_SQL, exactly as the handler runs them.
+
+    python benchmarks/bench_search.py [--jobs 1000000] [--open 100000] [--budget-ms 50]
+
+Exits non-zero if any search's p95 exceeds the budget.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ["DATABASE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="bench_search_"), "bench.db")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from sqlalchemy import text
+
+import database
+import populate_skill
+from modules.skill_registry import load_skill_registry
+from modules.search_flow import SEARCH_SQL, SEARCH_CANDIDATES, RESULTS_PER_PAGE, parse_search
+
+# Words clients actually use, most common first, followed by a long synthetic tail
+COMMON_WORDS = (
+    "need bot telegram python website app developer build create simple api data web design "
+    "project experience looking fix script automation mobile android ios react node django "
+    "database scraper payment integration dashboard admin panel logo marketing seo content "
+    "wordpress shopify landing page backend frontend server cloud aws docker deploy crypto "
+    "trading wallet smart contract game unity video editing writing translation support"
+).split()
+SEARCHES = [
+    ["telegram", "bot"],
+    ["python"],
+    ["website", "design", "min:100"],
+    ["scraper", "max:200"],
+    ["dev"],
+    ["te"],
+    ["te*"],
+    ["word4711"],
+    ["telegram", "bot", "skill:python_development"],
+]
+
+
+def vocabulary(size: int):
+    return COMMON_WORDS + [f"word{i}" for i in range(size - len(COMMON_WORDS))]
+
+def texts(rng, words, count: int, length: int):
+    """`count` strings of `length` Zipf-distributed words."""
+    ranks = np.minimum(rng.zipf(1.3, size=(count, length)), len(words)) - 1
+    return [" ".join(words[i] for i in row) for row in ranks]
+
+def fill(job_count: int, open_count: int, chunk: int = 50000):
+    rng = np.random.default_rng(20)
+    words = vocabulary(20000)
+    open_ids = set(rng.choice(np.arange(1, job_count + 1), size=open_count, replace=False).tolist())
+    closed_statuses = ['completed', 'in_progress', 'cancelled', 'pending_deposit']
+    with database.engine.begin() as conn:
+        conn.execute(text("INSERT INTO users (id, telegram_id, first_name, balance, status) VALUES (1, 1, 'Client', 0, 'active')"))
+        skill_ids = [row[0] for row in conn.execute(text("SELECT id FROM skills"))]
+    for start in range(1, job_count + 1, chunk):
+        ids = range(start, min(start + chunk, job_count + 1))
+        titles = texts(rng, words, len(ids), 6)
+        descriptions = texts(rng, words, len(ids), 40)
+        budgets = rng.integers(10, 2000, size=len(ids)).tolist()
+        rows = [
+            {
+                'id': job_id, 'title': title, 'description': description, 'budget': budget,
+                'status': 'open' if job_id in open_ids else closed_statuses[job_id % len(closed_statuses)],
+                'created_at': f"2026-01-01 00:00:{job_id % 60:02d}",
+            }
+            for job_id, title, description, budget in zip(ids, titles, descriptions, budgets)
+        ]
+        job_skills = [
+            {'job_id': job_id, 'skill_id': skill_id}
+            for job_id in ids if job_id in open_ids
+            for skill_id in rng.choice(skill_ids, size=2, replace=False).tolist()
+        ]
+        with database.engine.begin() as conn:
+            conn.execute(text(
+                "INSERT INTO jobs (id, title, description, budget, status, created_at, client_id, application_count) "
+                "VALUES (:id, :title, :description, :budget, :status, :created_at, 1, 0)"
+            ), rows)
+            conn.execute(text("INSERT INTO job_skills (job_id, skill_id) VALUES (:job_id, :skill_id)"), job_skills)
+    with database.engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+
+def time_search(conn, args, repeat: int):
+    search = parse_search(args)
+    params = {key: search[key] for key in ('match', 'min_budget', 'max_budget', 'skill_id')}
+    params.update(candidates=SEARCH_CANDIDATES, limit=RESULTS_PER_PAGE + 1, offset=0)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = conn.execute(text(SEARCH_SQL), params).all()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return search['match'], len(rows), statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--jobs", type=int, default=1_000_000)
+    parser.add_argument("--open", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--budget-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    database.init_db()
+    populate_skill.populate_skills()
+    load_skill_registry()
+    start = time.perf_counter()
+    fill(args.jobs, args.open)
+    print(f"Filled {args.jobs:,} jobs ({args.open:,} open) in {time.perf_counter() - start:.0f} s\n")
+
+    over_budget = []
+    print(f"{'search':<44}{'match expression':<30}{'rows':>5}{'median ms':>11}{'p95 ms':>9}")
+    with database.engine.connect() as conn:
+        for search_args in SEARCHES:
+            match, rows, median, p95 = time_search(conn, search_args, args.repeat)
+            flag = "  OVER BUDGET" if p95 > args.budget_ms else ""
+            print(f"{' '.join(search_args):<44}{match:<30}{rows:>5}{median:>11.1f}{p95:>9.1f}{flag}")
+            if flag:
+                over_budget.append(search_args)
+    if over_budget:
+        print(f"\n{len(over_budget)} searches over the {args.budget_ms:.0f} ms budget.")
+        sys.exit(1)
+    print(f"\nAll searches within the {args.budget_ms:.0f} ms budget.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Job-alert matching through the in-memory skill index vs SQL.
+
+Grows a throwaway database to 10k, 100k and 1M freelancer-skill rows and, at each
+size, times matching a set of jobs' required skills three ways:
+
+  sql       User.skills.any(Skill.id.in_(...)), the EXISTS query matching used to run
+  match     FreelancerSkillIndex.match(), the set-union lookup
+  overlap   FreelancerSkillIndex.overlap_counts(), what notify_matching_freelancers calls now
+
+    python benchmarks/bench_skill_index.py [--sizes 10000 100000 1000000] [--skills-per-freelancer 8]
+
+Each freelancer gets skills drawn with a Zipf skew over the real catalog, so
+popular skills have large posting lists. Both paths are checked to agree.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ["DATABASE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="bench_skill_index_"), "bench.db")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from sqlalchemy import select, text
+
+import database
+import populate_skill
+from database import SessionLocal, User, Skill
+from modules.skill_index import freelancer_index, load_freelancer_index
+
+
+def grow(rng, skill_ids, next_user_id: int, target_rows: int, per_freelancer: int, rows: int):
+    """Adds freelancers until user_skills holds `target_rows` rows. Returns (next user id, rows)."""
+    weights = 1 / np.arange(1, len(skill_ids) + 1) ** 1.1
+    weights /= weights.sum()
+    users, user_skills = [], []
+    while rows < target_rows:
+        count = min(per_freelancer, target_rows - rows)
+        users.append({'id': next_user_id, 'telegram_id': 10_000_000 + next_user_id})
+        for skill_id in rng.choice(skill_ids, size=count, replace=False, p=weights).tolist():
+            user_skills.append({'user_id': next_user_id, 'skill_id': skill_id})
+        next_user_id += 1
+        rows += count
+    with database.engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO users (id, telegram_id, first_name, role, balance, status) "
+            "VALUES (:id, :telegram_id, 'f', 'freelancer', 0, 'active')"
+        ), users)
+        conn.execute(text("INSERT INTO user_skills (user_id, skill_id) VALUES (:user_id, :skill_id)"), user_skills)
+        conn.execute(text("ANALYZE"))
+    return next_user_id, rows
+
+def sql_match(db_session, skill_ids):
+    return set(db_session.scalars(
+        select(User.id).where(User.role == 'freelancer', User.skills.any(Skill.id.in_(skill_ids)))
+    ))
+
+def timed(function, jobs, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        for skill_ids in jobs:
+            start = time.perf_counter()
+            function(skill_ids)
+            samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), sorted(samples)[int(len(samples) * 0.95) - 1]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--skills-per-freelancer", type=int, default=8)
+    parser.add_argument("--jobs", type=int, default=20, help="distinct jobs matched at each size")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    database.init_db()
+    populate_skill.populate_skills()
+    with database.engine.connect() as conn:
+        skill_ids = [row[0] for row in conn.execute(text("SELECT id FROM skills ORDER BY id"))]
+    rng = np.random.default_rng(10)
+    jobs = [rng.choice(skill_ids, size=int(rng.integers(1, 5)), replace=False).tolist() for _ in range(args.jobs)]
+
+    next_user_id, rows = 1, 0
+    print(f"{'user_skills rows':>17}{'freelancers':>13}{'matched':>9}{'path':>9}{'median ms':>11}{'p95 ms':>9}")
+    for size in sorted(args.sizes):
+        next_user_id, rows = grow(rng, skill_ids, next_user_id, size, args.skills_per_freelancer, rows)
+        start = time.perf_counter()
+        load_freelancer_index()
+        load_ms = (time.perf_counter() - start) * 1000
+
+        db_session = SessionLocal()
+        try:
+            for skill_ids_of_job in jobs:
+                assert sql_match(db_session, skill_ids_of_job) == freelancer_index.match(skill_ids_of_job)
+                assert set(freelancer_index.overlap_counts(skill_ids_of_job)) == freelancer_index.match(skill_ids_of_job)
+            matched = statistics.median(len(freelancer_index.match(skill_ids_of_job)) for skill_ids_of_job in jobs)
+            paths = (
+                ("sql", lambda skill_ids_of_job: sql_match(db_session, skill_ids_of_job)),
+                ("match", freelancer_index.match),
+                ("overlap", freelancer_index.overlap_counts),
+            )
+            for label, function in paths:
+                median, p95 = timed(function, jobs, args.repeat)
+                print(f"{rows:>17,}{next_user_id - 1:>13,}{matched:>9,.0f}{label:>9}{median:>11.2f}{p95:>9.2f}")
+        finally:
+            db_session.close()
+        print(f"{'':>17}index built from the database in {load_ms:.0f} ms\n")
+
+if __name__ == "__main__":
+    main()
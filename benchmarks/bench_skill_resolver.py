@@ -0,0 +1,96 @@
+"""
+Micro-benchmark for SkillResolver lookups.
+
+Builds a synthetic 5,000-skill catalog out of a small vocabulary, so common words
+like "development" sit in the posting lists of a thousand skills, plus an
+adversarial catalog where every name shares the same tokens and trigrams. Times
+each query many times and reports the median and worst lookup.
+
+    python benchmarks/bench_skill_resolver.py [--skills 5000] [--budget-ms 1.0]
+
+Exits non-zero if any query's median exceeds the budget.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.skill_registry import SkillEntry
+from modules.skill_resolver import SkillResolver
+
+SUBJECTS = [
+    "Python", "Java", "JavaScript", "Ruby", "Rust", "Go", "Kotlin", "Swift", "PHP", "Scala",
+    "Data", "Cloud", "Mobile", "Web", "Game", "Embedded", "Security", "Network", "Database", "API",
+    "Brand", "Content", "Email", "Video", "Audio", "Product", "Sales", "Legal", "Finance", "Support",
+]
+QUALIFIERS = [
+    "Backend", "Frontend", "Full-Stack", "Enterprise", "Startup", "Realtime", "Distributed",
+    "Automated", "Technical", "Creative", "Strategic", "Junior", "Senior", "Lead", "Remote",
+]
+ROLES = ["Development", "Design", "Engineering", "Management", "Marketing", "Analysis", "Consulting", "Testing"]
+
+QUERIES = [
+    "development", "design", "management", "engineering", "data",
+    "d", "de", "dev", "web development", "python dev",
+    "develpment", "managment", "pyhton", "javascript", "xyzzy",
+    "Senior Python Backend Development",
+]
+ADVERSARIAL_QUERIES = ["development", "developmnt", "development development", "velopment"]
+
+
+def synthetic_catalog(size: int, seed: int = 8):
+    rng = random.Random(seed)
+    names = set()
+    while len(names) < size:
+        names.add(f"{rng.choice(QUALIFIERS)} {rng.choice(SUBJECTS)} {rng.choice(ROLES)} {rng.randint(1, 99)}")
+    return [SkillEntry(skill_id, name, None) for skill_id, name in enumerate(sorted(names), start=1)]
+
+def adversarial_catalog(size: int):
+    """Every name repeats the same words, so every token and trigram posting holds every skill."""
+    return [SkillEntry(skill_id, f"Development Development {skill_id:05d}", None) for skill_id in range(1, size + 1)]
+
+def time_queries(resolver, queries, repeat: int):
+    results = []
+    for query in queries:
+        resolver.resolve(query)
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            resolver.resolve(query)
+            samples.append((time.perf_counter() - start) * 1000)
+        results.append((query, statistics.median(samples), max(samples)))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--skills", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--budget-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    over_budget = []
+    for label, catalog, queries in (
+        ("synthetic", synthetic_catalog(args.skills), QUERIES),
+        ("adversarial", adversarial_catalog(args.skills), ADVERSARIAL_QUERIES),
+    ):
+        resolver = SkillResolver()
+        start = time.perf_counter()
+        resolver.rebuild(catalog)
+        print(f"\n{label} catalog: {len(catalog)} skills, index built in {(time.perf_counter() - start) * 1000:.0f} ms")
+        print(f"{'query':<36}{'median ms':>10}{'max ms':>10}")
+        for query, median, worst in time_queries(resolver, queries, args.repeat):
+            flag = "  OVER BUDGET" if median > args.budget_ms else ""
+            print(f"{query:<36}{median:>10.3f}{worst:>10.3f}{flag}")
+            if flag:
+                over_budget.append((label, query))
+    if over_budget:
+        print(f"\n{len(over_budget)} queries over the {args.budget_ms} ms budget.")
+        sys.exit(1)
+    print(f"\nAll queries within the {args.budget_ms} ms budget.")
+
+if __name__ == "__main__":
+    main()
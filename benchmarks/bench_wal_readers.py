@@ -0,0 +1,133 @@
+"""
+Reader latency while a writer is busy, before and after the SQLite profile.
+
+Runs the same workload twice against a throwaway database: a writer process that
+keeps inserting batches of jobs, and reader processes that run the browse_jobs
+query every few milliseconds. They are processes so that only SQLite locking,
+not the GIL, decides who waits. The first run uses a bare create_engine() on a
+rollback-journal file, which is how database.py connected before the DB_PROFILES
+presets; the second uses database.engine with the selected profile (WAL,
+busy_timeout, ...).
+
+    python benchmarks/bench_wal_readers.py [--seconds 5] [--readers 4] [--batch 500] [--pause-ms 20]
+
+Reports reader latency percentiles, how many reads and writes failed with
+"database is locked", and how many write batches committed.
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ["DATABASE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="bench_wal_"), "bench.db")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+import database
+from config import DATABASE_URL
+
+BROWSE_SQL = text("SELECT id, title, budget FROM jobs WHERE status = 'open' ORDER BY created_at DESC LIMIT 10")
+INSERT_SQL = text(
+    "INSERT INTO jobs (title, description, budget, status, created_at, client_id, application_count) "
+    "VALUES (:title, :description, 100, 'open', CURRENT_TIMESTAMP, 1, 0)"
+)
+
+
+def connect(profiled: bool):
+    """The engine under test, created fresh in each process."""
+    if profiled:
+        database.engine.dispose(close=False)
+        return database.engine
+    return create_engine(DATABASE_URL)
+
+def writer(profiled: bool, deadline: float, batch: int, pause: float, results):
+    commits = errors = 0
+    with connect(profiled).connect() as conn:
+        while time.time() < deadline:
+            rows = [{'title': f"Job {i}", 'description': "need a telegram bot " * 20} for i in range(batch)]
+            try:
+                with conn.begin():
+                    conn.execute(INSERT_SQL, rows)
+                commits += 1
+            except OperationalError:
+                errors += 1
+            time.sleep(pause)
+    results.put(('writer', commits, errors))
+
+def reader(profiled: bool, deadline: float, interval: float, results):
+    latencies, errors = [], 0
+    with connect(profiled).connect() as conn:
+        while time.time() < deadline:
+            start = time.perf_counter()
+            try:
+                conn.execute(BROWSE_SQL).all()
+                conn.rollback()
+            except OperationalError:
+                conn.rollback()
+                errors += 1
+                continue
+            latencies.append((time.perf_counter() - start) * 1000)
+            time.sleep(interval)
+    results.put(('reader', latencies, errors))
+
+def run(profiled: bool, args):
+    context = multiprocessing.get_context('fork')
+    results, deadline = context.Queue(), time.time() + args.seconds
+    processes = [context.Process(target=writer, args=(profiled, deadline, args.batch, args.pause_ms / 1000, results))]
+    processes += [context.Process(target=reader, args=(profiled, deadline, args.interval_ms / 1000, results)) for _ in range(args.readers)]
+    for process in processes:
+        process.start()
+    latencies, stats = [], {'commits': 0, 'write_errors': 0, 'read_errors': 0}
+    for _ in processes:
+        kind, values, errors = results.get()
+        if kind == 'writer':
+            stats['commits'], stats['write_errors'] = values, errors
+        else:
+            latencies += values
+            stats['read_errors'] += errors
+    for process in processes:
+        process.join()
+    return latencies, stats
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def seed(job_count: int):
+    database.init_db()
+    with database.engine.begin() as conn:
+        conn.execute(text("INSERT INTO users (id, telegram_id, first_name, balance, status) VALUES (1, 1, 'Client', 0, 'active')"))
+        conn.execute(INSERT_SQL, [{'title': f"Job {i}", 'description': "seed"} for i in range(job_count)])
+    database.engine.dispose()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--batch", type=int, default=500, help="jobs per write transaction")
+    parser.add_argument("--pause-ms", type=float, default=20, help="writer's gap between transactions")
+    parser.add_argument("--interval-ms", type=float, default=5, help="each reader's gap between reads")
+    parser.add_argument("--jobs", type=int, default=20000, help="jobs seeded before the run")
+    args = parser.parse_args()
+
+    seed(args.jobs)
+    with create_engine(DATABASE_URL).connect() as conn:
+        conn.exec_driver_sql("PRAGMA journal_mode=DELETE")
+
+    print(f"{args.readers} readers vs 1 writer ({args.batch} jobs per transaction) for {args.seconds:.0f} s\n")
+    print(f"{'engine':<28}{'reads':>8}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}{'read errors':>13}{'commits':>9}{'write errors':>14}")
+    for label, profiled in (("rollback journal", False), (f"DB_PROFILE={database.DB_PROFILE}", True)):
+        latencies, stats = run(profiled, args)
+        summary = (
+            f"{statistics.median(latencies):>9.2f}{percentile(latencies, 0.99):>9.2f}{max(latencies):>9.1f}"
+            if latencies else f"{'-':>9}{'-':>9}{'-':>9}"
+        )
+        print(f"{label:<28}{len(latencies):>8}{summary}{stats['read_errors']:>13}{stats['commits']:>9}{stats['write_errors']:>14}")
+
+if __name__ == "__main__":
+    main()
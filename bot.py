@@ -1,19 +1,23 @@
 # Regular Imports
+import functools
+import inspect
 import logging
 from telegram import Update
 from telegram.ext import (
     Application,
+    ApplicationHandlerStop,
     CommandHandler,
     CallbackQueryHandler,
     MessageHandler,
     filters,
     ContextTypes,
     ConversationHandler,
+    TypeHandler,
 )
 
 # Self Imports
-from config import TELEGRAM_TOKEN, ADMIN_ID
-from database import init_db, SessionLocal, User
+from config import TELEGRAM_TOKEN, ADMIN_ID, NOTIFY_METRICS_INTERVAL, OUTBOX_POLL_INTERVAL, ALERT_DIGEST_WINDOW, OPEN_JOBS_CHECK_INTERVAL
+from database import init_db, checkpoint_wal, db_profile, AsyncSessionLocal, User, RECONCILE_APPLICATION_COUNTS, REBUILD_USER_REPUTATION
 from modules import (
     client_flow,
     freelancer_flow,
@@ -22,8 +26,20 @@ from modules import (
     chat_flow,
     admin_flow,
     report_flow,
-    wallet_flow
+    wallet_flow,
+    search_flow,
+    skill_editor,
+    ban_list
 )
+from modules.skill_registry import load_skill_registry, reload_skill_registry
+from modules.user_cache import user_cache, get_cached_user
+from modules.skill_index import freelancer_index, load_freelancer_index
+from modules.notifier import notifier
+from modules.outbox import recover_outbox, dispatch_outbox
+from modules.ranking import freelancer_stats, load_freelancer_stats
+from modules.alert_digest import alert_digest
+from modules.open_jobs import open_jobs, load_open_jobs, check_open_jobs
+from modules.query_guard import check_query_budget
 
 # Set up logging
 logging.basicConfig(
@@ -32,6 +48,91 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def unit_of_work(callback):
+    """
+    Wraps a handler so the whole update runs inside one DB session.
+    The session is exposed as context.db_session and the caller's cached identity
+    (None if they haven't /start-ed yet) as context.current_user. Pending changes are
+    committed once the handler returns and rolled back if it raises; handlers don't
+    commit themselves. Anything that must only happen once the data is committed
+    (in-memory views, caches, waking the outbox) goes in context.after_commit and runs
+    after the commit, in order. Entries may be coroutine functions: handlers that write
+    queue their Telegram replies there too, so no network round-trip happens while the
+    transaction holds SQLite's write lock. Handlers with a @query_budget have their
+    statement count checked before the commit.
+    """
+    @functools.wraps(callback)
+    async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE):
+        db_session = AsyncSessionLocal()
+        context.db_session = db_session
+        context.current_user = None
+        context.after_commit = []
+        try:
+            if update.effective_user:
+                context.current_user = await get_cached_user(db_session, update.effective_user.id)
+            if context.current_user and context.current_user.role == 'freelancer':
+                freelancer_stats.touch(context.current_user.id)
+            queries_before = db_session.info.get('query_count', 0)
+            lazy_loads_before = db_session.info.get('lazy_load_count', 0)
+            result = await callback(update, context)
+            # Flush first so the INSERTs/UPDATEs the commit would send count against the budget
+            await db_session.flush()
+            check_query_budget(
+                callback,
+                db_session.info.get('query_count', 0) - queries_before,
+                db_session.info.get('lazy_load_count', 0) - lazy_loads_before,
+            )
+            await db_session.commit()
+            for action in context.after_commit:
+                try:
+                    outcome = action()
+                    if inspect.isawaitable(outcome):
+                        await outcome
+                except Exception:
+                    # Already committed: a failed reply mustn't skip the view and cache updates queued after it
+                    logger.exception(f"After-commit action of {callback.__name__} failed")
+            return result
+        except Exception:
+            await db_session.rollback()
+            raise
+        finally:
+            logger.debug(f"{callback.__name__} ran {db_session.info.get('query_count', 0)} queries")
+            await db_session.close()
+            context.db_session = None
+            context.current_user = None
+            context.after_commit = None
+    return wrapper
+
+def install_unit_of_work(handlers) -> None:
+    """Wraps every handler callback (including those nested in conversations) with unit_of_work."""
+    for handler in handlers:
+        if isinstance(handler, ConversationHandler):
+            install_unit_of_work(handler.entry_points)
+            for state_handlers in handler.states.values():
+                install_unit_of_work(state_handlers)
+            install_unit_of_work(handler.fallbacks)
+        else:
+            handler.callback = unit_of_work(handler.callback)
+
+async def ban_gate(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Drops updates from banned users before any other handler group runs, using only
+    the in-memory ban list. The one exception is contacting the admin, which the ban
+    notification explicitly offers.
+    """
+    user = update.effective_user
+    if not user or user.id not in ban_list.banned_telegram_ids:
+        return
+    if update.callback_query and update.callback_query.data == f"chat_{ADMIN_ID}":
+        return
+    if str(context.user_data.get('chat_recipient_id')) == ADMIN_ID:
+        return
+    if update.callback_query:
+        await update.callback_query.answer("Your account has been suspended. Please contact support.", show_alert=True)
+    elif update.message:
+        await update.message.reply_text("Your account has been suspended. Please contact support.")
+    raise ApplicationHandlerStop
+
 async def admin_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Entry point for the admin panel. Restricted to ADMIN_ID."""
     if str(update.effective_user.id) != ADMIN_ID:
@@ -39,34 +140,67 @@ async def admin_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         return
     await admin_flow.show_admin_dashboard(update, context)
 
+async def reload_skills_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Reloads the in-memory skill catalog after populate_skill.py has changed it. Restricted to ADMIN_ID."""
+    if str(update.effective_user.id) != ADMIN_ID:
+        await update.message.reply_text("You are not authorized to use this command.")
+        return
+    await reload_skill_registry(context.db_session)
+    await update.message.reply_text("Skill catalog reloaded.")
+
+async def reconcile_counts_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Recomputes every job's application_count and every user's reputation row. Restricted to ADMIN_ID."""
+    if str(update.effective_user.id) != ADMIN_ID:
+        await update.message.reply_text("You are not authorized to use this command.")
+        return
+    fixed = (await context.db_session.execute(RECONCILE_APPLICATION_COUNTS)).all()
+    rebuilt = (await context.db_session.execute(REBUILD_USER_REPUTATION)).rowcount
+    for job_id, count in fixed:
+        context.after_commit.append(functools.partial(open_jobs.set_proposal_count, job_id, count))
+    if fixed:
+        logger.warning(f"Reconciled application counts on {len(fixed)} jobs.")
+    context.after_commit.append(functools.partial(
+        update.message.reply_text,
+        f"Application counts reconciled. {len(fixed)} jobs were out of sync.\n"
+        f"Reputation rebuilt for {rebuilt} users."
+    ))
+
+async def check_open_jobs_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Checks the in-memory open-jobs view against the database and repairs drift. Restricted to ADMIN_ID."""
+    if str(update.effective_user.id) != ADMIN_ID:
+        await update.message.reply_text("You are not authorized to use this command.")
+        return
+    removed, refreshed = await check_open_jobs()
+    await update.message.reply_text(
+        f"Open-jobs view checked ({len(open_jobs)} jobs).\n"
+        f"Removed {removed} stale jobs, refreshed {refreshed}."
+    )
+
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handles the /start command for new and returning users."""
     user_info = update.effective_user
-    db_session = SessionLocal()
-    try:
-        user = db_session.query(User).filter(User.telegram_id == user_info.id).first()
-        if not user:
-            new_user = User(
-                telegram_id=user_info.id,
-                first_name=user_info.first_name,
-                username=user_info.username
-            )
-            db_session.add(new_user)
-            db_session.commit()
-            logger.info(f"New user created: {user_info.username} ({user_info.id})")
-            await common.show_main_menu(update, context)
-            return
-        if user.status == 'banned':
-            await update.message.reply_text("Your account has been suspended. Please contact support.")
-            return
-        if user.role == 'client':
-            await client_flow.show_client_dashboard(update, context)
-        elif user.role == 'freelancer':
-            await freelancer_flow.show_freelancer_dashboard(update, context)
-        else:
-            await common.show_main_menu(update, context)
-    finally:
-        db_session.close()
+    db_session = context.db_session
+    user = context.current_user
+    if not user:
+        new_user = User(
+            telegram_id=user_info.id,
+            first_name=user_info.first_name,
+            username=user_info.username
+        )
+        db_session.add(new_user)
+        context.after_commit.append(functools.partial(user_cache.put, new_user))
+        logger.info(f"New user created: {user_info.username} ({user_info.id})")
+        context.after_commit.append(functools.partial(common.show_main_menu, update, context))
+        return
+    if user.status == 'banned':
+        await update.message.reply_text("Your account has been suspended. Please contact support.")
+        return
+    if user.role == 'client':
+        await client_flow.show_client_dashboard(update, context)
+    elif user.role == 'freelancer':
+        await freelancer_flow.show_freelancer_dashboard(update, context)
+    else:
+        await common.show_main_menu(update, context)
 
 async def role_selection_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handles the client/freelancer role selection and shows the correct dashboard."""
@@ -75,28 +209,53 @@ async def role_selection_handler(update: Update, context: ContextTypes.DEFAULT_T
 
     role = 'client' if query.data == 'role_select_client' else 'freelancer'
     
-    db_session = SessionLocal()
-    try:
-        user = db_session.query(User).filter(User.telegram_id == query.from_user.id).first()
-        if user:
-            user.role = role
-            db_session.commit()
-            logger.info(f"User {user.telegram_id} selected role: {role}")
-
-            if role == 'client':
-                await client_flow.show_client_dashboard(update, context)
-            else:
-                await freelancer_flow.show_freelancer_dashboard(update, context)
-    finally:
-        db_session.close()
+    db_session = context.db_session
+    if context.current_user:
+        user = await db_session.get(User, context.current_user.id)
+        user.role = role
+        context.after_commit.append(functools.partial(user_cache.invalidate, user.telegram_id))
+        if role == 'freelancer':
+            skill_ids = {skill.id for skill in await user.awaitable_attrs.skills}
+            context.after_commit.append(functools.partial(freelancer_index.set_freelancer, user.id, user.telegram_id, skill_ids))
+        else:
+            context.after_commit.append(functools.partial(freelancer_index.remove_freelancer, user.id))
+        logger.info(f"User {user.telegram_id} selected role: {role}")
+
+        dashboard = client_flow.show_client_dashboard if role == 'client' else freelancer_flow.show_freelancer_dashboard
+        context.after_commit.append(functools.partial(dashboard, update, context))
 
 async def test(update, context):
     await update.message.reply_text("Entered Test")
     return ConversationHandler.END
 
+async def on_startup(application: Application) -> None:
+    await notifier.start(application.bot)
+
+async def on_shutdown(application: Application) -> None:
+    alert_digest.flush(force=True)
+    await notifier.stop()
+
 def main() -> None:
     init_db()
-    application = Application.builder().token(TELEGRAM_TOKEN).build()
+    ban_list.load_banned_ids()
+    load_skill_registry()
+    load_freelancer_index()
+    load_freelancer_stats()
+    load_open_jobs()
+    recover_outbox()
+    application = (
+        Application.builder().token(TELEGRAM_TOKEN)
+        .post_init(on_startup).post_shutdown(on_shutdown)
+        .build()
+    )
+
+    if db_profile["checkpoint_interval"]:
+        application.job_queue.run_repeating(checkpoint_wal, interval=db_profile["checkpoint_interval"], first=db_profile["checkpoint_interval"])
+    application.job_queue.run_repeating(notifier.log_metrics, interval=NOTIFY_METRICS_INTERVAL, first=NOTIFY_METRICS_INTERVAL)
+    application.job_queue.run_repeating(dispatch_outbox, interval=OUTBOX_POLL_INTERVAL, first=0)
+    if OPEN_JOBS_CHECK_INTERVAL:
+        application.job_queue.run_repeating(check_open_jobs, interval=OPEN_JOBS_CHECK_INTERVAL, first=OPEN_JOBS_CHECK_INTERVAL)
+    application.job_queue.run_repeating(alert_digest.flush_due, interval=max(5, min(60, ALERT_DIGEST_WINDOW // 10)))
 
     report_conv_handler = ConversationHandler(
 		    entry_points=[CallbackQueryHandler(report_flow.start_report, pattern='^report_user_')],
@@ -206,6 +365,10 @@ def main() -> None:
     # 2. Command Handlers
     application.add_handler(CommandHandler("start", start))
     application.add_handler(CommandHandler("admin", admin_command))
+    application.add_handler(CommandHandler("reloadskills", reload_skills_command))
+    application.add_handler(CommandHandler("reconcilecounts", reconcile_counts_command))
+    application.add_handler(CommandHandler("checkopenjobs", check_open_jobs_command))
+    application.add_handler(CommandHandler("search", search_flow.search_jobs))
 
     # 3. Specific CallbackQuery Handlers
     # -- General, Payment, & Wallet --
@@ -232,14 +395,21 @@ def main() -> None:
 
     # -- Freelancer Flow --
     application.add_handler(CallbackQueryHandler(freelancer_flow.show_freelancer_dashboard, pattern='^back_to_freelancer_dashboard$'))
-    application.add_handler(CallbackQueryHandler(freelancer_flow.browse_jobs, pattern='^freelancer_browse_jobs$'))
+    application.add_handler(CallbackQueryHandler(freelancer_flow.browse_feed, pattern='^freelancer_browse_jobs$'))
+    application.add_handler(CallbackQueryHandler(freelancer_flow.browse_feed, pattern='^feed_job_'))
+    application.add_handler(CallbackQueryHandler(freelancer_flow.browse_jobs, pattern='^browse_jobs_newest$'))
     application.add_handler(CallbackQueryHandler(freelancer_flow.browse_jobs, pattern='^browse_job_'))
+    application.add_handler(CallbackQueryHandler(search_flow.search_page, pattern='^search_page_'))
     application.add_handler(CallbackQueryHandler(freelancer_flow.browse_jobs, pattern='^view_specific_job_'))
     application.add_handler(CallbackQueryHandler(freelancer_flow.show_my_applications, pattern='^freelancer_my_bids$'))
     application.add_handler(CallbackQueryHandler(freelancer_flow.show_my_applications, pattern='^view_app_'))
     application.add_handler(CallbackQueryHandler(freelancer_flow.show_my_profile, pattern='^freelancer_profile$'))
-    application.add_handler(CallbackQueryHandler(freelancer_flow.edit_skills_menu, pattern='^edit_skills_menu'))
-    application.add_handler(CallbackQueryHandler(freelancer_flow.toggle_skill, pattern='^toggle_skill_'))
+    application.add_handler(CallbackQueryHandler(skill_editor.edit_skills_menu, pattern='^edit_skills_menu'))
+    application.add_handler(CallbackQueryHandler(skill_editor.show_skill_categories, pattern='^skill_categories$'))
+    application.add_handler(CallbackQueryHandler(skill_editor.show_skill_category, pattern='^skill_cat_'))
+    application.add_handler(CallbackQueryHandler(skill_editor.toggle_skill, pattern='^toggle_skill_'))
+    application.add_handler(CallbackQueryHandler(skill_editor.save_skills, pattern='^skill_save$'))
+    application.add_handler(CallbackQueryHandler(skill_editor.discard_skills, pattern='^skill_discard$'))
     application.add_handler(CallbackQueryHandler(freelancer_flow.view_ongoing_projects, pattern='^freelancer_ongoing_projects$'))
     application.add_handler(CallbackQueryHandler(freelancer_flow.mark_job_complete, pattern='^mark_complete_'))
     application.add_handler(CallbackQueryHandler(freelancer_flow.show_earnings, pattern='^freelancer_earnings$'))
@@ -256,6 +426,12 @@ def main() -> None:
     application.add_handler(CallbackQueryHandler(client_flow.client_button_placeholder, pattern='^client_'))
     application.add_handler(CallbackQueryHandler(freelancer_flow.freelancer_button_placeholder, pattern='^freelancer_'))
 
+    # One DB session and one caller lookup per update, for every handler registered above
+    install_unit_of_work(handler for group in application.handlers.values() for handler in group)
+
+    # 0. Ban gate: runs in its own group ahead of everything above and never touches the DB
+    application.add_handler(TypeHandler(Update, ban_gate), group=-1)
+
     print("Bot is running...")
     application.run_polling()
 
@@ -4,5 +4,93 @@ from dotenv import load_dotenv
 load_dotenv()
 
 TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
-DATABASE_URL = "sqlite:///database.db"
+DATABASE_PATH = os.getenv("DATABASE_PATH", "database.db")
+DATABASE_URL = f"sqlite:///{DATABASE_PATH}"
+ASYNC_DATABASE_URL = f"sqlite+aiosqlite:///{DATABASE_PATH}"
 ADMIN_ID = os.getenv("ADMIN_ID")
+
+# SQLite tuning presets, applied as PRAGMAs on every new connection.
+# checkpoint_interval is in seconds (None disables the periodic WAL checkpoint).
+DB_PROFILES = {
+    "dev": {
+        "pragmas": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "busy_timeout": 5000,
+            "cache_size": -2000,
+            "mmap_size": 0,
+            "temp_store": "DEFAULT",
+        },
+        "checkpoint_interval": None,
+    },
+    "prod": {
+        "pragmas": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "busy_timeout": 10000,
+            "cache_size": -64000,
+            "mmap_size": 268435456,
+            "temp_store": "MEMORY",
+        },
+        "checkpoint_interval": 300,
+    },
+    "bench": {
+        "pragmas": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "busy_timeout": 30000,
+            "cache_size": -256000,
+            "mmap_size": 1073741824,
+            "temp_store": "MEMORY",
+        },
+        "checkpoint_interval": 60,
+    },
+}
+DB_PROFILE = os.getenv("DB_PROFILE", "prod")
+
+# In-process cache of lightweight user records (see modules/user_cache.py)
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", "300"))
+
+# Outgoing notification dispatcher (see modules/notifier.py). Telegram allows ~30 msg/s
+# overall and about one message per second to the same chat.
+NOTIFY_RATE = float(os.getenv("NOTIFY_RATE", "25"))
+NOTIFY_PER_CHAT_INTERVAL = float(os.getenv("NOTIFY_PER_CHAT_INTERVAL", "1.0"))
+NOTIFY_CONCURRENCY = int(os.getenv("NOTIFY_CONCURRENCY", "8"))
+NOTIFY_MAX_RETRIES = int(os.getenv("NOTIFY_MAX_RETRIES", "5"))
+NOTIFY_METRICS_INTERVAL = int(os.getenv("NOTIFY_METRICS_INTERVAL", "60"))
+
+# Durable notification outbox (see modules/outbox.py)
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+OUTBOX_POLL_INTERVAL = int(os.getenv("OUTBOX_POLL_INTERVAL", "5"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5"))
+
+# Job alerts go only to the K best-ranked matching freelancers (see modules/ranking.py).
+# Each tier is (minimum job budget, K); bigger jobs reach more freelancers.
+MATCH_TOP_K_TIERS = [
+    (0, 20),
+    (100, 50),
+    (500, 100),
+    (2000, 200),
+]
+
+# Job-alert digests (see modules/alert_digest.py). Alerts for the same freelancer are
+# held for ALERT_DIGEST_WINDOW seconds and sent as one message; 0 sends them right away.
+ALERT_DIGEST_WINDOW = int(os.getenv("ALERT_DIGEST_WINDOW", "300"))
+ALERT_DIGEST_MAX_JOBS = int(os.getenv("ALERT_DIGEST_MAX_JOBS", "10"))
+ALERT_MAX_PER_HOUR = int(os.getenv("ALERT_MAX_PER_HOUR", "6"))
+
+# How often the in-memory open-jobs view is checked against the database, in seconds
+# (see modules/open_jobs.py); admins can also run /checkopenjobs. 0 disables the periodic check.
+OPEN_JOBS_CHECK_INTERVAL = int(os.getenv("OPEN_JOBS_CHECK_INTERVAL", "3600"))
+
+# Per-freelancer ranked job feeds kept in memory (see modules/job_feed.py)
+FEED_CACHE_SIZE = int(os.getenv("FEED_CACHE_SIZE", "5000"))
+
+# Skills shown per page in the category-based skill editor (see modules/skill_editor.py)
+SKILL_EDITOR_PAGE_SIZE = int(os.getenv("SKILL_EDITOR_PAGE_SIZE", "8"))
+
+# Handlers declare a SQL statement budget with @query_budget (see modules/query_guard.py).
+# 'warn' logs handlers that exceed it or lazy-load a relationship; 'raise' fails the
+# update instead, for development and test runs; 'off' skips the check.
+QUERY_GUARD = os.getenv("QUERY_GUARD", "warn")
@@ -1,22 +1,93 @@
 import datetime
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Enum, Float, ForeignKey, Table
-from sqlalchemy.orm import sessionmaker, relationship
+import logging
+from sqlalchemy import create_engine, event, inspect, text, Column, Integer, String, Text, DateTime, Enum, Float, ForeignKey, Table, Index
+from sqlalchemy.orm import sessionmaker, relationship, Session
 from sqlalchemy.ext.declarative import declarative_base
-from config import DATABASE_URL
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncAttrs
+from config import DATABASE_URL, ASYNC_DATABASE_URL, DB_PROFILES, DB_PROFILE
 
+logger = logging.getLogger(__name__)
+
+if DB_PROFILE not in DB_PROFILES:
+    raise ValueError(f"Unknown DB_PROFILE '{DB_PROFILE}'. Expected one of: {', '.join(DB_PROFILES)}")
+db_profile = DB_PROFILES[DB_PROFILE]
+
+# Sync engine: used by init_db() and standalone scripts like populate_skill.py
 engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
+
+# Async engine: used by every bot handler so queries don't block the event loop
+async_engine = create_async_engine(ASYNC_DATABASE_URL)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """Applies the selected DB_PROFILE's PRAGMAs to every new SQLite connection."""
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma, value in db_profile["pragmas"].items():
+            cursor.execute(f"PRAGMA {pragma}={value}")
+    finally:
+        cursor.close()
+
+event.listen(engine, "connect", apply_sqlite_pragmas)
+event.listen(async_engine.sync_engine, "connect", apply_sqlite_pragmas)
+
+@event.listens_for(Session, "after_begin")
+def attach_session_info(session, transaction, connection):
+    """Points the connection at its session's info so Core-level statements are counted per session."""
+    connection.info['session_info'] = session.info
+
+def detach_session_info(dbapi_connection, connection_record):
+    connection_record.info.pop('session_info', None)
+
+def count_session_queries(conn, cursor, statement, parameters, context, executemany):
+    """
+    Counts every statement sent to SQLite per session, including the INSERTs and UPDATEs
+    a flush emits, so per-update query counts can be checked.
+    """
+    info = conn.info.get('session_info')
+    if info is not None:
+        info['query_count'] = info.get('query_count', 0) + 1
+
+for sync_engine in (engine, async_engine.sync_engine):
+    event.listen(sync_engine, "before_cursor_execute", count_session_queries)
+    event.listen(sync_engine, "checkin", detach_session_info)
+
+@event.listens_for(Session, "do_orm_execute")
+def count_lazy_loads(orm_execute_state):
+    """Counts lazy loads per session; they are what a per-update query budget usually catches."""
+    if orm_execute_state.is_select and orm_execute_state.lazy_loaded_from is not None:
+        info = orm_execute_state.session.info
+        info['lazy_load_count'] = info.get('lazy_load_count', 0) + 1
+
+async def checkpoint_wal(context=None):
+    """
+    Folds the WAL file back into the main database so it doesn't grow without bound.
+    Signature matches a job-queue callback so it can be scheduled directly.
+    """
+    async with async_engine.connect() as conn:
+        busy, log_frames, checkpointed = (await conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")).one()
+    if busy:
+        logger.warning(f"WAL checkpoint could not complete ({checkpointed}/{log_frames} frames); a reader or writer was active.")
+    else:
+        logger.info(f"WAL checkpoint complete ({checkpointed}/{log_frames} frames).")
+
+# AsyncAttrs gives every model `awaitable_attrs` for loading relationships from async code
+Base = declarative_base(cls=AsyncAttrs)
 
 # --- Association Tables for Many-to-Many Relationships ---
 user_skills_table = Table('user_skills', Base.metadata,
     Column('user_id', Integer, ForeignKey('users.id')),
-    Column('skill_id', Integer, ForeignKey('skills.id'))
+    Column('skill_id', Integer, ForeignKey('skills.id')),
+    Index('ux_user_skills_user_skill', 'user_id', 'skill_id', unique=True),
+    Index('ix_user_skills_skill_id', 'skill_id'),
 )
 
 job_skills_table = Table('job_skills', Base.metadata,
     Column('job_id', Integer, ForeignKey('jobs.id')),
-    Column('skill_id', Integer, ForeignKey('skills.id'))
+    Column('skill_id', Integer, ForeignKey('skills.id')),
+    Index('ux_job_skills_job_skill', 'job_id', 'skill_id', unique=True),
+    Index('ix_job_skills_skill_id', 'skill_id'),
 )
 
 # --- Main Models ---
@@ -61,6 +132,8 @@ class Job(Base):
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
     client_id = Column(Integer, ForeignKey('users.id'))
     hired_freelancer_id = Column(Integer, ForeignKey('users.id'), nullable=True)
+    # Denormalized COUNT of applications, bumped in the same transaction as each insert
+    application_count = Column(Integer, nullable=False, default=0, server_default=text('0'))
 
     client = relationship("User", back_populates="jobs_posted", foreign_keys=[client_id])
     hired_freelancer = relationship("User", back_populates="jobs_hired_for", foreign_keys=[hired_freelancer_id])
@@ -68,6 +141,12 @@ class Job(Base):
     skills_required = relationship("Skill", secondary=job_skills_table, back_populates="jobs")
     reviews = relationship("Review", back_populates="job")
 
+    __table_args__ = (
+        Index('ix_jobs_status_created_at', 'status', 'created_at'),
+        Index('ix_jobs_client_status', 'client_id', 'status'),
+        Index('ix_jobs_hired_freelancer_status', 'hired_freelancer_id', 'status'),
+    )
+
 class Application(Base):
     __tablename__ = "applications"
 
@@ -81,6 +160,11 @@ class Application(Base):
     freelancer_id = Column(Integer, ForeignKey('users.id'))
     freelancer = relationship("User", back_populates="applications")
 
+    __table_args__ = (
+        Index('ix_applications_job_freelancer', 'job_id', 'freelancer_id'),
+        Index('ix_applications_freelancer_created_at', 'freelancer_id', 'created_at'),
+    )
+
 class Review(Base):
     __tablename__ = "reviews"
 
@@ -96,6 +180,10 @@ class Review(Base):
     reviewer = relationship("User", back_populates="reviews_given", foreign_keys=[reviewer_id])
     reviewee = relationship("User", back_populates="reviews_received", foreign_keys=[reviewee_id])
 
+    __table_args__ = (
+        Index('ix_reviews_reviewee_id', 'reviewee_id'),
+    )
+
 class Transaction(Base):
     __tablename__ = "transactions"
     id = Column(Integer, primary_key=True, index=True)
@@ -109,8 +197,199 @@ class Transaction(Base):
 
     user = relationship("User")
 
+    __table_args__ = (
+        Index('ix_transactions_user_created_at', 'user_id', 'created_at'),
+    )
+
+class UserReputation(Base):
+    """
+    Running profile totals per user, kept up to date by the handlers that write
+    reviews, post jobs and complete them, so profiles don't aggregate on every view.
+    """
+    __tablename__ = "user_reputation"
+
+    user_id = Column(Integer, ForeignKey('users.id'), primary_key=True)
+    rating_sum = Column(Integer, nullable=False, default=0)
+    rating_count = Column(Integer, nullable=False, default=0)
+    jobs_completed = Column(Integer, nullable=False, default=0)
+    # Jobs that went live (left 'pending_deposit'); counted when the job opens
+    jobs_posted = Column(Integer, nullable=False, default=0)
+    total_earned = Column(Float, nullable=False, default=0.0)
+
+    @property
+    def average_rating(self):
+        return self.rating_sum / self.rating_count if self.rating_count else None
+
+class Outbox(Base):
+    """Outgoing Telegram messages, written in the same transaction as the change they announce."""
+    __tablename__ = "outbox"
+    id = Column(Integer, primary_key=True)
+    chat_id = Column(Integer, nullable=False)
+    text = Column(Text, nullable=False)
+    parse_mode = Column(String, nullable=True)
+    reply_markup = Column(Text, nullable=True)  # InlineKeyboardMarkup as JSON
+    status = Column(Enum('pending', 'sending', 'sent', 'failed', name='outbox_status_enum'), default='pending', nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index('ix_outbox_status_id', 'status', 'id'),
+    )
+
+def create_missing_columns() -> set:
+    """
+    Adds declared columns that an existing database file is missing, the same way
+    create_missing_indexes() catches up on indexes. Returns "table.column" names added.
+    """
+    inspector = inspect(engine)
+    added = set()
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=engine.dialect)}"
+                if column.server_default is not None:
+                    # SQLite only accepts NOT NULL on an added column that has a default
+                    if not column.nullable:
+                        ddl += " NOT NULL"
+                    ddl += f" DEFAULT {column.server_default.arg.text}"
+                conn.execute(text(ddl))
+                added.add(f"{table.name}.{column.name}")
+    for name in sorted(added):
+        print(f"  - Added column '{name}'")
+    return added
+
+# Rewrites every job's application_count that disagrees with its applications and
+# returns (id, application_count) for the rows it fixed.
+RECONCILE_APPLICATION_COUNTS = text("""
+    UPDATE jobs SET application_count = (SELECT COUNT(*) FROM applications WHERE applications.job_id = jobs.id)
+    WHERE application_count != (SELECT COUNT(*) FROM applications WHERE applications.job_id = jobs.id)
+    RETURNING id, application_count
+""")
+
+def reconcile_application_counts() -> int:
+    """Repairs drifted Job.application_count values. Returns how many jobs were fixed."""
+    with engine.begin() as conn:
+        return len(conn.execute(RECONCILE_APPLICATION_COUNTS).all())
+
+# Recomputes every user's reputation row from the source tables
+REBUILD_USER_REPUTATION = text("""
+    INSERT OR REPLACE INTO user_reputation (user_id, rating_sum, rating_count, jobs_completed, jobs_posted, total_earned)
+    SELECT users.id,
+        (SELECT COALESCE(SUM(rating), 0) FROM reviews WHERE reviews.reviewee_id = users.id),
+        (SELECT COUNT(*) FROM reviews WHERE reviews.reviewee_id = users.id),
+        (SELECT COUNT(*) FROM jobs WHERE jobs.hired_freelancer_id = users.id AND jobs.status = 'completed'),
+        (SELECT COUNT(*) FROM jobs WHERE jobs.client_id = users.id AND jobs.status != 'pending_deposit'),
+        (SELECT COALESCE(SUM(amount), 0) FROM transactions
+            WHERE transactions.user_id = users.id AND transactions.type = 'earning' AND transactions.status = 'completed')
+    FROM users
+""")
+
+def rebuild_user_reputation() -> int:
+    """Rebuilds user_reputation from reviews, jobs and transactions. Returns how many users it wrote."""
+    with engine.begin() as conn:
+        return conn.execute(REBUILD_USER_REPUTATION).rowcount
+
+def create_missing_indexes():
+    """
+    Builds any declared index that an existing database file is missing.
+    create_all() only creates indexes alongside new tables, so databases created
+    before an index was declared need this to catch up.
+    """
+    inspector = inspect(engine)
+    existing = {
+        index['name']
+        for table_name in inspector.get_table_names()
+        for index in inspector.get_indexes(table_name)
+    }
+    created = []
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                if index.name in existing:
+                    continue
+                if index.unique:
+                    # Older databases may hold duplicate association rows; keep the first of each.
+                    key_columns = ", ".join(column.name for column in index.columns)
+                    conn.execute(text(
+                        f"DELETE FROM {table.name} WHERE rowid NOT IN "
+                        f"(SELECT MIN(rowid) FROM {table.name} GROUP BY {key_columns})"
+                    ))
+                index.create(bind=conn)
+                created.append(index.name)
+    for name in created:
+        print(f"  - Created index '{name}'")
+
+# Full-text index over open jobs' title and description, used by /search. It is an
+# external-content FTS5 table (the text stays in `jobs`) and only holds open jobs:
+# triggers add a job when it enters 'open' and remove it when it leaves.
+JOB_SEARCH_BACKFILL_CHUNK = 5000
+JOB_SEARCH_TRIGGERS = {
+    'jobs_fts_insert': """
+        CREATE TRIGGER jobs_fts_insert AFTER INSERT ON jobs WHEN new.status = 'open' BEGIN
+            INSERT INTO jobs_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+        END""",
+    # One trigger so the old row is always removed before the new one is added
+    'jobs_fts_update': """
+        CREATE TRIGGER jobs_fts_update AFTER UPDATE OF status, title, description ON jobs BEGIN
+            INSERT INTO jobs_fts(jobs_fts, rowid, title, description)
+                SELECT 'delete', old.id, old.title, old.description WHERE old.status = 'open';
+            INSERT INTO jobs_fts(rowid, title, description)
+                SELECT new.id, new.title, new.description WHERE new.status = 'open';
+        END""",
+    'jobs_fts_delete': """
+        CREATE TRIGGER jobs_fts_delete AFTER DELETE ON jobs WHEN old.status = 'open' BEGIN
+            INSERT INTO jobs_fts(jobs_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+        END""",
+}
+
+def create_job_search_index():
+    """
+    Creates the jobs_fts index on databases that predate it. Existing open jobs are
+    indexed in chunks, each in its own transaction, and the sync triggers are only
+    installed once that finishes, so an interrupted build resumes where it stopped.
+    """
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5("
+            "title, description, content='jobs', content_rowid='id', tokenize='porter unicode61')"
+        ))
+        installed = {row[0] for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'trigger'"))}
+    if set(JOB_SEARCH_TRIGGERS) <= installed:
+        return
+
+    indexed = 0
+    while True:
+        with engine.begin() as conn:
+            # jobs_fts_docsize has one row per indexed document, so its max id is our progress
+            last_id = conn.execute(text("SELECT COALESCE(MAX(id), 0) FROM jobs_fts_docsize")).scalar()
+            added = conn.execute(text(
+                "INSERT INTO jobs_fts(rowid, title, description) "
+                "SELECT id, title, description FROM jobs WHERE status = 'open' AND id > :last_id ORDER BY id LIMIT :chunk"
+            ), {'last_id': last_id, 'chunk': JOB_SEARCH_BACKFILL_CHUNK}).rowcount
+        indexed += added
+        if added < JOB_SEARCH_BACKFILL_CHUNK:
+            break
+
+    with engine.begin() as conn:
+        for name, ddl in JOB_SEARCH_TRIGGERS.items():
+            if name not in installed:
+                conn.execute(text(ddl))
+    print(f"  - Built job search index ({indexed} open jobs indexed)")
+
 def init_db():
     print("Initializing database...")
+    new_tables = set(Base.metadata.tables) - set(inspect(engine).get_table_names())
     Base.metadata.create_all(bind=engine)
+    if 'user_reputation' in new_tables:
+        print(f"  - Built reputation for {rebuild_user_reputation()} users")
+    if 'jobs.application_count' in create_missing_columns():
+        print(f"  - Backfilled application counts on {reconcile_application_counts()} jobs")
+    create_missing_indexes()
+    create_job_search_index()
     print("Database initialized.")
 
@@ -0,0 +1,159 @@
+import logging
+import time
+from collections import deque
+from typing import NamedTuple
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+
+from config import ALERT_DIGEST_WINDOW, ALERT_DIGEST_MAX_JOBS, ALERT_MAX_PER_HOUR
+from database import SessionLocal
+from .notifier import notifier
+from .open_jobs import open_jobs
+from .outbox import enqueue
+
+logger = logging.getLogger(__name__)
+
+
+class JobAlert(NamedTuple):
+    job_id: int
+    title: str
+    budget: float
+
+
+def format_single_alert(alert: JobAlert):
+    text = (
+        f"?? **New Job Alert!**\n\n"
+        f"A new job matching your skills has been posted:\n\n"
+        f"?? **{alert.title}**\n"
+        f"?? Budget: ${alert.budget:,.2f}"
+    )
+    keyboard = [[InlineKeyboardButton("?? View Job & Apply", callback_data=f"view_specific_job_{alert.job_id}")]]
+    return text, InlineKeyboardMarkup(keyboard)
+
+def format_digest(alerts):
+    """One message listing several jobs, newest first, with a View button per job."""
+    shown = alerts[-ALERT_DIGEST_MAX_JOBS:][::-1]
+    lines = [f"?? **{len(alerts)} New Jobs Matching Your Skills**\n"]
+    for number, alert in enumerate(shown, start=1):
+        lines.append(f"{number}. **{alert.title}** - ${alert.budget:,.2f}")
+    if len(alerts) > len(shown):
+        lines.append(f"\n...and {len(alerts) - len(shown)} more. Browse jobs to see them all.")
+    keyboard = [
+        [InlineKeyboardButton(f"View #{number}: {alert.title[:30]}", callback_data=f"view_specific_job_{alert.job_id}")]
+        for number, alert in enumerate(shown, start=1)
+    ]
+    return "\n".join(lines), InlineKeyboardMarkup(keyboard)
+
+
+class AlertDigest:
+    """
+    Buffers job alerts per freelancer and sends them as one message once the
+    oldest has waited `window` seconds, with at most `max_per_hour` messages per
+    freelancer. Alerts that hit the cap stay buffered for the next allowed send;
+    alerts for jobs that closed in the meantime are dropped when the buffer is sent.
+    """
+
+    def __init__(self, window=ALERT_DIGEST_WINDOW, max_per_hour=ALERT_MAX_PER_HOUR):
+        self.window = window
+        self.max_per_hour = max_per_hour
+        self.pending = {}
+        self.first_buffered = {}
+        self.recent_sends = {}
+        self.alerts_in = 0
+        self.alerts_closed = 0
+        self.messages_out = 0
+
+    def add(self, telegram_id: int, alert: JobAlert):
+        alerts = self.pending.setdefault(telegram_id, [])
+        if any(queued.job_id == alert.job_id for queued in alerts):
+            return
+        self.alerts_in += 1
+        alerts.append(alert)
+        self.first_buffered.setdefault(telegram_id, time.monotonic())
+        if self.window <= 0:
+            self._flush_chat(telegram_id, time.monotonic())
+
+    def _under_cap(self, telegram_id: int, now: float) -> bool:
+        sends = self.recent_sends.get(telegram_id)
+        if not sends:
+            return True
+        while sends and sends[0] <= now - 3600:
+            sends.popleft()
+        if not sends:
+            del self.recent_sends[telegram_id]
+            return True
+        return len(sends) < self.max_per_hour
+
+    def _take_open(self, telegram_id: int):
+        """Removes a freelancer's buffer and returns the alerts whose jobs are still open."""
+        alerts = self.pending.pop(telegram_id)
+        del self.first_buffered[telegram_id]
+        still_open = [alert for alert in alerts if open_jobs.get(alert.job_id) is not None]
+        self.alerts_closed += len(alerts) - len(still_open)
+        return still_open
+
+    def _flush_chat(self, telegram_id: int, now: float) -> bool:
+        if not self._under_cap(telegram_id, now):
+            return False
+        alerts = self._take_open(telegram_id)
+        if not alerts:
+            return False
+        text, markup = format_single_alert(alerts[0]) if len(alerts) == 1 else format_digest(alerts)
+        notifier.submit(telegram_id, text, reply_markup=markup, parse_mode='Markdown')
+        self.recent_sends.setdefault(telegram_id, deque()).append(now)
+        self.messages_out += 1
+        return True
+
+    def _persist_capped(self):
+        """
+        Writes the buffers still held back by the hourly cap to the outbox, one
+        message per freelancer, so a forced flush at shutdown doesn't lose them.
+        They are delivered by dispatch_outbox once the bot is running again.
+        """
+        messages = []
+        for telegram_id in list(self.pending):
+            alerts = self._take_open(telegram_id)
+            if alerts:
+                messages.append((telegram_id, alerts))
+        if not messages:
+            return
+        db_session = SessionLocal()
+        try:
+            for telegram_id, alerts in messages:
+                text, markup = format_single_alert(alerts[0]) if len(alerts) == 1 else format_digest(alerts)
+                enqueue(db_session, telegram_id, text, reply_markup=markup, parse_mode='Markdown')
+            db_session.commit()
+        finally:
+            db_session.close()
+        logger.info(f"Alert digest: {len(messages)} capped digests saved to the outbox for later delivery.")
+
+    def flush(self, force: bool = False) -> int:
+        """
+        Sends every buffer whose window has elapsed. With `force` it sends all of
+        them, and saves those held back by the hourly cap to the outbox. Returns messages sent.
+        """
+        now = time.monotonic()
+        due = [
+            telegram_id for telegram_id, since in self.first_buffered.items()
+            if force or now - since >= self.window
+        ]
+        sent = sum(1 for telegram_id in due if self._flush_chat(telegram_id, now))
+        if force:
+            self._persist_capped()
+        # Forget send history that no longer counts toward anyone's hourly cap
+        for telegram_id in [tid for tid, sends in self.recent_sends.items() if sends[-1] <= now - 3600]:
+            del self.recent_sends[telegram_id]
+        if sent:
+            logger.info(
+                f"Alert digest: sent {sent} messages, {len(self.pending)} freelancers still buffered. "
+                f"Totals: {self.alerts_in} alerts in, {self.alerts_closed} dropped for closed jobs, "
+                f"{self.messages_out} messages out."
+            )
+        return sent
+
+    async def flush_due(self, context=None):
+        """Job-queue callback."""
+        self.flush()
+
+
+alert_digest = AlertDigest()
@@ -0,0 +1,20 @@
+from database import SessionLocal, User
+
+# Telegram IDs of banned users, consulted before any handler runs
+banned_telegram_ids = set()
+
+def load_banned_ids():
+    """Loads every banned user's telegram_id into memory. Called once at startup."""
+    db_session = SessionLocal()
+    try:
+        rows = db_session.query(User.telegram_id).filter(User.status == 'banned').all()
+        banned_telegram_ids.clear()
+        banned_telegram_ids.update(telegram_id for (telegram_id,) in rows)
+    finally:
+        db_session.close()
+
+def mark_banned(telegram_id: int):
+    banned_telegram_ids.add(telegram_id)
+
+def mark_unbanned(telegram_id: int):
+    banned_telegram_ids.discard(telegram_id)
@@ -1,9 +1,13 @@
+import functools
 import logging
 from telegram import *
 from telegram.ext import *
 
+from sqlalchemy import select
+
 from database import *
 from config import *
+from .notifier import notifier
 
 logger = logging.getLogger(__name__)
 
@@ -26,13 +30,10 @@ async def start_chat(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     context.user_data['chat_job_id'] = job_id
     chat_topic = "the relevant job"
     if job_id:
-        db_session = SessionLocal()
-        try:
-            job = db_session.query(Job).filter(Job.id == job_id).first()
-            if job:
-                chat_topic = f"job '{job.title}'"
-        finally:
-            db_session.close()
+        db_session = context.db_session
+        job = await db_session.scalar(select(Job).where(Job.id == job_id))
+        if job:
+            chat_topic = f"job '{job.title}'"
     else:
         chat_topic = "an admin matter"
 
@@ -111,49 +112,47 @@ async def receive_job_id_and_start_chat(update: Update, context: ContextTypes.DE
 
     user_id = update.effective_user.id
     initiator_role = context.user_data.get('chat_initiator_role')
-    db_session = SessionLocal()
-    try:
-        job = db_session.query(Job).filter(Job.id == job_id).first()
-        if not job:
-            await update.message.reply_text("No job found with that ID. Please check the ID and try again.")
-            return AWAIT_JOB_ID
-
-        recipient_user = None
-        # If the client is starting the chat
-        if initiator_role == 'client' and job.client.telegram_id == user_id:
-            if job.hired_freelancer:
-                recipient_user = job.hired_freelancer
-            else:
-                await update.message.reply_text("This job does not have a freelancer assigned to it yet.")
-                return ConversationHandler.END
-        
-        # If the freelancer is starting the chat
-        elif initiator_role == 'freelancer' and job.hired_freelancer and job.hired_freelancer.telegram_id == user_id:
-            recipient_user = job.client
-        
+    db_session = context.db_session
+    job = await db_session.scalar(select(Job).where(Job.id == job_id))
+    if not job:
+        await update.message.reply_text("No job found with that ID. Please check the ID and try again.")
+        return AWAIT_JOB_ID
+
+    recipient_user = None
+    client = await job.awaitable_attrs.client
+    hired_freelancer = await job.awaitable_attrs.hired_freelancer
+    # If the client is starting the chat
+    if initiator_role == 'client' and client.telegram_id == user_id:
+        if hired_freelancer:
+            recipient_user = hired_freelancer
         else:
-            await update.message.reply_text("You do not have permission to access the chat for this job.")
+            await update.message.reply_text("This job does not have a freelancer assigned to it yet.")
             return ConversationHandler.END
+    
+    # If the freelancer is starting the chat
+    elif initiator_role == 'freelancer' and hired_freelancer and hired_freelancer.telegram_id == user_id:
+        recipient_user = client
+    
+    else:
+        await update.message.reply_text("You do not have permission to access the chat for this job.")
+        return ConversationHandler.END
+
+    # If we found a valid recipient, start the chat
+    context.user_data['chat_recipient_id'] = recipient_user.telegram_id
+    context.user_data['chat_job_id'] = job.id
+
+    # Notify the recipient that someone wants to chat
+    context.after_commit.append(functools.partial(
+        notifier.submit, recipient_user.telegram_id, f"A user is online to chat about the job: '{job.title}'."
+    ))
+
+    # Confirm chat start for the initiator
+    await update.message.reply_text(
+        f"You are now in a private chat regarding '{job.title}'.\n\n"
+        "Type /endchat to leave the conversation."
+    )
+    return CHATTING
 
-        # If we found a valid recipient, start the chat
-        context.user_data['chat_recipient_id'] = recipient_user.telegram_id
-        context.user_data['chat_job_id'] = job.id
-
-        # Notify the recipient that someone wants to chat
-        await context.bot.send_message(
-            chat_id=recipient_user.telegram_id,
-            text=f"A user is online to chat about the job: '{job.title}'."
-        )
-
-        # Confirm chat start for the initiator
-        await update.message.reply_text(
-            f"You are now in a private chat regarding '{job.title}'.\n\n"
-            "Type /endchat to leave the conversation."
-        )
-        return CHATTING
-
-    finally:
-        db_session.close()
 
 async def cancel_chat_setup(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Cancels the process of setting up a chat."""
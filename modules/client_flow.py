@@ -1,10 +1,18 @@
+import functools
 import logging
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.ext import ContextTypes, ConversationHandler
-from sqlalchemy import func, or_
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
 
-from database import SessionLocal, Job, User, Application, Review, Skill, Transaction
+from database import Job, User, Application, Review, Skill, Transaction
 from . import matching
+from .skill_resolver import skill_resolver
+from . import outbox
+from .ranking import freelancer_stats
+from .open_jobs import open_jobs, open_job_from
+from .query_guard import query_budget
+from .reputation import record_reputation, get_profile
 
 logger = logging.getLogger(__name__)
 
@@ -57,38 +65,52 @@ async def post_job_start(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     await query.edit_message_text(
         "Let's post a new job.\n\n"
         "Please list the skills required for this job, separated by commas.\n\n"
-        "Example: `Python, Graphic Design, Social Media Marketing`\n\n"
+        "Example: `Python Development, Graphic Design, Social Media Marketing`\n\n"
         "Type /cancel to stop.",
         parse_mode='Markdown'
     )
     return GET_SKILLS
 
 async def received_skills_text(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    """Processes the text input of skills, finds them in the DB, and proceeds."""
-    skill_names = [skill.strip() for skill in update.message.text.split(',')]
+    """Resolves the typed skill names against the catalog, suggesting close matches for any it can't place."""
+    skill_names = [skill.strip() for skill in update.message.text.split(',') if skill.strip()]
+
+    found_skills = []
+    unresolved = []
+    for name in skill_names:
+        skill, suggestions = skill_resolver.resolve(name)
+        if skill:
+            if skill not in found_skills:
+                found_skills.append(skill)
+        else:
+            unresolved.append((name, suggestions))
+
+    if unresolved:
+        lines = []
+        if found_skills:
+            lines.append(f"✅ Recognized: {', '.join(skill.name for skill in found_skills)}\n")
+        for name, suggestions in unresolved:
+            if suggestions:
+                lines.append(f"❓ '{name}' - did you mean: {', '.join(skill.name for skill in suggestions)}?")
+            else:
+                lines.append(f"❌ '{name}' doesn't match any skill.")
+        lines.append("\nPlease send the full list again using the names above.\n\nExample: `Python Development, Web Development`")
+        await update.message.reply_text("\n".join(lines))
+        return GET_SKILLS
+
+    if not found_skills:
+        await update.message.reply_text("I couldn't find any of the skills you listed. Please check the spelling and try again.\n\nExample: `Python Development, Web Development`")
+        return GET_SKILLS
+
+    # Store the IDs of the skills that were found
+    context.user_data['job_skill_ids'] = {skill.id for skill in found_skills}
+    found_names = [skill.name for skill in found_skills]
     
-    db_session = SessionLocal()
-    try:
-        # Find all skills in the database that match the provided names (case-insensitive)
-        found_skills = db_session.query(Skill).filter(
-            or_(*[func.lower(Skill.name) == func.lower(name) for name in skill_names])
-        ).all()
-        
-        if not found_skills:
-            await update.message.reply_text("I couldn't find any of the skills you listed. Please check the spelling and try again.\n\nExample: `Python, Web Development`")
-            return GET_SKILLS
-
-        # Store the IDs of the skills that were found
-        context.user_data['job_skill_ids'] = {skill.id for skill in found_skills}
-        found_names = [skill.name for skill in found_skills]
-        
-        await update.message.reply_text(
-            f"✅ Skills recognized: {', '.join(found_names)}\n\n"
-            "Great. Now, what is the job title?"
-        )
-        return TITLE
-    finally:
-        db_session.close()
+    await update.message.reply_text(
+        f"✅ Skills recognized: {', '.join(found_names)}\n\n"
+        "Great. Now, what is the job title?"
+    )
+    return TITLE
 
 async def received_title(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Saves the job title and asks for the description."""
@@ -118,51 +140,51 @@ async def received_budget(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     description = context.user_data['description']
     skill_ids = context.user_data['job_skill_ids']
 
-    db_session = SessionLocal()
-    try:
-        client = db_session.query(User).filter(User.telegram_id == update.effective_user.id).first()
-        if client.balance >= budget:
-            client.balance -= budget
-
-            new_job = Job(
-                title=title,
-                description=description,
-                budget=budget,
-                client_id=client.id,
-                status='open'
-            )
-            skills_to_add = db_session.query(Skill).filter(Skill.id.in_(skill_ids)).all()
-            new_job.skills_required.extend(skills_to_add)
-            db_session.add(new_job)
-            db_session.commit()
-            payment_tx = Transaction(
-                user_id=client.id,
-                type='payment',
-                amount=budget,
-                status='completed',
-                related_job_id=new_job.id
-            )
-            db_session.add(payment_tx)
-            db_session.commit()
-
-            await update.message.reply_text(
-                f"Success! ${budget:,.2f} has been deducted from your wallet.\n\n"
-                f"Your job '{title}' is now live and freelancers are being notified."
-            )
-            await matching.notify_matching_freelancers(context, new_job)
-        else:
-            shortfall = budget - client.balance
-            text = (
-                f"**Insufficient Funds**\n\n"
-                f"Your current balance is: `${client.balance:,.2f}`\n"
-                f"The job requires: `${budget:,.2f}`\n\n"
-                f"You need to deposit at least **${shortfall:,.2f}** to post this job."
-            )
-            keyboard = [[InlineKeyboardButton(f"Deposit ${shortfall:,.2f} Now", callback_data=f"wallet_deposit_start_{shortfall}")]]
-            await update.message.reply_text(text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='Markdown')
+    db_session = context.db_session
+    client = await db_session.get(User, context.current_user.id)
+    if client.balance >= budget:
+        client.balance -= budget
+
+        new_job = Job(
+            title=title,
+            description=description,
+            budget=budget,
+            client_id=client.id,
+            status='open'
+        )
+        skills_to_add = (await db_session.scalars(select(Skill).where(Skill.id.in_(skill_ids)))).all()
+        new_job.skills_required.extend(skills_to_add)
+        db_session.add(new_job)
+        await record_reputation(db_session, client.id, jobs_posted=1)
+        # Flushed for its id only; the job and its payment commit together
+        await db_session.flush()
+        payment_tx = Transaction(
+            user_id=client.id,
+            type='payment',
+            amount=budget,
+            status='completed',
+            related_job_id=new_job.id
+        )
+        db_session.add(payment_tx)
+        context.after_commit.append(functools.partial(open_jobs.add, open_job_from(new_job, (skill.id for skill in skills_to_add))))
+        context.after_commit.append(functools.partial(matching.schedule_job_matching, context, new_job.id))
+
+        context.after_commit.append(functools.partial(
+            update.message.reply_text,
+            f"Success! ${budget:,.2f} has been deducted from your wallet.\n\n"
+            f"Your job '{title}' is now live and freelancers are being notified."
+        ))
+    else:
+        shortfall = budget - client.balance
+        text = (
+            f"**Insufficient Funds**\n\n"
+            f"Your current balance is: `${client.balance:,.2f}`\n"
+            f"The job requires: `${budget:,.2f}`\n\n"
+            f"You need to deposit at least **${shortfall:,.2f}** to post this job."
+        )
+        keyboard = [[InlineKeyboardButton(f"Deposit ${shortfall:,.2f} Now", callback_data=f"wallet_deposit_start_{shortfall}")]]
+        await update.message.reply_text(text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='Markdown')
 
-    finally:
-        db_session.close()
 
     context.user_data.clear()
     return ConversationHandler.END
@@ -181,68 +203,86 @@ async def cancel_conversation(update: Update, context: ContextTypes.DEFAULT_TYPE
 
 # --- PROPOSAL & HIRING FLOW ---
 
+@query_budget(1)
 async def select_job_to_view_proposals(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Shows a client their open jobs so they can select one to view proposals for."""
     query = update.callback_query
     await query.answer()
-    db_session = SessionLocal()
-    try:
-        user = db_session.query(User).filter(User.telegram_id == query.from_user.id).first()
-        client_jobs = db_session.query(Job).filter(Job.client_id == user.id, Job.status == 'open').all()
-        if not client_jobs:
-            await query.edit_message_text("You have no open jobs with active proposals right now.", reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("⬅️ Back", callback_data="back_to_client_dashboard")]]))
-            return
-        keyboard = [[InlineKeyboardButton(f"{job.title} ({len(job.applications)} proposals)", callback_data=f"view_proposals_{job.id}_0")] for job in client_jobs]
-        keyboard.append([InlineKeyboardButton("⬅️ Back", callback_data="back_to_client_dashboard")])
-        await query.edit_message_text("Please select a job to view its proposals:", reply_markup=InlineKeyboardMarkup(keyboard))
-    finally:
-        db_session.close()
-
+    db_session = context.db_session
+    user = context.current_user
+    client_jobs = (await db_session.execute(
+        select(Job.id, Job.title, Job.application_count).where(Job.client_id == user.id, Job.status == 'open')
+    )).all()
+    if not client_jobs:
+        await query.edit_message_text("You have no open jobs with active proposals right now.", reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("⬅️ Back", callback_data="back_to_client_dashboard")]]))
+        return
+    keyboard = [[InlineKeyboardButton(f"{title} ({count} proposals)", callback_data=f"view_proposals_{job_id}_0")] for job_id, title, count in client_jobs]
+    keyboard.append([InlineKeyboardButton("⬅️ Back", callback_data="back_to_client_dashboard")])
+    await query.edit_message_text("Please select a job to view its proposals:", reply_markup=InlineKeyboardMarkup(keyboard))
+
+async def proposal_count(db_session, job_id: int) -> int:
+    """Proposals on a job, read from the open-jobs view when the job is open."""
+    job = open_jobs.get(job_id)
+    if job is not None:
+        return job.proposal_count
+    return await db_session.scalar(select(Job.application_count).where(Job.id == job_id)) or 0
+
+@query_budget(2)
 async def view_proposals_for_job(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Displays proposals for a specific job, with pagination."""
+    """Displays one proposal for a job at a time; each Previous/Next click fetches a single row by offset."""
     query = update.callback_query
     await query.answer()
     _, _, job_id_str, index_str = query.data.split('_')
     job_id = int(job_id_str)
-    current_index = int(index_str)
 
-    db_session = SessionLocal()
-    try:
-        applications = db_session.query(Application).filter(Application.job_id == job_id).all()
-        if not applications:
-            await query.edit_message_text(
-                "There are no proposals for this job yet.",
-                reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("⬅️ Back to Job List", callback_data="client_view_proposals")]])
+    db_session = context.db_session
+    total = await proposal_count(db_session, job_id)
+    current_index = max(0, min(int(index_str), total - 1))
+    proposal = None
+    if total:
+        proposal = (await db_session.execute(
+            select(
+                Application.id, Application.bid_amount, Application.proposal_text,
+                Job.title, User.id.label('freelancer_id'), User.first_name, User.username
             )
-            return
-        
-        app = applications[current_index]
-        proposal_text = (
-            f"Proposal for: {app.job.title}\n\n"
-            f"From Freelancer: {app.freelancer.first_name} (@{app.freelancer.username})\n"
-            f"Bid Amount: ${app.bid_amount:,.2f} USD\n\n"
-            f"Message:\n{app.proposal_text}"
+            .join(Job, Job.id == Application.job_id)
+            .join(User, User.id == Application.freelancer_id)
+            .where(Application.job_id == job_id)
+            .order_by(Application.id)
+            .limit(1).offset(current_index)
+        )).first()
+    if not proposal:
+        await query.edit_message_text(
+            "There are no proposals for this job yet.",
+            reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("⬅️ Back to Job List", callback_data="client_view_proposals")]])
         )
+        return
 
-        keyboard = []
-        nav_row = []
-        if current_index > 0:
-            nav_row.append(InlineKeyboardButton("⬅️ Previous", callback_data=f"view_proposals_{job_id}_{current_index - 1}"))
-        if current_index < len(applications) - 1:
-            nav_row.append(InlineKeyboardButton("Next ➡️", callback_data=f"view_proposals_{job_id}_{current_index + 1}"))
-        keyboard.append(nav_row)
-        keyboard.append([InlineKeyboardButton(" Contact Freelancer", callback_data=f"chat_{app.freelancer.id}_{job_id}")])
-        keyboard.append([InlineKeyboardButton("View Freelancer's Profile", callback_data=f"view_profile_{app.freelancer.id}_{job_id}_{current_index}")])
-        keyboard.append([
-            InlineKeyboardButton("✅ Accept", callback_data=f"accept_app_{app.id}"),
-            InlineKeyboardButton("❌ Reject", callback_data=f"reject_app_{app.id}")
-        ])
-        keyboard.append([InlineKeyboardButton("⬅️ Back to Job List", callback_data="client_view_proposals")])
-        
-        await query.edit_message_text(text=proposal_text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='Markdown')
-    finally:
-        db_session.close()
+    proposal_text = (
+        f"Proposal {current_index + 1} of {total} for: {proposal.title}\n\n"
+        f"From Freelancer: {proposal.first_name} (@{proposal.username})\n"
+        f"Bid Amount: ${proposal.bid_amount:,.2f} USD\n\n"
+        f"Message:\n{proposal.proposal_text}"
+    )
+
+    keyboard = []
+    nav_row = []
+    if current_index > 0:
+        nav_row.append(InlineKeyboardButton("⬅️ Previous", callback_data=f"view_proposals_{job_id}_{current_index - 1}"))
+    if current_index < total - 1:
+        nav_row.append(InlineKeyboardButton("Next ➡️", callback_data=f"view_proposals_{job_id}_{current_index + 1}"))
+    keyboard.append(nav_row)
+    keyboard.append([InlineKeyboardButton(" Contact Freelancer", callback_data=f"chat_{proposal.freelancer_id}_{job_id}")])
+    keyboard.append([InlineKeyboardButton("View Freelancer's Profile", callback_data=f"view_profile_{proposal.freelancer_id}_{job_id}_{current_index}")])
+    keyboard.append([
+        InlineKeyboardButton("✅ Accept", callback_data=f"accept_app_{proposal.id}"),
+        InlineKeyboardButton("❌ Reject", callback_data=f"reject_app_{proposal.id}")
+    ])
+    keyboard.append([InlineKeyboardButton("⬅️ Back to Job List", callback_data="client_view_proposals")])
+    
+    await query.edit_message_text(text=proposal_text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='Markdown')
 
+@query_budget(1)
 async def show_public_profile(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Displays a freelancer's public profile to a client."""
     query = update.callback_query
@@ -250,91 +290,82 @@ async def show_public_profile(update: Update, context: ContextTypes.DEFAULT_TYPE
     _, _, freelancer_id_str, job_id_str, index_str = query.data.split('_')
     freelancer_id = int(freelancer_id_str)
 
-    db_session = SessionLocal()
-    try:
-        freelancer = db_session.query(User).filter(User.id == freelancer_id).first()
-        if not freelancer:
-            await query.edit_message_text("Error: Freelancer profile not found.")
-            return
-
-        avg_rating, num_reviews = db_session.query(func.avg(Review.rating), func.count(Review.id)).filter(Review.reviewee_id == freelancer.id).first()
-        completed_jobs = db_session.query(Job).filter(Job.hired_freelancer_id == freelancer.id, Job.status == 'completed').count()
-        rating_str = f"{avg_rating:.2f} ⭐ out of {num_reviews} reviews" if num_reviews > 0 else "No reviews yet"
-
-        profile_text = (
-            f"Freelancer Profile\n\n"
-            f"Name: {freelancer.first_name}\n"
-            f"Bio: {freelancer.bio or 'No bio set.'}\n\n"
-            f"Reputation:\n"
-            f"- Average Rating: {rating_str}\n"
-            f"- Jobs Completed: {completed_jobs}"
-        )
-        keyboard = [    [InlineKeyboardButton("Report Freelancer", callback_data=f"report_user_{freelancer.id}")],
+    profile = await get_profile(context.db_session, freelancer_id)
+    if not profile:
+        await query.edit_message_text("Error: Freelancer profile not found.")
+        return
+    freelancer, reputation = profile
+    rating_str = f"{reputation.average_rating:.2f} ⭐ out of {reputation.rating_count} reviews" if reputation.rating_count > 0 else "No reviews yet"
+
+    profile_text = (
+        f"Freelancer Profile\n\n"
+        f"Name: {freelancer.first_name}\n"
+        f"Bio: {freelancer.bio or 'No bio set.'}\n\n"
+        f"Reputation:\n"
+        f"- Average Rating: {rating_str}\n"
+        f"- Jobs Completed: {reputation.jobs_completed}"
+    )
+    keyboard = [    [InlineKeyboardButton("Report Freelancer", callback_data=f"report_user_{freelancer.id}")],
 			[InlineKeyboardButton("⬅️ Back to Proposal", callback_data=f"view_proposals_{job_id_str}_{index_str}")]
 		]
-        await query.edit_message_text(text=profile_text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='Markdown')
-    finally:
-        db_session.close()
+    await query.edit_message_text(text=profile_text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='Markdown')
 
+@query_budget(5)
 async def accept_application(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Accepts a freelancer's application, hires them, and rejects other applicants."""
     query = update.callback_query
     await query.answer()
     application_id = int(query.data.split('_')[-1])
-    db_session = SessionLocal()
-    try:
-        accepted_app = db_session.query(Application).filter(Application.id == application_id).first()
-        if not accepted_app or accepted_app.job.status != 'open':
-            await query.edit_message_text("This job is no longer available.")
-            return
-
-        job = accepted_app.job
-        job.status = 'in_progress'
-        job.hired_freelancer_id = accepted_app.freelancer_id
-        accepted_app.status = 'accepted'
-        
-        other_apps = db_session.query(Application).filter(Application.job_id == job.id, Application.id != accepted_app.id).all()
-        for app in other_apps:
-            app.status = 'rejected'
-            try:
-                await context.bot.send_message(chat_id=app.freelancer.telegram_id, text=f"Unfortunately, your application for '{job.title}' was not selected.")
-            except Exception as e:
-                logger.error(f"Failed to send rejection to {app.freelancer.telegram_id}: {e}")
-        
-        db_session.commit()
-        
-        try:
-            await context.bot.send_message(chat_id=accepted_app.freelancer.telegram_id, text=f"Congratulations! Your application for '{job.title}' has been accepted!")
-        except Exception as e:
-            logger.error(f"Failed to send acceptance to {accepted_app.freelancer.telegram_id}: {e}")
-        
-        await query.edit_message_text(f"✅ You have hired {accepted_app.freelancer.first_name} for {job.title}.")
-    finally:
-        db_session.close()
+    db_session = context.db_session
+    accepted_app = await db_session.scalar(
+        select(Application).where(Application.id == application_id)
+        .options(joinedload(Application.job), joinedload(Application.freelancer))
+    )
+    if not accepted_app or accepted_app.job.status != 'open':
+        await query.edit_message_text("This job is no longer available.")
+        return
+
+    job = accepted_app.job
+    accepted_freelancer = accepted_app.freelancer
+    job.status = 'in_progress'
+    job.hired_freelancer_id = accepted_app.freelancer_id
+    accepted_app.status = 'accepted'
+    
+    other_apps = (await db_session.scalars(
+        select(Application).where(Application.job_id == job.id, Application.id != accepted_app.id)
+        .options(joinedload(Application.freelancer))
+    )).all()
+    messages = [(accepted_freelancer.telegram_id, f"Congratulations! Your application for '{job.title}' has been accepted!")]
+    for app in other_apps:
+        app.status = 'rejected'
+        messages.append((app.freelancer.telegram_id, f"Unfortunately, your application for '{job.title}' was not selected."))
+    await outbox.enqueue_many(db_session, messages)
+    context.after_commit.append(functools.partial(open_jobs.remove, job.id))
+    context.after_commit.append(functools.partial(outbox.wake_dispatcher, context))
+    context.after_commit.append(functools.partial(
+        query.edit_message_text, f"✅ You have hired {accepted_freelancer.first_name} for {job.title}."
+    ))
 
 async def reject_application(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Rejects a single freelancer's application."""
     query = update.callback_query
     await query.answer()
     application_id = int(query.data.split('_')[-1])
-    db_session = SessionLocal()
-    try:
-        app_to_reject = db_session.query(Application).filter(Application.id == application_id).first()
-        if not app_to_reject:
-            await query.edit_message_text("Application not found.")
-            return
-
-        app_to_reject.status = 'rejected'
-        db_session.commit()
-
-        try:
-            await context.bot.send_message(chat_id=app_to_reject.freelancer.telegram_id, text=f"Your application for '{app_to_reject.job.title}' was not selected at this time.")
-        except Exception as e:
-            logger.error(f"Failed to send rejection to {app_to_reject.freelancer.telegram_id}: {e}")
-        
-        await query.edit_message_text(f"You have rejected the application from {app_to_reject.freelancer.first_name}.")
-    finally:
-        db_session.close()
+    db_session = context.db_session
+    app_to_reject = await db_session.scalar(select(Application).where(Application.id == application_id))
+    if not app_to_reject:
+        await query.edit_message_text("Application not found.")
+        return
+
+    app_to_reject.status = 'rejected'
+    rejected_freelancer = await app_to_reject.awaitable_attrs.freelancer
+    rejected_job = await app_to_reject.awaitable_attrs.job
+
+    outbox.enqueue(db_session, rejected_freelancer.telegram_id, f"Your application for '{rejected_job.title}' was not selected at this time.")
+    context.after_commit.append(functools.partial(outbox.wake_dispatcher, context))
+    context.after_commit.append(functools.partial(
+        query.edit_message_text, f"You have rejected the application from {rejected_freelancer.first_name}."
+    ))
 
 
 # --- JOB COMPLETION & REVIEW FLOW ---
@@ -343,54 +374,52 @@ async def view_active_projects(update: Update, context: ContextTypes.DEFAULT_TYP
     """Shows the client their projects that are in progress or awaiting completion confirmation."""
     query = update.callback_query
     await query.answer()
-    db_session = SessionLocal()
-    try:
-        client = db_session.query(User).filter(User.telegram_id == query.from_user.id).first()
-        active_jobs = db_session.query(Job).filter(Job.client_id == client.id, Job.status.in_(['in_progress', 'pending_completion'])).all()
-
-        if not active_jobs:
-            await query.edit_message_text("You have no active projects.", reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("⬅️ Back", callback_data="back_to_client_dashboard")]]))
-            return
-
-        keyboard = []
-        for job in active_jobs:
-            # Add the Job ID to the button text
-            button_text = f"{job.title} (ID: {job.id}) - {job.status}"
-            if job.status == 'pending_completion':
-                keyboard.append([InlineKeyboardButton(f"➡️ {button_text}", callback_data=f"confirm_complete_{job.id}")])
-            else:
-                keyboard.append([InlineKeyboardButton(button_text, callback_data="none")])
-        keyboard.append([InlineKeyboardButton("⬅️ Back", callback_data="back_to_client_dashboard")])
+    db_session = context.db_session
+    client = context.current_user
+    active_jobs = (await db_session.scalars(select(Job).where(Job.client_id == client.id, Job.status.in_(['in_progress', 'pending_completion'])))).all()
+
+    if not active_jobs:
+        await query.edit_message_text("You have no active projects.", reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("⬅️ Back", callback_data="back_to_client_dashboard")]]))
+        return
+
+    keyboard = []
+    for job in active_jobs:
+        # Add the Job ID to the button text
+        button_text = f"{job.title} (ID: {job.id}) - {job.status}"
+        if job.status == 'pending_completion':
+            keyboard.append([InlineKeyboardButton(f"➡️ {button_text}", callback_data=f"confirm_complete_{job.id}")])
+        else:
+            keyboard.append([InlineKeyboardButton(button_text, callback_data="none")])
+    keyboard.append([InlineKeyboardButton("⬅️ Back", callback_data="back_to_client_dashboard")])
 
-        await query.edit_message_text("Your active projects. Select a job awaiting your confirmation:", reply_markup=InlineKeyboardMarkup(keyboard))
-    finally:
-        db_session.close()
+    await query.edit_message_text("Your active projects. Select a job awaiting your confirmation:", reply_markup=InlineKeyboardMarkup(keyboard))
 
 
+@query_budget(1)
 async def show_completed_jobs(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Shows the client a list of their completed jobs."""
     query = update.callback_query
     await query.answer()
-    db_session = SessionLocal()
-    try:
-        client = db_session.query(User).filter(User.telegram_id == query.from_user.id).first()
-        completed_jobs = db_session.query(Job).filter(Job.client_id == client.id, Job.status == 'completed').order_by(Job.created_at.desc()).all()
-
-        if not completed_jobs:
-            await query.edit_message_text("You have no completed jobs.", reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("⬅️ Back", callback_data="back_to_client_dashboard")]]))
-            return
-
-        response_text = "Your Completed Jobs\n\n"
-        for job in completed_jobs:
-            response_text += f"✅ {job.title}\n"
-            if job.hired_freelancer:
-                response_text += f"   - Freelancer: {job.hired_freelancer.first_name}\n"
-            response_text += f"   - Budget: ${job.budget:,.2f}\n\n"
-            
-        keyboard = [[InlineKeyboardButton("⬅️ Back to Dashboard", callback_data="back_to_client_dashboard")]]
-        await query.edit_message_text(text=response_text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='Markdown')
-    finally:
-        db_session.close()
+    db_session = context.db_session
+    client = context.current_user
+    completed_jobs = (await db_session.scalars(
+        select(Job).where(Job.client_id == client.id, Job.status == 'completed')
+        .options(joinedload(Job.hired_freelancer)).order_by(Job.created_at.desc())
+    )).all()
+
+    if not completed_jobs:
+        await query.edit_message_text("You have no completed jobs.", reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("⬅️ Back", callback_data="back_to_client_dashboard")]]))
+        return
+
+    response_text = "Your Completed Jobs\n\n"
+    for job in completed_jobs:
+        response_text += f"✅ {job.title}\n"
+        if job.hired_freelancer:
+            response_text += f"   - Freelancer: {job.hired_freelancer.first_name}\n"
+        response_text += f"   - Budget: ${job.budget:,.2f}\n\n"
+        
+    keyboard = [[InlineKeyboardButton("⬅️ Back to Dashboard", callback_data="back_to_client_dashboard")]]
+    await query.edit_message_text(text=response_text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='Markdown')
 
 async def confirm_completion(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
@@ -400,50 +429,51 @@ async def confirm_completion(update: Update, context: ContextTypes.DEFAULT_TYPE)
     query = update.callback_query
     await query.answer()
     job_id = int(query.data.split('_')[-1])
-    db_session = SessionLocal()
-    try:
-        job = db_session.query(Job).filter(Job.id == job_id).first()
-        if job and job.status == 'pending_completion':
-            commission = job.budget * 0.10
-            freelancer_payout = job.budget - commission
-            freelancer = job.hired_freelancer
-            if freelancer:
-                freelancer.balance += freelancer_payout
-                earning_tx = Transaction(
-                    user_id=freelancer.id,
-                    type='earning',
-                    amount=freelancer_payout,
-                    status='completed',
-                    related_job_id=job.id
-                )
-                db_session.add(earning_tx)
-            job.status = 'completed'
-            db_session.commit()
-            logger.info(f"Payment processed for Job ID: {job.id}. Freelancer Payout: ${freelancer_payout}, Commission: ${commission}")
-            if freelancer:
-                notification_text = (
-                    f"Payment Received!\n\n"
-                    f"The client has confirmed completion for the job: '{job.title}'.\n\n"
-                    f"An amount of **${freelancer_payout:,.2f}** (90% of the ${job.budget:,.2f} budget) has been credited to your wallet."
-                )
-                await context.bot.send_message(chat_id=freelancer.telegram_id, text=notification_text, parse_mode='Markdown')
-
-            await query.edit_message_text(f"Project '{job.title}' is now complete. Payment has been released to the freelancer.")
-            if freelancer:
-                await prompt_for_review(context, job, reviewer=job.client, reviewee=freelancer)
-                await prompt_for_review(context, job, reviewer=freelancer, reviewee=job.client)
+    db_session = context.db_session
+    job = await db_session.scalar(select(Job).where(Job.id == job_id))
+    if job and job.status == 'pending_completion':
+        commission = job.budget * 0.10
+        freelancer_payout = job.budget - commission
+        freelancer = await job.awaitable_attrs.hired_freelancer
+        if freelancer:
+            freelancer.balance += freelancer_payout
+            earning_tx = Transaction(
+                user_id=freelancer.id,
+                type='earning',
+                amount=freelancer_payout,
+                status='completed',
+                related_job_id=job.id
+            )
+            db_session.add(earning_tx)
+            notification_text = (
+                f"Payment Received!\n\n"
+                f"The client has confirmed completion for the job: '{job.title}'.\n\n"
+                f"An amount of **${freelancer_payout:,.2f}** (90% of the ${job.budget:,.2f} budget) has been credited to your wallet."
+            )
+            outbox.enqueue(db_session, freelancer.telegram_id, notification_text, parse_mode='Markdown')
+            await record_reputation(db_session, freelancer.id, jobs_completed=1, total_earned=freelancer_payout)
+            client = await job.awaitable_attrs.client
+            prompt_for_review(db_session, job, reviewer=client, reviewee=freelancer)
+            prompt_for_review(db_session, job, reviewer=freelancer, reviewee=client)
+        job.status = 'completed'
+        context.after_commit.append(functools.partial(outbox.wake_dispatcher, context))
+        if freelancer:
+            context.after_commit.append(functools.partial(freelancer_stats.record_completed_job, freelancer.id))
+        logger.info(f"Payment processed for Job ID: {job.id}. Freelancer Payout: ${freelancer_payout}, Commission: ${commission}")
+        context.after_commit.append(functools.partial(
+            query.edit_message_text, f"Project '{job.title}' is now complete. Payment has been released to the freelancer."
+        ))
 
-        else:
-            await query.edit_message_text("This action cannot be performed now.")
-    finally:
-        db_session.close()
+    else:
+        await query.edit_message_text("This action cannot be performed now.")
 
-async def prompt_for_review(context: ContextTypes.DEFAULT_TYPE, job: Job, reviewer: User, reviewee: User):
-    """Sends a message to a user asking them to review the other party."""
+def prompt_for_review(db_session, job: Job, reviewer: User, reviewee: User):
+    """Queues a message asking a user to review the other party."""
     keyboard = [[InlineKeyboardButton("⭐" * i, callback_data=f"review_{job.id}_{reviewee.id}_{i}") for i in range(1, 6)]]
-    await context.bot.send_message(
-        chat_id=reviewer.telegram_id,
-        text=f"Job '{job.title}' is complete! Please rate your experience with {reviewee.first_name}.",
+    outbox.enqueue(
+        db_session,
+        reviewer.telegram_id,
+        f"Job '{job.title}' is complete! Please rate your experience with {reviewee.first_name}.",
         reply_markup=InlineKeyboardMarkup(keyboard)
     )
 
@@ -460,43 +490,39 @@ async def received_review_comment(update: Update, context: ContextTypes.DEFAULT_
     """Saves a review comment and ends the review conversation."""
     comment = update.message.text
     review_data = context.user_data.get('review_data')
-    db_session = SessionLocal()
-    try:
-        reviewer = db_session.query(User).filter(User.telegram_id == update.effective_user.id).first()
-        new_review = Review(
-            job_id=review_data['job_id'],
-            reviewer_id=reviewer.id,
-            reviewee_id=review_data['reviewee_id'],
-            rating=review_data['rating'],
-            comment=comment
-        )
-        db_session.add(new_review)
-        db_session.commit()
-        await update.message.reply_text("✅ Review submitted. Thank you!")
-    finally:
-        db_session.close()
-    
+    db_session = context.db_session
+    reviewer = context.current_user
+    new_review = Review(
+        job_id=review_data['job_id'],
+        reviewer_id=reviewer.id,
+        reviewee_id=review_data['reviewee_id'],
+        rating=review_data['rating'],
+        comment=comment
+    )
+    db_session.add(new_review)
+    await record_reputation(db_session, new_review.reviewee_id, rating_sum=new_review.rating, rating_count=1)
+    context.after_commit.append(functools.partial(freelancer_stats.record_review, new_review.reviewee_id, new_review.rating))
+    context.after_commit.append(functools.partial(update.message.reply_text, "✅ Review submitted. Thank you!"))
+
     context.user_data.clear()
     return ConversationHandler.END
 
 async def skip_comment(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Saves a review with only a rating (no comment) and ends the conversation."""
     review_data = context.user_data.get('review_data')
-    db_session = SessionLocal()
-    try:
-        reviewer = db_session.query(User).filter(User.telegram_id == update.effective_user.id).first()
-        new_review = Review(
-            job_id=review_data['job_id'],
-            reviewer_id=reviewer.id,
-            reviewee_id=review_data['reviewee_id'],
-            rating=review_data['rating'],
-            comment=None
-        )
-        db_session.add(new_review)
-        db_session.commit()
-        await update.message.reply_text("✅ Review (rating only) submitted. Thank you!")
-    finally:
-        db_session.close()
+    db_session = context.db_session
+    reviewer = context.current_user
+    new_review = Review(
+        job_id=review_data['job_id'],
+        reviewer_id=reviewer.id,
+        reviewee_id=review_data['reviewee_id'],
+        rating=review_data['rating'],
+        comment=None
+    )
+    db_session.add(new_review)
+    await record_reputation(db_session, new_review.reviewee_id, rating_sum=new_review.rating, rating_count=1)
+    context.after_commit.append(functools.partial(freelancer_stats.record_review, new_review.reviewee_id, new_review.rating))
+    context.after_commit.append(functools.partial(update.message.reply_text, "✅ Review (rating only) submitted. Thank you!"))
 
     context.user_data.clear()
     return ConversationHandler.END
@@ -1,9 +1,18 @@
+import functools
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.ext import ContextTypes, ConversationHandler
-from sqlalchemy import func
+from sqlalchemy import func, select, update as sql_update
 import datetime
 
-from database import SessionLocal, Job, User, Application, Review, Skill
+from database import Job, User, Application
+from .user_cache import user_cache
+from .skill_registry import skill_registry
+from .skill_index import freelancer_index
+from .open_jobs import open_jobs
+from .job_feed import feed_cache
+from .query_guard import query_budget
+from . import outbox
+from .reputation import get_profile, get_reputation
 
 PROPOSAL, BID_AMOUNT = range(2)
 EDIT_BIO = range(2, 3)
@@ -58,35 +67,31 @@ async def freelancer_button_placeholder(update: Update, context: ContextTypes.DE
         reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("Back to Dashboard", callback_data="back_to_freelancer_dashboard")]])
     )
 
+@query_budget(1)
 async def show_my_profile(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
-    db_session = SessionLocal()
-    try:
-        freelancer = db_session.query(User).filter(User.telegram_id == query.from_user.id).first()
-        avg_rating, num_reviews = db_session.query(func.avg(Review.rating), func.count(Review.id)).filter(Review.reviewee_id == freelancer.id).first()
-        completed_jobs = db_session.query(Job).filter(Job.hired_freelancer_id == freelancer.id, Job.status == 'completed').count()
-        
-        rating_str = f"{avg_rating:.2f} out of {num_reviews} reviews" if num_reviews > 0 else "No reviews yet"
-        skills_str = ", ".join([skill.name for skill in freelancer.skills]) or "No skills set."
-
-        profile_text = (
-            f"**Your Freelancer Profile**\n\n"
-            f"**Name:** {freelancer.first_name}\n"
-            f"**Bio:** {freelancer.bio or 'Not set.'}\n"
-            f"**Skills:** {skills_str}\n\n"
-            f"**Statistics:**\n"
-            f"- **Average Rating:** {rating_str}\n"
-            f"- **Jobs Completed:** {completed_jobs}"
-        )
-        keyboard = [
-            [InlineKeyboardButton("Edit Bio", callback_data="edit_profile_bio")],
-            [InlineKeyboardButton("Edit Skills", callback_data="edit_skills_menu")],
-            [InlineKeyboardButton("Back to Dashboard", callback_data="back_to_freelancer_dashboard")]
-        ]
-        await query.edit_message_text(text=profile_text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='Markdown')
-    finally:
-        db_session.close()
+    freelancer, reputation = await get_profile(context.db_session, context.current_user.id)
+
+    rating_str = f"{reputation.average_rating:.2f} out of {reputation.rating_count} reviews" if reputation.rating_count > 0 else "No reviews yet"
+    skill_entries = (skill_registry.get(skill_id) for skill_id in freelancer_index.skills_of.get(freelancer.id, ()))
+    skills_str = ", ".join(sorted(entry.name for entry in skill_entries if entry)) or "No skills set."
+
+    profile_text = (
+        f"**Your Freelancer Profile**\n\n"
+        f"**Name:** {freelancer.first_name}\n"
+        f"**Bio:** {freelancer.bio or 'Not set.'}\n"
+        f"**Skills:** {skills_str}\n\n"
+        f"**Statistics:**\n"
+        f"- **Average Rating:** {rating_str}\n"
+        f"- **Jobs Completed:** {reputation.jobs_completed}"
+    )
+    keyboard = [
+        [InlineKeyboardButton("Edit Bio", callback_data="edit_profile_bio")],
+        [InlineKeyboardButton("Edit Skills", callback_data="edit_skills_menu")],
+        [InlineKeyboardButton("Back to Dashboard", callback_data="back_to_freelancer_dashboard")]
+    ]
+    await query.edit_message_text(text=profile_text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='Markdown')
 
 async def start_bio_edit(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     query = update.callback_query
@@ -96,135 +101,159 @@ async def start_bio_edit(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
 
 async def received_bio(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     new_bio = update.message.text[:200]
-    db_session = SessionLocal()
-    try:
-        user = db_session.query(User).filter(User.telegram_id == update.effective_user.id).first()
-        user.bio = new_bio
-        db_session.commit()
-        await update.message.reply_text("Your bio has been updated successfully!")
-    finally:
-        db_session.close()
-    await show_freelancer_dashboard(update, context)
+    db_session = context.db_session
+    user = await db_session.get(User, context.current_user.id)
+    user.bio = new_bio
+    context.after_commit.append(functools.partial(user_cache.invalidate, user.telegram_id))
+    context.after_commit.append(functools.partial(update.message.reply_text, "Your bio has been updated successfully!"))
+    context.after_commit.append(functools.partial(show_freelancer_dashboard, update, context))
     return ConversationHandler.END
 
-async def edit_skills_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    query = update.callback_query
-    await query.answer()
-    db_session = SessionLocal()
-    try:
-        freelancer = db_session.query(User).filter(User.telegram_id == query.from_user.id).first()
-        all_skills = db_session.query(Skill).all()
-        freelancer_skill_ids = {skill.id for skill in freelancer.skills}
-        keyboard = []
-        for skill in all_skills:
-            text = f"✔️ {skill.name}" if skill.id in freelancer_skill_ids else skill.name
-            keyboard.append([InlineKeyboardButton(text, callback_data=f"toggle_skill_{skill.id}")])
-        keyboard.append([InlineKeyboardButton("Back to Profile", callback_data="freelancer_profile")])
-        await query.edit_message_text("Select skills to add or remove:", reply_markup=InlineKeyboardMarkup(keyboard))
-    finally:
-        db_session.close()
-
-async def toggle_skill(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    query = update.callback_query
-    skill_id = int(query.data.split('_')[-1])
-    db_session = SessionLocal()
-    try:
-        freelancer = db_session.query(User).filter(User.telegram_id == query.from_user.id).first()
-        skill_to_toggle = db_session.query(Skill).filter(Skill.id == skill_id).first()
-        if skill_to_toggle in freelancer.skills:
-            freelancer.skills.remove(skill_to_toggle)
-            await query.answer(f"Removed '{skill_to_toggle.name}'")
-        else:
-            freelancer.skills.append(skill_to_toggle)
-            await query.answer(f"Added '{skill_to_toggle.name}'")
-        db_session.commit()
-    finally:
-        db_session.close()
-    await edit_skills_menu(update, context)
-
-
+@query_budget(1)
 async def show_client_profile(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Displays a client's public profile to a freelancer."""
     query = update.callback_query
     await query.answer()
     client_id = int(query.data.split('_')[-1])
-    db_session = SessionLocal()
-    try:
-        client = db_session.query(User).filter(User.id == client_id).first()
-        if not client:
-            await query.edit_message_text("Error: Client profile not found.")
-            return
-        jobs_posted_count = len(client.jobs_posted)
-
-        profile_text = (
-            f"**Client Profile**\n\n"
-            f"**Name:** {client.first_name}\n"
-            f"**Jobs Posted:** {jobs_posted_count}"
-        )
-        keyboard = [
-            [InlineKeyboardButton("Report Client", callback_data=f"report_user_{client.id}")],
-            [InlineKeyboardButton("Back to Jobs", callback_data="freelancer_browse_jobs")]
-        ]
-        await query.edit_message_text(text=profile_text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='Markdown')
-    finally:
-        db_session.close()
+    profile = await get_profile(context.db_session, client_id)
+    if not profile:
+        await query.edit_message_text("Error: Client profile not found.")
+        return
+    client, reputation = profile
+
+    profile_text = (
+        f"**Client Profile**\n\n"
+        f"**Name:** {client.first_name}\n"
+        f"**Jobs Posted:** {reputation.jobs_posted}"
+    )
+    keyboard = [
+        [InlineKeyboardButton("Report Client", callback_data=f"report_user_{client.id}")],
+        [InlineKeyboardButton("Back to Jobs", callback_data="freelancer_browse_jobs")]
+    ]
+    await query.edit_message_text(text=profile_text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='Markdown')
+
+# Browse cursors are (created_at, id) of the job on screen, with created_at as integer
+# microseconds since the epoch so it round-trips exactly through callback_data.
+CURSOR_EPOCH = datetime.datetime(1970, 1, 1)
+
+def encode_cursor(job) -> str:
+    return f"{(job.created_at - CURSOR_EPOCH) // datetime.timedelta(microseconds=1)}_{job.id}"
+
+def decode_cursor(data: str):
+    micros, job_id = data.split('_')[-2:]
+    return CURSOR_EPOCH + datetime.timedelta(microseconds=int(micros)), int(job_id)
+
+def job_card_text(job, skill_match: str = None) -> str:
+    skills_list = sorted(skill_registry.get(skill_id).name for skill_id in job.skill_ids if skill_registry.get(skill_id))
+    skills_str = ", ".join(skills_list) or "None specified"
+    posted_ago = time_ago(job.created_at)
+    job_text = (
+        f"**{job.title}**\n\n"
+        f"**Description:** {job.description}\n\n"
+        f"**Skills Required:** {skills_str}\n\n"
+    )
+    if skill_match:
+        job_text += f"**Skill Match:** {skill_match}\n"
+    job_text += (
+        f"**Budget:** ${job.budget:,.2f} USD\n"
+        f"**Proposals:** {job.proposal_count} so far\n"
+        f"**Posted:** {posted_ago}\n"
+    )
+    return job_text
+
+def job_card_markup(job, nav_row, switch_button) -> InlineKeyboardMarkup:
+    keyboard = []
+    if nav_row:
+        keyboard.append(nav_row)
+    keyboard.append([
+        InlineKeyboardButton("Apply for this Job", callback_data=f"apply_job_{job.id}"),
+        InlineKeyboardButton("View Client Info", callback_data=f"view_client_{job.client_id}")
+    ])
+    keyboard.append([switch_button])
+    keyboard.append([InlineKeyboardButton("Back to Dashboard", callback_data="back_to_freelancer_dashboard")])
+    return InlineKeyboardMarkup(keyboard)
 
+@query_budget(0)
+async def browse_feed(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Shows open jobs ranked for the viewer: most shared skills first, then budget, then
+    recency. The ranking is cached per freelancer; Previous/Next move through it by
+    position, carrying the job id so a re-ranked feed can find its place again.
+    """
+    query = update.callback_query
+    freelancer = context.current_user
+    feed = feed_cache.get(freelancer.id) if freelancer else None
+    if not feed or not feed.job_ids:
+        await browse_jobs(update, context)
+        return
+
+    position = 0
+    if query.data.startswith('feed_job_'):
+        _, _, requested, job_id = query.data.split('_')
+        position = feed.position_of.get(int(job_id), int(requested))
+
+    def open_at(positions):
+        return next((p for p in positions if open_jobs.get(feed.job_ids[p])), None)
+
+    position = open_at(range(min(position, len(feed.job_ids) - 1), len(feed.job_ids)))
+    if position is None:
+        position = open_at(range(len(feed.job_ids)))
+    if position is None:
+        await browse_jobs(update, context)
+        return
+    await query.answer()
+    job = open_jobs.get(feed.job_ids[position])
+
+    nav_row = []
+    previous = open_at(range(position - 1, -1, -1))
+    following = open_at(range(position + 1, len(feed.job_ids)))
+    if previous is not None:
+        nav_row.append(InlineKeyboardButton("Previous", callback_data=f"feed_job_{previous}_{feed.job_ids[previous]}"))
+    if following is not None:
+        nav_row.append(InlineKeyboardButton("Next", callback_data=f"feed_job_{following}_{feed.job_ids[following]}"))
+    skill_match = f"{len(job.skill_ids & feed.skills)} of {len(job.skill_ids)} required skills"
+    switch_button = InlineKeyboardButton("Show Newest First", callback_data="browse_jobs_newest")
+    await query.edit_message_text(text=job_card_text(job, skill_match), reply_markup=job_card_markup(job, nav_row, switch_button), parse_mode='Markdown')
+
+@query_budget(0)
 async def browse_jobs(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Shows one open job at a time, newest first, from the in-memory open-jobs view.
+    Previous/Next carry the current job's (created_at, id) in callback_data, so each
+    click is a bisect to the neighbouring job.
+    """
     query = update.callback_query
     await query.answer()
-    db_session = SessionLocal()
-    try:
-        all_jobs = db_session.query(Job).filter(Job.status == 'open').order_by(Job.created_at.desc()).all()
-        if not all_jobs:
-            await query.edit_message_text("No open jobs at the moment.", reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("Back", callback_data="back_to_freelancer_dashboard")]]))
-            return
 
-        current_index = 0
-        if query.data.startswith('view_specific_job_'):
-            target_id = int(query.data.split('_')[-1])
-            try:
-                current_index = next(i for i, job in enumerate(all_jobs) if job.id == target_id)
-            except StopIteration:
-                await query.edit_message_text("This job is no longer available or could not be found.", reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("Back", callback_data="back_to_freelancer_dashboard")]]))
-                return
-        elif query.data.startswith('browse_job_'):
-            try:
-                current_index = int(query.data.split('_')[-1])
-            except (ValueError, IndexError):
-                current_index = 0
-
-        if not (0 <= current_index < len(all_jobs)):
-            await query.edit_message_text("An error occurred while trying to display this job.", reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("Back", callback_data="back_to_freelancer_dashboard")]]))
+    job = None
+    if query.data.startswith('view_specific_job_'):
+        job = open_jobs.get(int(query.data.split('_')[-1]))
+        if not job:
+            await query.edit_message_text("This job is no longer available or could not be found.", reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("Back", callback_data="back_to_freelancer_dashboard")]]))
             return
-        job = all_jobs[current_index]
-        skills_list = [skill.name for skill in job.skills_required]
-        skills_str = ", ".join(skills_list) or "None specified"
-        proposal_count = len(job.applications)
-        posted_ago = time_ago(job.created_at)
-        job_text = (
-            f"**{job.title}**\n\n"
-            f"**Description:** {job.description}\n\n"
-            f"**Skills Required:** {skills_str}\n\n"
-            f"**Budget:** ${job.budget:,.2f} USD\n"
-            f"**Proposals:** {proposal_count} so far\n"
-            f"**Posted:** {posted_ago}\n"
-        )
-        keyboard = []
-        nav_row = []
-        if current_index > 0:
-            nav_row.append(InlineKeyboardButton("Previous", callback_data=f"browse_job_{current_index - 1}"))
-        if current_index < len(all_jobs) - 1:
-            nav_row.append(InlineKeyboardButton("Next", callback_data=f"browse_job_{current_index + 1}"))
-        if nav_row:
-            keyboard.append(nav_row)
-        keyboard.append([
-            InlineKeyboardButton("Apply for this Job", callback_data=f"apply_job_{job.id}"),
-            InlineKeyboardButton("View Client Info", callback_data=f"view_client_{job.client.id}")
-        ])
-        keyboard.append([InlineKeyboardButton("Back to Dashboard", callback_data="back_to_freelancer_dashboard")])
-        await query.edit_message_text(text=job_text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='Markdown')
-    finally:
-        db_session.close()
+    elif query.data.startswith('browse_job_'):
+        try:
+            cursor = decode_cursor(query.data)
+        except ValueError:
+            cursor = None
+        if cursor and query.data.startswith('browse_job_next_'):
+            job = open_jobs.older_than(cursor)
+        elif cursor and query.data.startswith('browse_job_prev_'):
+            job = open_jobs.newer_than(cursor)
+    if not job:
+        job = open_jobs.newest()
+    if not job:
+        await query.edit_message_text("No open jobs at the moment.", reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("Back", callback_data="back_to_freelancer_dashboard")]]))
+        return
+
+    nav_row = []
+    cursor = encode_cursor(job)
+    if open_jobs.newer_than(job.key):
+        nav_row.append(InlineKeyboardButton("Previous", callback_data=f"browse_job_prev_{cursor}"))
+    if open_jobs.older_than(job.key):
+        nav_row.append(InlineKeyboardButton("Next", callback_data=f"browse_job_next_{cursor}"))
+    switch_button = InlineKeyboardButton("Show Best Matches", callback_data="freelancer_browse_jobs")
+    await query.edit_message_text(text=job_card_text(job), reply_markup=job_card_markup(job, nav_row, switch_button), parse_mode='Markdown')
 
 async def start_application(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     query = update.callback_query
@@ -244,22 +273,26 @@ async def received_bid_amount(update: Update, context: ContextTypes.DEFAULT_TYPE
     except ValueError:
         await update.message.reply_text("Invalid number. Please enter your bid again.")
         return BID_AMOUNT
-    db_session = SessionLocal()
-    try:
-        freelancer = db_session.query(User).filter(User.telegram_id == update.effective_user.id).first()
-        job_id = context.user_data['applying_for_job_id']
-        proposal = context.user_data['proposal_text']
-        existing_application = db_session.query(Application).filter(Application.job_id == job_id, Application.freelancer_id == freelancer.id).first()
-        if existing_application:
-            await update.message.reply_text("You have already applied for this job.")
-            context.user_data.clear()
-            return ConversationHandler.END
-        new_application = Application(proposal_text=proposal, bid_amount=bid, job_id=job_id, freelancer_id=freelancer.id)
-        db_session.add(new_application)
-        db_session.commit()
-        await update.message.reply_text("Your application has been submitted!")
-    finally:
-        db_session.close()
+    db_session = context.db_session
+    freelancer = context.current_user
+    job_id = context.user_data['applying_for_job_id']
+    proposal = context.user_data['proposal_text']
+    existing_application = await db_session.scalar(select(Application).where(Application.job_id == job_id, Application.freelancer_id == freelancer.id))
+    if existing_application:
+        await update.message.reply_text("You have already applied for this job.")
+        context.user_data.clear()
+        return ConversationHandler.END
+    # Increment in SQL so concurrent bids on the same job can't lose an update; the status
+    # check rejects bids on jobs that were hired, cancelled or deleted since the card was shown
+    counted = await db_session.execute(sql_update(Job).where(Job.id == job_id, Job.status == 'open').values(application_count=Job.application_count + 1))
+    if not counted.rowcount:
+        await update.message.reply_text("This job is no longer accepting proposals.")
+        context.user_data.clear()
+        return ConversationHandler.END
+    new_application = Application(proposal_text=proposal, bid_amount=bid, job_id=job_id, freelancer_id=freelancer.id)
+    db_session.add(new_application)
+    context.after_commit.append(functools.partial(open_jobs.add_proposal, job_id))
+    context.after_commit.append(functools.partial(update.message.reply_text, "Your application has been submitted!"))
     context.user_data.clear()
     return ConversationHandler.END
 
@@ -268,113 +301,120 @@ async def cancel_application(update: Update, context: ContextTypes.DEFAULT_TYPE)
     context.user_data.clear()
     return ConversationHandler.END
 
+@query_budget(3)
 async def show_my_applications(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Shows a freelancer their applications one by one with pagination."""
+    """
+    Shows a freelancer their applications one by one, newest first. The total is
+    counted when the viewer opens and then carried in the Previous/Next
+    callback_data (view_app_<index>_<total>), so each click fetches a single row
+    (plus one to see whether there is a next one). The carried total is corrected
+    from what the fetch returns, and recounted if the row it points at is gone.
+    """
     query = update.callback_query
     await query.answer()
     
-    db_session = SessionLocal()
-    try:
-        freelancer = db_session.query(User).filter(User.telegram_id == query.from_user.id).first()
-        my_apps = db_session.query(Application).filter(Application.freelancer_id == freelancer.id).order_by(Application.created_at.desc()).all()
-        
-        if not my_apps:
-            await query.edit_message_text("You have not applied for any jobs yet.", reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("Back", callback_data="back_to_freelancer_dashboard")]]))
-            return
+    db_session = context.db_session
+    freelancer = context.current_user
+    current_index, total = 0, None
+    if query.data.startswith('view_app_'):
+        parts = query.data.split('_')
+        try:
+            current_index = int(parts[2])
+            total = int(parts[3]) if len(parts) > 3 else None
+        except (ValueError, IndexError):
+            current_index = 0
+    count_applications = select(func.count(Application.id)).where(Application.freelancer_id == freelancer.id)
+    applications = (
+        select(Application.status, Application.bid_amount, Job.id, Job.title)
+        .join(Job, Job.id == Application.job_id)
+        .where(Application.freelancer_id == freelancer.id)
+        .order_by(Application.created_at.desc(), Application.id.desc())
+    )
+    recounted = total is None
+    if recounted:
+        total = await db_session.scalar(count_applications)
+    current_index = max(0, min(current_index, total - 1))
+    rows = (await db_session.execute(applications.limit(2).offset(current_index))).all() if total else []
+    if not rows and not recounted:
+        # The carried total is stale: applications went away since the buttons were drawn
+        total = await db_session.scalar(count_applications)
+        current_index = max(0, min(current_index, total - 1))
+        rows = (await db_session.execute(applications.limit(2).offset(current_index))).all() if total else []
+    if not rows:
+        await query.edit_message_text("You have not applied for any jobs yet.", reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("Back", callback_data="back_to_freelancer_dashboard")]]))
+        return
+    app = rows[0]
+    # A second row means there is a next one, whatever the carried total says
+    total = max(total, current_index + 2) if len(rows) > 1 else current_index + 1
+    
+    response_text = (
+        f"**Your Application ({current_index + 1}/{total})**\n\n"
+        f"**Job:** {app.title} (ID: `{app.id}`)\n"
+        f"   - **Status:** `{app.status}`\n"
+        f"   - **Your Bid:** `${app.bid_amount:,.2f}`"
+    )
+
+    keyboard = []
+    nav_row = []
+    if current_index > 0:
+        nav_row.append(InlineKeyboardButton("Previous", callback_data=f"view_app_{current_index - 1}_{total}"))
+    if current_index < total - 1:
+        nav_row.append(InlineKeyboardButton("Next", callback_data=f"view_app_{current_index + 1}_{total}"))
+    
+    if nav_row:
+        keyboard.append(nav_row)
+    keyboard.append([InlineKeyboardButton("Back to Dashboard", callback_data="back_to_freelancer_dashboard")])
+    
+    await query.edit_message_text(text=response_text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='Markdown')
 
-        current_index = 0
-        if query.data.startswith('view_app_'):
-            try:
-                current_index = int(query.data.split('_')[-1])
-            except (ValueError, IndexError):
-                current_index = 0
-        
-        app = my_apps[current_index]
-        
-        response_text = (
-            f"**Your Application ({current_index + 1}/{len(my_apps)})**\n\n"
-            f"**Job:** {app.job.title} (ID: `{app.job.id}`)\n"
-            f"   - **Status:** `{app.status}`\n"
-            f"   - **Your Bid:** `${app.bid_amount:,.2f}`"
-        )
-
-        keyboard = []
-        nav_row = []
-        if current_index > 0:
-            nav_row.append(InlineKeyboardButton("Previous", callback_data=f"view_app_{current_index - 1}"))
-        if current_index < len(my_apps) - 1:
-            nav_row.append(InlineKeyboardButton("Next", callback_data=f"view_app_{current_index + 1}"))
-        
-        if nav_row:
-            keyboard.append(nav_row)
-        keyboard.append([InlineKeyboardButton("Back to Dashboard", callback_data="back_to_freelancer_dashboard")])
-        
-        await query.edit_message_text(text=response_text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='Markdown')
-
-    finally:
-        db_session.close()
 
 async def view_ongoing_projects(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
-    db_session = SessionLocal()
-    try:
-        freelancer = db_session.query(User).filter(User.telegram_id == query.from_user.id).first()
-        ongoing_jobs = db_session.query(Job).filter(Job.hired_freelancer_id == freelancer.id, Job.status.in_(['in_progress', 'pending_completion'])).all()
-        if not ongoing_jobs:
-            await query.edit_message_text("You have no ongoing projects.", reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("Back", callback_data="back_to_freelancer_dashboard")]]))
-            return
-        
-        keyboard = []
-        for job in ongoing_jobs:
-            button_text = f"{job.title} (ID: {job.id}) - {job.status}"
-            if job.status == 'in_progress':
-                keyboard.append([InlineKeyboardButton(button_text, callback_data=f"mark_complete_{job.id}")])
-            else:
-                keyboard.append([InlineKeyboardButton(button_text, callback_data="none")])
+    db_session = context.db_session
+    freelancer = context.current_user
+    ongoing_jobs = (await db_session.scalars(select(Job).where(Job.hired_freelancer_id == freelancer.id, Job.status.in_(['in_progress', 'pending_completion'])))).all()
+    if not ongoing_jobs:
+        await query.edit_message_text("You have no ongoing projects.", reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("Back", callback_data="back_to_freelancer_dashboard")]]))
+        return
+    
+    keyboard = []
+    for job in ongoing_jobs:
+        button_text = f"{job.title} (ID: {job.id}) - {job.status}"
+        if job.status == 'in_progress':
+            keyboard.append([InlineKeyboardButton(button_text, callback_data=f"mark_complete_{job.id}")])
+        else:
+            keyboard.append([InlineKeyboardButton(button_text, callback_data="none")])
 
-        keyboard.append([InlineKeyboardButton("Back", callback_data="back_to_freelancer_dashboard")])
-        await query.edit_message_text("Select a job to mark it as complete:", reply_markup=InlineKeyboardMarkup(keyboard))
-    finally:
-        db_session.close()
+    keyboard.append([InlineKeyboardButton("Back", callback_data="back_to_freelancer_dashboard")])
+    await query.edit_message_text("Select a job to mark it as complete:", reply_markup=InlineKeyboardMarkup(keyboard))
 
 
 async def mark_job_complete(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
     job_id = int(query.data.split('_')[-1])
-    db_session = SessionLocal()
-    try:
-        job = db_session.query(Job).filter(Job.id == job_id).first()
-        if job and job.status == 'in_progress':
-            job.status = 'pending_completion'
-            db_session.commit()
-            await query.edit_message_text(f"You marked '{job.title}' as complete. The client has been notified.")
-            await context.bot.send_message(chat_id=job.client.telegram_id, text=f"The freelancer marked '{job.title}' as complete. Please review and confirm.")
-        else:
-            await query.edit_message_text("This action cannot be performed now.")
-    finally:
-        db_session.close()
+    db_session = context.db_session
+    job = await db_session.scalar(select(Job).where(Job.id == job_id))
+    if job and job.status == 'in_progress':
+        job.status = 'pending_completion'
+        context.after_commit.append(functools.partial(query.edit_message_text, f"You marked '{job.title}' as complete. The client has been notified."))
+        client = await job.awaitable_attrs.client
+        outbox.enqueue(db_session, client.telegram_id, f"The freelancer marked '{job.title}' as complete. Please review and confirm.")
+        context.after_commit.append(functools.partial(outbox.wake_dispatcher, context))
+    else:
+        await query.edit_message_text("This action cannot be performed now.")
 
 async def show_earnings(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Calculates and displays the freelancer's total earnings."""
     query = update.callback_query
     await query.answer()
-    db_session = SessionLocal()
-    try:
-        freelancer = db_session.query(User).filter(User.telegram_id == query.from_user.id).first()
-        
-        total_earned = db_session.query(func.sum(Job.budget)).filter(
-            Job.hired_freelancer_id == freelancer.id,
-            Job.status == 'completed'
-        ).scalar() or 0.0
-
-        earnings_text = f"**Your Earnings & Payouts**\n\n"
-        earnings_text += f"**Total Lifetime Earnings:** ${total_earned:,.2f} USD\n\n"
-        earnings_text += "Payouts are processed manually at this time. Please contact an admin to request a withdrawal."
-
-        keyboard = [[InlineKeyboardButton("Back to Dashboard", callback_data="back_to_freelancer_dashboard")]]
-        await query.edit_message_text(text=earnings_text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='Markdown')
-    finally:
-        db_session.close()
+    total_earned = (await get_reputation(context.db_session, context.current_user.id)).total_earned
+
+    earnings_text = f"**Your Earnings & Payouts**\n\n"
+    earnings_text += f"**Total Lifetime Earnings:** ${total_earned:,.2f} USD\n\n"
+    earnings_text += "Payouts are processed manually at this time. Please contact an admin to request a withdrawal."
+
+    keyboard = [[InlineKeyboardButton("Back to Dashboard", callback_data="back_to_freelancer_dashboard")]]
+    await query.edit_message_text(text=earnings_text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='Markdown')
 
@@ -0,0 +1,54 @@
+from collections import OrderedDict
+from typing import NamedTuple
+
+from config import FEED_CACHE_SIZE
+from .open_jobs import open_jobs
+from .skill_index import freelancer_index
+
+
+class RankedFeed(NamedTuple):
+    skills: frozenset
+    job_ids: list
+    position_of: dict
+
+
+def rank_jobs_for(skills) -> list:
+    """Open jobs sharing a skill with `skills`: most overlap first, then higher budget, then newer."""
+    jobs = [open_jobs.get(job_id) for job_id in open_jobs.with_skills(skills)]
+    jobs.sort(key=lambda job: (len(job.skill_ids & skills), job.budget, job.key), reverse=True)
+    return [job.id for job in jobs]
+
+
+class FeedCache:
+    """
+    Bounded LRU of ranked job feeds, keyed by freelancer id. Each feed remembers the
+    skill set it was ranked for, so a skill change makes it stale on the next read.
+    Opening a job drops the feeds of the freelancers it matches.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._feeds = OrderedDict()
+
+    def get(self, user_id: int) -> RankedFeed:
+        skills = frozenset(freelancer_index.skills_of.get(user_id, ()))
+        feed = self._feeds.get(user_id)
+        if feed is None or feed.skills != skills:
+            job_ids = rank_jobs_for(skills)
+            feed = RankedFeed(skills, job_ids, {job_id: position for position, job_id in enumerate(job_ids)})
+            self._feeds[user_id] = feed
+        self._feeds.move_to_end(user_id)
+        while len(self._feeds) > self.max_size:
+            self._feeds.popitem(last=False)
+        return feed
+
+    def invalidate(self, user_id: int):
+        self._feeds.pop(user_id, None)
+
+    def job_opened(self, job):
+        for user_id in freelancer_index.match(job.skill_ids):
+            self._feeds.pop(user_id, None)
+
+
+feed_cache = FeedCache(FEED_CACHE_SIZE)
+open_jobs.on_open(feed_cache.job_opened)
@@ -1,57 +1,60 @@
 import logging
-from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+import time
 from telegram.ext import ContextTypes
 
-from database import SessionLocal, Job, User, Skill
+from .open_jobs import OpenJob, open_jobs
+from .skill_index import freelancer_index
+from .alert_digest import JobAlert, alert_digest
+from .ranking import rank_candidates, top_k_for_budget
 
 logger = logging.getLogger(__name__)
 
-async def notify_matching_freelancers(context: ContextTypes.DEFAULT_TYPE, job: Job):
-    """Finds and notifies freelancers whose skills match a new job posting."""
-    
-    db_session = SessionLocal()
-    try:
-        required_skill_ids = {skill.id for skill in job.skills_required}
-        if not required_skill_ids:
-            logger.info(f"Job {job.id} has no required skills. No notifications sent.")
-            return
-
-        # Find all users who are freelancers and have at least one of the required skills
-        matching_freelancers = db_session.query(User).filter(
-            User.role == 'freelancer',
-            User.skills.any(Skill.id.in_(required_skill_ids))
-        ).all()
-        
-        if not matching_freelancers:
-            logger.info(f"No freelancers found with matching skills for job {job.id}.")
-            return
-
-        notification_text = (
-            f"?? **New Job Alert!**\n\n"
-            f"A new job matching your skills has been posted:\n\n"
-            f"?? **{job.title}**\n"
-            f"?? Budget: ${job.budget:,.2f}"
-        )
-        # In matching.py
-        keyboard = [[InlineKeyboardButton("?? View Job & Apply", callback_data=f"view_specific_job_{job.id}")]]
-
-
-        sent_count = 0
-        for freelancer in matching_freelancers:
-            try:
-                await context.bot.send_message(
-                    chat_id=freelancer.telegram_id,
-                    text=notification_text,
-                    reply_markup=InlineKeyboardMarkup(keyboard),
-                    parse_mode='Markdown'
-                )
-                sent_count += 1
-            except Exception as e:
-                logger.error(f"Failed to send notification to {freelancer.telegram_id} for job {job.id}: {e}")
-        
-        logger.info(f"Sent {sent_count} notifications for job {job.id}.")
-
-    finally:
-        db_session.close()
-
-
+# Running totals for the background matcher, logged with each completed run
+matching_stats = {"jobs_matched": 0, "notifications_queued": 0, "total_ms": 0.0}
+
+def schedule_job_matching(context: ContextTypes.DEFAULT_TYPE, job_id: int):
+    """Queues job-alert matching for a newly opened job so the posting handler can return immediately."""
+    name = f"match_job_{job_id}"
+    if context.job_queue.get_jobs_by_name(name):
+        return
+    context.job_queue.run_once(match_job_callback, when=0, data=job_id, name=name)
+
+async def match_job_callback(context: ContextTypes.DEFAULT_TYPE):
+    """Job-queue callback: looks the job up in the open-jobs view and notifies matching freelancers."""
+    job_id = context.job.data
+    started = time.monotonic()
+    job = open_jobs.get(job_id)
+    if not job:
+        logger.info(f"Skipping matching for job {job_id}: no longer open.")
+        return
+
+    queued = notify_matching_freelancers(job, job.skill_ids)
+
+    elapsed_ms = (time.monotonic() - started) * 1000
+    matching_stats["jobs_matched"] += 1
+    matching_stats["notifications_queued"] += queued
+    matching_stats["total_ms"] += elapsed_ms
+    logger.info(
+        f"Matching for job {job_id} finished in {elapsed_ms:.1f} ms, {queued} notifications queued. "
+        f"Totals: {matching_stats['jobs_matched']} jobs, {matching_stats['notifications_queued']} notifications."
+    )
+
+def notify_matching_freelancers(job: OpenJob, required_skill_ids) -> int:
+    """Hands a job alert to the digest for the best-ranked freelancers whose skills match. Returns the number alerted."""
+    if not required_skill_ids:
+        logger.info(f"Job {job.id} has no required skills. No notifications sent.")
+        return 0
+
+    # Freelancers holding at least one of the required skills, from the in-memory index
+    overlap_counts = freelancer_index.overlap_counts(required_skill_ids)
+    if not overlap_counts:
+        logger.info(f"No freelancers found with matching skills for job {job.id}.")
+        return 0
+    top_k = top_k_for_budget(job.budget)
+    ranked = rank_candidates(overlap_counts, len(required_skill_ids), top_k)
+    logger.info(f"Job {job.id}: {len(overlap_counts)} freelancers match, alerting the top {len(ranked)} (K={top_k}).")
+
+    alert = JobAlert(job.id, job.title, job.budget)
+    for _, user_id in ranked:
+        alert_digest.add(freelancer_index.telegram_ids[user_id], alert)
+    return len(ranked)
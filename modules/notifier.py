@@ -0,0 +1,217 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import NamedTuple
+
+from telegram.error import Forbidden, BadRequest, RetryAfter, TelegramError
+
+from database import SessionLocal
+from config import NOTIFY_RATE, NOTIFY_PER_CHAT_INTERVAL, NOTIFY_CONCURRENCY, NOTIFY_MAX_RETRIES
+
+logger = logging.getLogger(__name__)
+
+# Window used for the throughput figure in metrics()
+THROUGHPUT_WINDOW = 60
+
+
+class Notification(NamedTuple):
+    chat_id: int
+    text: str
+    kwargs: dict
+    attempt: int = 0
+
+
+class TokenBucket:
+    """Global send budget: refills at `rate` tokens per second up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def pause(self, seconds: float):
+        """Stops handing out tokens for `seconds`, e.g. after Telegram answers 429."""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            if now < self.paused_until:
+                await asyncio.sleep(self.paused_until - now)
+                continue
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def _retry_delay(error: RetryAfter) -> float:
+    retry_after = error.retry_after
+    return retry_after.total_seconds() if hasattr(retry_after, 'total_seconds') else float(retry_after)
+
+
+class NotificationDispatcher:
+    """
+    Queues outgoing messages and delivers them from a fixed pool of workers, within
+    Telegram's flood limits. Handlers call submit() and return without waiting on delivery.
+    """
+
+    def __init__(self, rate=NOTIFY_RATE, per_chat_interval=NOTIFY_PER_CHAT_INTERVAL,
+                 concurrency=NOTIFY_CONCURRENCY, max_retries=NOTIFY_MAX_RETRIES):
+        self.bucket = TokenBucket(rate, capacity=rate)
+        self.per_chat_interval = per_chat_interval
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.queue = asyncio.Queue()
+        self.bot = None
+        self._workers = []
+        self._chat_locks = {}
+        self._last_chat_send = {}
+        self._recent_sends = deque()
+        # Retries waiting out their backoff, keyed by a token so the timer can remove its own entry
+        self._retries = {}
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+
+    async def start(self, bot):
+        self.bot = bot
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        logger.info(f"Notification dispatcher started with {self.concurrency} workers at {self.bucket.rate}/s.")
+
+    async def stop(self, timeout: float = 10):
+        """
+        Gives queued messages up to `timeout` seconds to go out, then stops the workers.
+        Whatever is still queued or waiting to be retried is saved to the outbox.
+        """
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._persist_undelivered()
+
+    def _persist_undelivered(self):
+        """Writes queued and backing-off notifications to the outbox; dispatch_outbox sends them after a restart."""
+        # Imported here because the outbox module sends through this one
+        from .outbox import enqueue
+        undelivered = []
+        for handle, notification in self._retries.values():
+            handle.cancel()
+            undelivered.append(notification)
+        self._retries.clear()
+        while not self.queue.empty():
+            undelivered.append(self.queue.get_nowait())
+            self.queue.task_done()
+        if not undelivered:
+            return
+        db_session = SessionLocal()
+        try:
+            for notification in undelivered:
+                enqueue(db_session, notification.chat_id, notification.text,
+                        reply_markup=notification.kwargs.get('reply_markup'), parse_mode=notification.kwargs.get('parse_mode'))
+            db_session.commit()
+        finally:
+            db_session.close()
+        logger.warning(f"Notification dispatcher stopped with {len(undelivered)} messages undelivered; saved them to the outbox.")
+
+    def submit(self, chat_id: int, text: str, **kwargs):
+        """Queues a send_message call. Extra keyword arguments are passed through to the Bot API."""
+        self.queue.put_nowait(Notification(chat_id, text, kwargs))
+
+    async def _worker(self):
+        while True:
+            notification = await self.queue.get()
+            try:
+                await self._deliver(notification)
+            except Exception as e:
+                logger.error(f"Unexpected error delivering to {notification.chat_id}: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def send_now(self, chat_id: int, text: str, **kwargs):
+        """
+        Sends one message under the same global and per-chat limits and waits for the result.
+        Raises the Telegram error on failure; a RetryAfter also pauses the whole bucket.
+        """
+        # Messages to the same chat go one at a time, at least per_chat_interval apart
+        chat_lock = self._chat_locks.setdefault(chat_id, asyncio.Lock())
+        async with chat_lock:
+            wait = self._last_chat_send.get(chat_id, 0) + self.per_chat_interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            await self.bucket.acquire()
+            self._last_chat_send[chat_id] = time.monotonic()
+            try:
+                await self.bot.send_message(chat_id=chat_id, text=text, **kwargs)
+            except RetryAfter as e:
+                self.bucket.pause(_retry_delay(e))
+                raise
+        self.sent += 1
+        self._recent_sends.append(time.monotonic())
+
+    async def _deliver(self, notification: Notification):
+        try:
+            await self.send_now(notification.chat_id, notification.text, **notification.kwargs)
+        except RetryAfter as e:
+            delay = _retry_delay(e)
+            self._retry(notification, delay, f"flood control, retry in {delay}s")
+        except (Forbidden, BadRequest) as e:
+            # The user blocked the bot or the chat is gone; retrying won't help
+            self.failed += 1
+            logger.error(f"Failed to send notification to {notification.chat_id}: {e}")
+        except TelegramError as e:
+            self._retry(notification, min(2 ** notification.attempt, 60), str(e))
+
+    def _retry(self, notification: Notification, delay: float, reason: str):
+        if notification.attempt >= self.max_retries:
+            self.failed += 1
+            logger.error(f"Giving up on notification to {notification.chat_id} after {notification.attempt + 1} attempts: {reason}")
+            return
+        self.retried += 1
+        retry = notification._replace(attempt=notification.attempt + 1)
+        token = object()
+        handle = asyncio.get_running_loop().call_later(delay, self._requeue, token)
+        self._retries[token] = (handle, retry)
+
+    def _requeue(self, token):
+        _, retry = self._retries.pop(token)
+        self.queue.put_nowait(retry)
+
+    def metrics(self):
+        now = time.monotonic()
+        idle = [
+            chat_id for chat_id, sent_at in self._last_chat_send.items()
+            if sent_at + self.per_chat_interval < now and not self._chat_locks[chat_id].locked()
+        ]
+        for chat_id in idle:
+            del self._last_chat_send[chat_id]
+            del self._chat_locks[chat_id]
+        cutoff = now - THROUGHPUT_WINDOW
+        while self._recent_sends and self._recent_sends[0] < cutoff:
+            self._recent_sends.popleft()
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+            "queue_depth": self.queue.qsize(),
+            "throughput_per_sec": round(len(self._recent_sends) / THROUGHPUT_WINDOW, 2),
+        }
+
+    async def log_metrics(self, context=None):
+        """Job-queue callback; only logs while there is traffic to report."""
+        stats = self.metrics()
+        if stats["queue_depth"] or stats["throughput_per_sec"]:
+            logger.info(f"Notifier: {stats}")
+
+
+notifier = NotificationDispatcher()
@@ -0,0 +1,190 @@
+import datetime
+import logging
+from bisect import bisect_left, bisect_right, insort
+from typing import NamedTuple
+
+from sqlalchemy import select
+
+from database import AsyncSessionLocal, SessionLocal, Job, job_skills_table
+
+logger = logging.getLogger(__name__)
+
+
+class OpenJob(NamedTuple):
+    id: int
+    title: str
+    description: str
+    budget: float
+    skill_ids: frozenset
+    client_id: int
+    created_at: datetime.datetime
+    proposal_count: int
+
+    @property
+    def key(self):
+        return (self.created_at, self.id)
+
+
+class OpenJobStore:
+    """
+    In-process view of every job with status 'open', ordered by (created_at, id)
+    and indexed by skill. Handlers that open a job, add an application or move a
+    job out of 'open' update it right after their commit; browsing and job alerts
+    read from it instead of SQLite.
+    """
+
+    def __init__(self):
+        self.by_id = {}
+        self.keys = []
+        self.by_skill = {}
+        self._open_listeners = []
+        self._changed = None
+
+    def on_open(self, listener):
+        """Registers a callable that receives each job as it is added to the view."""
+        self._open_listeners.append(listener)
+
+    def track_changes(self) -> set:
+        """Starts recording the ids of jobs changed in the view; returns the set they are recorded in."""
+        self._changed = set()
+        return self._changed
+
+    def stop_tracking(self):
+        self._changed = None
+
+    def _record(self, job_id: int):
+        if self._changed is not None:
+            self._changed.add(job_id)
+
+    def add(self, job: OpenJob):
+        self.remove(job.id)
+        self._record(job.id)
+        self.by_id[job.id] = job
+        insort(self.keys, job.key)
+        for skill_id in job.skill_ids:
+            self.by_skill.setdefault(skill_id, set()).add(job.id)
+        for listener in self._open_listeners:
+            listener(job)
+
+    def remove(self, job_id: int):
+        self._record(job_id)
+        job = self.by_id.pop(job_id, None)
+        if job is None:
+            return
+        del self.keys[bisect_left(self.keys, job.key)]
+        for skill_id in job.skill_ids:
+            holders = self.by_skill.get(skill_id)
+            if holders is not None:
+                holders.discard(job_id)
+                if not holders:
+                    del self.by_skill[skill_id]
+
+    def add_proposal(self, job_id: int):
+        self._record(job_id)
+        job = self.by_id.get(job_id)
+        if job is not None:
+            self.by_id[job_id] = job._replace(proposal_count=job.proposal_count + 1)
+
+    def set_proposal_count(self, job_id: int, count: int):
+        self._record(job_id)
+        job = self.by_id.get(job_id)
+        if job is not None:
+            self.by_id[job_id] = job._replace(proposal_count=count)
+
+    def get(self, job_id: int):
+        return self.by_id.get(job_id)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def newest(self):
+        return self.by_id[self.keys[-1][1]] if self.keys else None
+
+    def older_than(self, key):
+        """The next job after `key` in newest-first order, or None."""
+        index = bisect_left(self.keys, key)
+        return self.by_id[self.keys[index - 1][1]] if index > 0 else None
+
+    def newer_than(self, key):
+        """The previous job before `key` in newest-first order, or None."""
+        index = bisect_right(self.keys, key)
+        return self.by_id[self.keys[index][1]] if index < len(self.keys) else None
+
+    def with_skills(self, skill_ids) -> set:
+        """Ids of open jobs requiring at least one of `skill_ids`."""
+        matched = set()
+        for skill_id in skill_ids:
+            matched |= self.by_skill.get(skill_id, set())
+        return matched
+
+
+open_jobs = OpenJobStore()
+
+def open_job_from(job: Job, skill_ids) -> OpenJob:
+    return OpenJob(
+        job.id, job.title, job.description, job.budget, frozenset(skill_ids),
+        job.client_id, job.created_at, job.application_count or 0
+    )
+
+_open_jobs_query = select(Job).where(Job.status == 'open')
+_open_job_skills_query = select(job_skills_table.c.job_id, job_skills_table.c.skill_id).join(
+    Job, Job.id == job_skills_table.c.job_id
+).where(Job.status == 'open')
+
+def _build(jobs, skill_rows) -> dict:
+    skills = {}
+    for job_id, skill_id in skill_rows:
+        skills.setdefault(job_id, set()).add(skill_id)
+    return {job.id: open_job_from(job, skills.get(job.id, ())) for job in jobs}
+
+def load_open_jobs():
+    """Builds the store from the database. Called once at startup."""
+    db_session = SessionLocal()
+    try:
+        built = _build(
+            db_session.scalars(_open_jobs_query).all(),
+            db_session.execute(_open_job_skills_query).all(),
+        )
+    finally:
+        db_session.close()
+    store = OpenJobStore()
+    for job in built.values():
+        store.add(job)
+    open_jobs.by_id, open_jobs.keys, open_jobs.by_skill = store.by_id, store.keys, store.by_skill
+    logger.info(f"Loaded {len(open_jobs)} open jobs.")
+
+# One statement, so the jobs and their skills come from a single read snapshot
+_open_jobs_snapshot_query = select(Job, job_skills_table.c.skill_id).outerjoin(
+    job_skills_table, job_skills_table.c.job_id == Job.id
+).where(Job.status == 'open')
+
+async def check_open_jobs(context=None):
+    """
+    Compares the store with a snapshot of the database and repairs any drift.
+    Jobs that handlers change while the snapshot is read are left alone, since the
+    snapshot may predate their commit. Signature matches a job-queue callback.
+    Returns (removed, refreshed).
+    """
+    changed_meanwhile = open_jobs.track_changes()
+    try:
+        async with AsyncSessionLocal() as db_session:
+            rows = (await db_session.execute(_open_jobs_snapshot_query)).all()
+    finally:
+        open_jobs.stop_tracking()
+    jobs = {job.id: job for job, _ in rows}
+    expected = _build(jobs.values(), [(job.id, skill_id) for job, skill_id in rows if skill_id is not None])
+
+    stale = [job_id for job_id in open_jobs.by_id if job_id not in expected and job_id not in changed_meanwhile]
+    changed = [
+        job for job_id, job in expected.items()
+        if job_id not in changed_meanwhile and open_jobs.get(job_id) != job
+    ]
+    for job_id in stale:
+        open_jobs.remove(job_id)
+    for job in changed:
+        open_jobs.add(job)
+    if stale or changed:
+        logger.warning(f"Open-jobs view was out of sync: removed {len(stale)}, refreshed {len(changed)}.")
+    else:
+        logger.info(f"Open-jobs view consistent with the database ({len(open_jobs)} jobs).")
+    return len(stale), len(changed)
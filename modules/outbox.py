@@ -0,0 +1,115 @@
+import asyncio
+import datetime
+import json
+import logging
+
+from sqlalchemy import insert, select, update
+from telegram import InlineKeyboardMarkup
+from telegram.error import Forbidden, BadRequest
+
+from config import OUTBOX_BATCH_SIZE, OUTBOX_MAX_ATTEMPTS
+from database import AsyncSessionLocal, SessionLocal, Outbox
+from .notifier import notifier
+
+logger = logging.getLogger(__name__)
+
+# Serializes dispatch runs so the repeating poll and an explicit wake-up don't overlap
+_dispatch_lock = asyncio.Lock()
+
+
+def enqueue(db_session, chat_id: int, text: str, reply_markup: InlineKeyboardMarkup = None, parse_mode: str = None):
+    """
+    Adds a message to the outbox in the caller's session. It is only sent once the
+    caller commits, so the message and the state change it announces land together.
+    """
+    db_session.add(Outbox(
+        chat_id=chat_id,
+        text=text,
+        parse_mode=parse_mode,
+        reply_markup=reply_markup.to_json() if reply_markup else None,
+    ))
+
+async def enqueue_many(db_session, messages):
+    """
+    Like enqueue for a batch of plain-text (chat_id, text) messages, written with one
+    executemany INSERT instead of one INSERT per row.
+    """
+    await db_session.execute(insert(Outbox), [{'chat_id': chat_id, 'text': text} for chat_id, text in messages])
+
+def wake_dispatcher(context):
+    """Runs a dispatch pass right away instead of waiting for the next poll."""
+    context.job_queue.run_once(dispatch_outbox, when=0, name="outbox_wake")
+
+def recover_outbox():
+    """Returns rows claimed by a worker that died mid-batch to the queue. Called once at startup."""
+    db_session = SessionLocal()
+    try:
+        reclaimed = db_session.query(Outbox).filter(Outbox.status == 'sending').update(
+            {Outbox.status: 'pending'}, synchronize_session=False
+        )
+        db_session.commit()
+    finally:
+        db_session.close()
+    if reclaimed:
+        logger.info(f"Outbox: returned {reclaimed} interrupted messages to the queue.")
+
+async def _claim_batch():
+    """Marks the oldest pending rows as 'sending' in one short write transaction and returns them."""
+    async with AsyncSessionLocal() as db_session:
+        oldest_pending = (
+            select(Outbox.id).where(Outbox.status == 'pending')
+            .order_by(Outbox.id).limit(OUTBOX_BATCH_SIZE)
+        )
+        rows = (await db_session.scalars(
+            update(Outbox).where(Outbox.id.in_(oldest_pending))
+            .values(status='sending', attempts=Outbox.attempts + 1)
+            .returning(Outbox)
+        )).all()
+        await db_session.commit()
+    return sorted(rows, key=lambda row: row.id)
+
+async def _send_row(bot, row):
+    """Sends one claimed row. Returns (row id, new status, error text)."""
+    kwargs = {}
+    if row.parse_mode:
+        kwargs['parse_mode'] = row.parse_mode
+    if row.reply_markup:
+        kwargs['reply_markup'] = InlineKeyboardMarkup.de_json(json.loads(row.reply_markup), bot)
+    try:
+        await notifier.send_now(row.chat_id, row.text, **kwargs)
+    except (Forbidden, BadRequest) as e:
+        return row.id, 'failed', str(e)
+    except Exception as e:
+        return row.id, 'failed' if row.attempts >= OUTBOX_MAX_ATTEMPTS else 'pending', str(e)
+    return row.id, 'sent', None
+
+async def dispatch_outbox(context=None):
+    """
+    Job-queue callback: claims pending messages in batches, sends them with no
+    transaction open, then records each outcome in one write per batch.
+    """
+    if _dispatch_lock.locked():
+        return
+    async with _dispatch_lock:
+        while True:
+            rows = await _claim_batch()
+            if not rows:
+                return
+            results = await asyncio.gather(*(_send_row(notifier.bot, row) for row in rows))
+
+            now = datetime.datetime.utcnow()
+            async with AsyncSessionLocal() as db_session:
+                await db_session.execute(update(Outbox), [
+                    {'id': row_id, 'status': status, 'last_error': error, 'sent_at': now if status == 'sent' else None}
+                    for row_id, status, error in results
+                ])
+                await db_session.commit()
+
+            sent = sum(1 for _, status, _ in results if status == 'sent')
+            for row_id, status, error in results:
+                if status != 'sent':
+                    logger.error(f"Outbox message {row_id} not delivered ({status}): {error}")
+            logger.info(f"Outbox: delivered {sent} of {len(rows)} messages.")
+            if sent < len(rows):
+                # Leave retries for the next poll rather than spinning on a failing chat
+                return
@@ -1,9 +1,13 @@
+import functools
 import logging
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
+from sqlalchemy import select
 
-from database import SessionLocal, Job
-from . import matching
+from database import Job
+from . import matching, outbox
+from .reputation import record_reputation
+from .open_jobs import open_jobs, open_job_from
 from config import ADMIN_ID
 
 logger = logging.getLogger(__name__)
@@ -13,14 +17,19 @@ async def handle_deposit_sent(update: Update, context: ContextTypes.DEFAULT_TYPE
     query = update.callback_query
     await query.answer()
     tx_id = int(query.data.split('_')[-1])
-    await query.edit_message_text("Thank you. Your deposit is pending confirmation from an administrator. You will be notified once it is approved.")
     keyboard = [[InlineKeyboardButton("Confirm Deposit", callback_data=f"admin_confirm_deposit_{tx_id}")]]
-    await context.bot.send_message(
-        chat_id=ADMIN_ID,
-        text=f"User {query.from_user.first_name} (`{query.from_user.id}`) has marked deposit transaction `{tx_id}` as sent. Please verify and confirm.",
+    outbox.enqueue(
+        context.db_session,
+        ADMIN_ID,
+        f"User {query.from_user.first_name} (`{query.from_user.id}`) has marked deposit transaction `{tx_id}` as sent. Please verify and confirm.",
         reply_markup=InlineKeyboardMarkup(keyboard),
         parse_mode='Markdown'
     )
+    context.after_commit.append(functools.partial(outbox.wake_dispatcher, context))
+    context.after_commit.append(functools.partial(
+        query.edit_message_text,
+        "Thank you. Your deposit is pending confirmation from an administrator. You will be notified once it is approved."
+    ))
 
 async def handle_deposit_request(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Shows the user a placeholder message with a payment button."""
@@ -45,34 +54,36 @@ async def handle_deposit_request(update: Update, context: ContextTypes.DEFAULT_T
 async def auto_confirm_payment(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     Automatically confirms payment for testing, changes job status to 'open',
-    and notifies matching freelancers.
+    and queues job alerts for matching freelancers.
     """
     query = update.callback_query
     await query.answer()
     job_id = int(query.data.split('_')[-1])
 
-    db_session = SessionLocal()
+    db_session = context.db_session
     try:
-        job = db_session.query(Job).filter(Job.id == job_id).first()
+        job = await db_session.scalar(select(Job).where(Job.id == job_id))
         if job and job.status == 'pending_deposit':
             job.status = 'open'
-            db_session.commit()
-            
-            await query.edit_message_text("✅ Payment confirmed! Your job is now live and freelancers are being notified.")
+            await record_reputation(db_session, job.client_id, jobs_posted=1)
+            skill_ids = {skill.id for skill in await job.awaitable_attrs.skills_required}
+            context.after_commit.append(functools.partial(open_jobs.add, open_job_from(job, skill_ids)))
+            context.after_commit.append(functools.partial(matching.schedule_job_matching, context, job.id))
+            context.after_commit.append(functools.partial(
+                query.edit_message_text, "✅ Payment confirmed! Your job is now live and freelancers are being notified."
+            ))
             logger.info(f"Auto-confirmed payment for Job ID {job.id}. Job is now open.")
-            
-            # Notify matching freelancers that the job is now available
-            await matching.notify_matching_freelancers(context, job)
-            
+
         else:
             await query.edit_message_text("This job is not awaiting payment or could not be found.")
             logger.warning(f"Attempted to auto-confirm payment for non-pending job ID {job_id}.")
 
     except Exception as e:
         logger.error(f"An error occurred during auto-confirmation for job {job_id}: {e}")
+        # Release the write lock before telling the user; re-raising keeps unit_of_work from committing half the change
+        await db_session.rollback()
         await query.edit_message_text("An error occurred. Please contact support.")
-    finally:
-        db_session.close()
+        raise
 
 # These functions would be used in a production environment with manual admin checks.
 # They are not needed for the current testing setup but are included for completeness.
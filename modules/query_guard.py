@@ -0,0 +1,34 @@
+import logging
+
+from config import QUERY_GUARD
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised in QUERY_GUARD=raise mode when a handler runs more SQL than it declared."""
+
+
+def query_budget(max_queries: int):
+    """Declares how many SQL statements (reads and flushed writes) a handler may run per update. Lazy loads are never allowed."""
+    def decorate(callback):
+        callback.query_budget = max_queries
+        return callback
+    return decorate
+
+def check_query_budget(callback, queries: int, lazy_loads: int):
+    """Called by unit_of_work with the statements the handler itself ran."""
+    budget = getattr(callback, 'query_budget', None)
+    if budget is None or QUERY_GUARD == 'off':
+        return
+    problems = []
+    if queries > budget:
+        problems.append(f"ran {queries} queries (budget {budget})")
+    if lazy_loads:
+        problems.append(f"lazy-loaded {lazy_loads} relationships")
+    if not problems:
+        return
+    message = f"{callback.__name__} {' and '.join(problems)}"
+    if QUERY_GUARD == 'raise':
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
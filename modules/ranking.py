@@ -0,0 +1,115 @@
+import datetime
+import heapq
+import math
+import time
+
+from sqlalchemy import func
+
+from config import MATCH_TOP_K_TIERS
+from database import SessionLocal, User, Application, UserReputation
+
+# Weights of each signal in a freelancer's match score; they sum to 1
+OVERLAP_WEIGHT = 0.5
+RATING_WEIGHT = 0.2
+COMPLETED_WEIGHT = 0.15
+RECENCY_WEIGHT = 0.15
+
+# Unrated freelancers are treated as having RATING_PRIOR_WEIGHT reviews of RATING_PRIOR
+RATING_PRIOR = 3.5
+RATING_PRIOR_WEIGHT = 2
+# Completed jobs beyond this add nothing more to the score
+COMPLETED_SATURATION = 20
+# Activity this many days old counts half as much as activity today
+RECENCY_HALF_LIFE_DAYS = 14
+
+
+def _epoch(value: datetime.datetime) -> float:
+    return value.replace(tzinfo=datetime.timezone.utc).timestamp()
+
+
+class FreelancerStats:
+    """
+    Ranking signals per freelancer, loaded once at startup and updated in place
+    as reviews, completed jobs and activity happen.
+    """
+
+    def __init__(self):
+        self.rating_sum = {}
+        self.rating_count = {}
+        self.completed_jobs = {}
+        self.last_active = {}
+
+    def record_review(self, user_id: int, rating: int):
+        self.rating_sum[user_id] = self.rating_sum.get(user_id, 0) + rating
+        self.rating_count[user_id] = self.rating_count.get(user_id, 0) + 1
+
+    def record_completed_job(self, user_id: int):
+        self.completed_jobs[user_id] = self.completed_jobs.get(user_id, 0) + 1
+
+    def touch(self, user_id: int, when: float = None):
+        self.last_active[user_id] = when or time.time()
+
+    def score(self, user_id: int, overlap_ratio: float, now: float) -> float:
+        rating = (self.rating_sum.get(user_id, 0) + RATING_PRIOR * RATING_PRIOR_WEIGHT) / (
+            self.rating_count.get(user_id, 0) + RATING_PRIOR_WEIGHT
+        )
+        completed = min(1.0, math.log1p(self.completed_jobs.get(user_id, 0)) / math.log1p(COMPLETED_SATURATION))
+        idle_days = max(0.0, now - self.last_active.get(user_id, 0)) / 86400
+        recency = 0.5 ** (idle_days / RECENCY_HALF_LIFE_DAYS)
+        return (
+            OVERLAP_WEIGHT * overlap_ratio
+            + RATING_WEIGHT * rating / 5
+            + COMPLETED_WEIGHT * completed
+            + RECENCY_WEIGHT * recency
+        )
+
+
+freelancer_stats = FreelancerStats()
+
+def load_freelancer_stats():
+    """Builds the ranking signals from the database. Called once at startup."""
+    db_session = SessionLocal()
+    try:
+        reputations = db_session.query(
+            UserReputation.user_id, UserReputation.rating_sum, UserReputation.rating_count, UserReputation.jobs_completed
+        ).all()
+        # Last application is the best persisted proxy for activity; fall back to sign-up time
+        last_applied = db_session.query(Application.freelancer_id, func.max(Application.created_at)).group_by(Application.freelancer_id).all()
+        joined = db_session.query(User.id, User.created_at).filter(User.role == 'freelancer').all()
+    finally:
+        db_session.close()
+
+    stats = FreelancerStats()
+    for user_id, rating_sum, rating_count, jobs_completed in reputations:
+        if rating_count:
+            stats.rating_sum[user_id], stats.rating_count[user_id] = rating_sum, rating_count
+        if jobs_completed:
+            stats.completed_jobs[user_id] = jobs_completed
+    for user_id, created_at in joined:
+        if created_at:
+            stats.touch(user_id, _epoch(created_at))
+    for user_id, applied_at in last_applied:
+        if applied_at:
+            stats.touch(user_id, max(stats.last_active.get(user_id, 0), _epoch(applied_at)))
+    freelancer_stats.rating_sum, freelancer_stats.rating_count = stats.rating_sum, stats.rating_count
+    freelancer_stats.completed_jobs, freelancer_stats.last_active = stats.completed_jobs, stats.last_active
+
+def top_k_for_budget(budget: float) -> int:
+    """Returns K for the highest tier whose minimum budget the job reaches."""
+    k = MATCH_TOP_K_TIERS[0][1]
+    for min_budget, tier_k in sorted(MATCH_TOP_K_TIERS):
+        if budget >= min_budget:
+            k = tier_k
+    return k
+
+def rank_candidates(overlap_counts, required_count: int, k: int):
+    """
+    Picks the `k` best-scoring freelancers from {user id: overlapping skill count}
+    with a bounded heap. Returns [(score, user id)], best first.
+    """
+    now = time.time()
+    scored = (
+        (freelancer_stats.score(user_id, overlap / required_count, now), user_id)
+        for user_id, overlap in overlap_counts.items()
+    )
+    return heapq.nlargest(k, scored)
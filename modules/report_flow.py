@@ -1,8 +1,9 @@
 import logging
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, ConversationHandler
+from sqlalchemy import select
 
-from database import SessionLocal, User
+from database import User
 from config import ADMIN_ID
 
 logger = logging.getLogger(__name__)
@@ -30,9 +31,9 @@ async def submit_report(update: Update, context: ContextTypes.DEFAULT_TYPE) -> i
     reporter_user = update.effective_user
     reported_user_id = context.user_data.get('reported_user_id')
 
-    db_session = SessionLocal()
+    db_session = context.db_session
     try:
-        reported_user = db_session.query(User).filter(User.id == reported_user_id).first()
+        reported_user = await db_session.scalar(select(User).where(User.id == reported_user_id))
         if not reported_user:
             await update.message.reply_text("Could not find the user you are trying to report.")
             return ConversationHandler.END
@@ -57,7 +58,6 @@ async def submit_report(update: Update, context: ContextTypes.DEFAULT_TYPE) -> i
         await update.message.reply_text("Thank you. Your report has been submitted and will be reviewed by an administrator.")
 
     finally:
-        db_session.close()
         context.user_data.pop('reported_user_id', None)
 
     return ConversationHandler.END
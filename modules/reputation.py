@@ -0,0 +1,35 @@
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
+
+from database import User, UserReputation
+
+
+async def record_reputation(db_session, user_id: int, **deltas):
+    """
+    Adds `deltas` (e.g. rating_sum=5, rating_count=1) to a user's reputation row,
+    creating it on first use. Runs in the caller's transaction, so the totals
+    commit together with the change they count.
+    """
+    stmt = insert(UserReputation).values(user_id=user_id, **deltas)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserReputation.user_id],
+        set_={name: getattr(UserReputation, name) + stmt.excluded[name] for name in deltas}
+    )
+    await db_session.execute(stmt)
+
+def empty_reputation(user_id: int) -> UserReputation:
+    """Zero totals for users with no reputation row yet. Never added to a session."""
+    return UserReputation(user_id=user_id, rating_sum=0, rating_count=0, jobs_completed=0, jobs_posted=0, total_earned=0.0)
+
+async def get_reputation(db_session, user_id: int) -> UserReputation:
+    return await db_session.get(UserReputation, user_id) or empty_reputation(user_id)
+
+async def get_profile(db_session, user_id: int):
+    """Returns (User, UserReputation) in one primary-key lookup, or None if the user doesn't exist."""
+    row = (await db_session.execute(
+        select(User, UserReputation).outerjoin(UserReputation, UserReputation.user_id == User.id).where(User.id == user_id)
+    )).first()
+    if row is None:
+        return None
+    user, reputation = row
+    return user, reputation or empty_reputation(user_id)
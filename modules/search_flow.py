@@ -0,0 +1,145 @@
+import re
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
+from telegram.ext import ContextTypes
+from sqlalchemy import text
+
+from .skill_resolver import skill_resolver
+
+RESULTS_PER_PAGE = 5
+# A shorter last word is only prefix-matched when the user ends it with '*';
+# one- and two-letter prefixes expand to most of the FTS vocabulary.
+MIN_PREFIX_LENGTH = 3
+
+# Only the newest SEARCH_CANDIDATES matches are ranked. Scoring every match of a
+# common word means computing bm25 for tens of thousands of rows on a large board.
+# The page says so when a search has more matches than that.
+SEARCH_CANDIDATES = 500
+
+# Title matches count ten times as much as description matches. One row past the
+# cap is fetched only to set `truncated`; being the oldest, it has the lowest id and
+# is left out of the ranking.
+SEARCH_SQL = """
+    WITH candidates AS (
+        SELECT jobs.id, jobs.title, jobs.budget, bm25(jobs_fts, 10.0, 1.0) AS score
+        FROM jobs_fts JOIN jobs ON jobs.id = jobs_fts.rowid
+        WHERE jobs_fts MATCH :match AND jobs.status = 'open'
+          AND (:min_budget IS NULL OR jobs.budget >= :min_budget)
+          AND (:max_budget IS NULL OR jobs.budget <= :max_budget)
+          AND (:skill_id IS NULL OR jobs.id IN (SELECT job_id FROM job_skills WHERE skill_id = :skill_id))
+        ORDER BY jobs_fts.rowid DESC
+        LIMIT :candidates + 1
+    )
+    , capped AS (
+        SELECT COUNT(*) > :candidates AS truncated, MIN(id) AS oldest_id FROM candidates
+    )
+    SELECT id, title, budget, truncated
+    FROM candidates, capped WHERE NOT truncated OR id > oldest_id
+    ORDER BY score, id DESC
+    LIMIT :limit OFFSET :offset
+"""
+
+USAGE = (
+    "**Search Jobs**\n\n"
+    "Usage: `/search <words> [min:<budget>] [max:<budget>] [skill:<name>]`\n"
+    "Example: `/search telegram bot min:50 skill:python_development`\n"
+    "The last word also matches as a prefix once it has 3 letters; end it with `*` to prefix-match a shorter one."
+)
+
+def parse_search(args):
+    """
+    Splits /search arguments into an FTS5 match expression and filters. Returns None if there
+    are no search words. A skill: filter that doesn't resolve is kept in 'unknown_skill'.
+    """
+    words, filters = [], {'min_budget': None, 'max_budget': None, 'skill_id': None, 'skill_name': None, 'unknown_skill': None}
+    prefix_requested = False
+    for arg in args:
+        key, _, value = arg.partition(':')
+        if value and key.lower() in ('min', 'max'):
+            try:
+                filters[f"{key.lower()}_budget"] = float(value)
+            except ValueError:
+                pass
+        elif value and key.lower() == 'skill':
+            entry, suggestions = skill_resolver.resolve(value.replace('_', ' '))
+            if entry:
+                filters['skill_id'], filters['skill_name'] = entry.id, entry.name
+            else:
+                filters['unknown_skill'] = (value, suggestions)
+        else:
+            arg_words = re.findall(r"\w+", arg)
+            if arg_words:
+                words.extend(arg_words)
+                prefix_requested = arg.endswith('*')
+    if not words:
+        return None
+    # Quote every word so user input can't inject FTS5 syntax
+    match = " ".join(f'"{word}"' for word in words)
+    if prefix_requested or len(words[-1]) >= MIN_PREFIX_LENGTH:
+        match += '*'
+    return {'match': match, 'words': " ".join(words), **filters}
+
+async def search_jobs(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handles /search: full-text search over open jobs, ranked by relevance."""
+    search = parse_search(context.args or [])
+    if not search:
+        await update.message.reply_text(USAGE, parse_mode='Markdown')
+        return
+    if search['unknown_skill']:
+        # Searching without the filter would pass off unfiltered results as filtered ones
+        name, suggestions = search['unknown_skill']
+        reply = f"Skill '{name}' was not found."
+        if suggestions:
+            reply += f" Did you mean: {', '.join(skill.name for skill in suggestions)}?"
+        await update.message.reply_text(reply)
+        return
+    context.user_data['job_search'] = search
+    page_text, markup = await render_search_page(context, search, 0)
+    await update.message.reply_text(page_text, reply_markup=markup, parse_mode='Markdown')
+
+async def search_page(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handles the Previous/Next buttons under a search result page."""
+    query = update.callback_query
+    await query.answer()
+    search = context.user_data.get('job_search')
+    if not search:
+        await query.edit_message_text("This search has expired. Please run /search again.")
+        return
+    page_text, markup = await render_search_page(context, search, int(query.data.split('_')[-1]))
+    await query.edit_message_text(page_text, reply_markup=markup, parse_mode='Markdown')
+
+async def render_search_page(context: ContextTypes.DEFAULT_TYPE, search: dict, offset: int):
+    params = {key: search[key] for key in ('match', 'min_budget', 'max_budget', 'skill_id')}
+    # Fetch one extra row to know whether there is a next page
+    rows = (await context.db_session.execute(
+        text(SEARCH_SQL), {**params, 'candidates': SEARCH_CANDIDATES, 'limit': RESULTS_PER_PAGE + 1, 'offset': offset}
+    )).all()
+    has_next = len(rows) > RESULTS_PER_PAGE
+    truncated = bool(rows) and bool(rows[0].truncated)
+    rows = rows[:RESULTS_PER_PAGE]
+
+    filters = []
+    if search['skill_name']:
+        filters.append(f"skill: {search['skill_name']}")
+    if search['min_budget'] is not None:
+        filters.append(f"min ${search['min_budget']:,.2f}")
+    if search['max_budget'] is not None:
+        filters.append(f"max ${search['max_budget']:,.2f}")
+    header = f"**Search:** {search['words']}" + (f" ({', '.join(filters)})" if filters else "")
+    if not rows:
+        return f"{header}\n\nNo open jobs match your search.", None
+
+    if truncated:
+        header += f"\n_Showing the newest {SEARCH_CANDIDATES} matches; add words or filters to narrow it down._"
+    lines = [header, ""]
+    keyboard = []
+    for number, (job_id, title, budget, _) in enumerate(rows, start=offset + 1):
+        lines.append(f"{number}. **{title}** - ${budget:,.2f}")
+        keyboard.append([InlineKeyboardButton(f"View #{number}: {title[:30]}", callback_data=f"view_specific_job_{job_id}")])
+    nav_row = []
+    if offset > 0:
+        nav_row.append(InlineKeyboardButton("Previous", callback_data=f"search_page_{max(0, offset - RESULTS_PER_PAGE)}"))
+    if has_next:
+        nav_row.append(InlineKeyboardButton("Next", callback_data=f"search_page_{offset + RESULTS_PER_PAGE}"))
+    if nav_row:
+        keyboard.append(nav_row)
+    return "\n".join(lines), InlineKeyboardMarkup(keyboard)
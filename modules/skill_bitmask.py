@@ -0,0 +1,107 @@
+import numpy as np
+
+WORD_BITS = 64
+
+if hasattr(np, 'bitwise_count'):
+    def popcount(words):
+        return np.bitwise_count(words)
+else:
+    # NumPy < 2.0: count bits a byte at a time through a lookup table
+    _BYTE_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+    def popcount(words):
+        as_bytes = words.view(np.uint8).reshape(words.shape + (8,))
+        return _BYTE_POPCOUNT[as_bytes].sum(axis=-1, dtype=np.uint8)
+
+
+class SkillBitmaskMatrix:
+    """
+    One packed skill bitmask per freelancer, stored as rows of uint64 words so a job's
+    overlap with every freelancer is a single vectorized AND + popcount. Each skill id
+    gets a bit the first time it is seen; the rows widen by a word whenever they run out.
+    """
+
+    def __init__(self, skill_ids=()):
+        self.bit_of = {}
+        self.masks = np.zeros((0, 1), dtype=np.uint64)
+        self.user_ids = np.zeros(0, dtype=np.int64)
+        self.row_of = {}
+        self.free_rows = []
+        for skill_id in sorted(skill_ids):
+            self._bit(skill_id)
+
+    @property
+    def words(self) -> int:
+        return self.masks.shape[1]
+
+    def _bit(self, skill_id: int) -> int:
+        bit = self.bit_of.get(skill_id)
+        if bit is None:
+            bit = self.bit_of[skill_id] = len(self.bit_of)
+            if bit >= self.words * WORD_BITS:
+                extra = np.zeros((self.masks.shape[0], 1), dtype=np.uint64)
+                self.masks = np.hstack([self.masks, extra])
+        return bit
+
+    def _row(self, user_id: int) -> int:
+        row = self.row_of.get(user_id)
+        if row is not None:
+            return row
+        if self.free_rows:
+            row = self.free_rows.pop()
+        else:
+            row = len(self.row_of) + len(self.free_rows)
+            if row >= self.masks.shape[0]:
+                # Grow geometrically so adding freelancers one by one stays cheap
+                capacity = max(64, self.masks.shape[0] * 2)
+                masks = np.zeros((capacity, self.words), dtype=np.uint64)
+                masks[:self.masks.shape[0]] = self.masks
+                user_ids = np.full(capacity, -1, dtype=np.int64)
+                user_ids[:self.user_ids.shape[0]] = self.user_ids
+                self.masks, self.user_ids = masks, user_ids
+        self.row_of[user_id] = row
+        self.user_ids[row] = user_id
+        return row
+
+    def _flip(self, user_id: int, skill_id: int, on: bool):
+        bit = self._bit(skill_id)
+        row = self._row(user_id)
+        word, mask = bit // WORD_BITS, np.uint64(1 << (bit % WORD_BITS))
+        if on:
+            self.masks[row, word] |= mask
+        else:
+            self.masks[row, word] &= ~mask
+
+    def set_skills(self, user_id: int, skill_ids):
+        row = self._row(user_id)
+        self.masks[row] = 0
+        for skill_id in skill_ids:
+            self._flip(user_id, skill_id, True)
+
+    def add_skill(self, user_id: int, skill_id: int):
+        self._flip(user_id, skill_id, True)
+
+    def remove_skill(self, user_id: int, skill_id: int):
+        self._flip(user_id, skill_id, False)
+
+    def remove_user(self, user_id: int):
+        row = self.row_of.pop(user_id, None)
+        if row is not None:
+            self.masks[row] = 0
+            self.user_ids[row] = -1
+            self.free_rows.append(row)
+
+    def mask_for(self, skill_ids):
+        """Packs `skill_ids` into a single row; skills no freelancer holds are left out."""
+        mask = np.zeros(self.words, dtype=np.uint64)
+        for skill_id in skill_ids:
+            bit = self.bit_of.get(skill_id)
+            if bit is not None:
+                mask[bit // WORD_BITS] |= np.uint64(1 << (bit % WORD_BITS))
+        return mask
+
+    def overlap(self, skill_ids):
+        """Returns (user ids, overlap counts) for every freelancer sharing at least one of `skill_ids`."""
+        counts = popcount(self.masks & self.mask_for(skill_ids)).sum(axis=1, dtype=np.int32)
+        rows = np.flatnonzero(counts)
+        return self.user_ids[rows], counts[rows]
@@ -0,0 +1,205 @@
+import functools
+import logging
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
+from telegram.ext import ContextTypes
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.sqlite import insert
+
+from config import SKILL_EDITOR_PAGE_SIZE
+from database import user_skills_table
+from .skill_registry import skill_registry
+from .skill_index import freelancer_index
+from .query_guard import query_budget
+
+logger = logging.getLogger(__name__)
+
+
+class SkillEditorKeyboards:
+    """
+    Every button of the skill editor, built once per catalog load: the category menu,
+    and for each category page an on/off pair per skill plus its navigation row.
+    Rendering a page for a freelancer just picks one button of each pair.
+    """
+
+    def __init__(self, page_size: int):
+        self.page_size = page_size
+        self.categories = []
+        self.category_menu = []
+        self.pages = []
+
+    def rebuild(self, entries):
+        self.categories = sorted(skill_registry.categories())
+        self.category_menu = [
+            [InlineKeyboardButton(f"{category} ({len(skill_registry.in_category(category))})", callback_data=f"skill_cat_{index}_0")]
+            for index, category in enumerate(self.categories)
+        ]
+        self.pages = []
+        for index, category in enumerate(self.categories):
+            skills = sorted(skill_registry.in_category(category), key=lambda entry: entry.name.casefold())
+            chunks = [skills[start:start + self.page_size] for start in range(0, len(skills), self.page_size)]
+            pages = []
+            for page, chunk in enumerate(chunks):
+                toggles = [
+                    (
+                        entry.id,
+                        InlineKeyboardButton(entry.name, callback_data=f"toggle_skill_{entry.id}_{index}_{page}"),
+                        InlineKeyboardButton(f"✔️ {entry.name}", callback_data=f"toggle_skill_{entry.id}_{index}_{page}"),
+                    )
+                    for entry in chunk
+                ]
+                nav_row = []
+                if page > 0:
+                    nav_row.append(InlineKeyboardButton("Previous", callback_data=f"skill_cat_{index}_{page - 1}"))
+                if page < len(chunks) - 1:
+                    nav_row.append(InlineKeyboardButton("Next", callback_data=f"skill_cat_{index}_{page + 1}"))
+                pages.append((toggles, nav_row))
+            self.pages.append(pages)
+
+    def page(self, category_index: int, page: int):
+        """Returns (toggles, nav_row) for a page, or None if the catalog has changed under it."""
+        if 0 <= category_index < len(self.pages) and 0 <= page < len(self.pages[category_index]):
+            return self.pages[category_index][page]
+        return None
+
+
+skill_keyboards = SkillEditorKeyboards(SKILL_EDITOR_PAGE_SIZE)
+skill_registry.on_reload(skill_keyboards.rebuild)
+
+SAVE_ROW = [
+    InlineKeyboardButton("Save", callback_data="skill_save"),
+    InlineKeyboardButton("Discard", callback_data="skill_discard"),
+]
+BACK_TO_CATEGORIES_ROW = [InlineKeyboardButton("Back to Categories", callback_data="skill_categories")]
+
+async def current_skills(db_session, user_id: int) -> set:
+    """The freelancer's saved skills, from the in-memory index when they are in it."""
+    skills = freelancer_index.skills_of.get(user_id)
+    if skills is not None:
+        return set(skills)
+    return set((await db_session.scalars(
+        select(user_skills_table.c.skill_id).where(user_skills_table.c.user_id == user_id)
+    )).all())
+
+def staged_summary(staged: dict) -> str:
+    text = f"{len(staged['selected'])} skills selected."
+    if staged['selected'] != staged['saved']:
+        text += " You have unsaved changes; tap Save to apply them."
+    return text
+
+async def staged_skills(context: ContextTypes.DEFAULT_TYPE) -> dict:
+    """The editor's staged selection, started from the saved skills if there isn't one."""
+    staged = context.user_data.get('skill_editor')
+    if staged is None:
+        saved = await current_skills(context.db_session, context.current_user.id)
+        staged = context.user_data['skill_editor'] = {'saved': saved, 'selected': set(saved)}
+    return staged
+
+@query_budget(1)
+async def edit_skills_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Opens the skill editor on the category list, staging a fresh copy of the saved skills."""
+    context.user_data.pop('skill_editor', None)
+    await show_skill_categories(update, context)
+
+@query_budget(1)
+async def show_skill_categories(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    query = update.callback_query
+    await query.answer()
+    staged = await staged_skills(context)
+    keyboard = skill_keyboards.category_menu + [SAVE_ROW]
+    await query.edit_message_text(
+        f"Choose a category to add or remove skills.\n\n{staged_summary(staged)}",
+        reply_markup=InlineKeyboardMarkup(keyboard)
+    )
+
+async def render_category_page(query, staged: dict, category_index: int, page: int):
+    found = skill_keyboards.page(category_index, page)
+    if found is None:
+        await query.edit_message_text(
+            "The skill catalog has changed. Please pick a category again.",
+            reply_markup=InlineKeyboardMarkup(skill_keyboards.category_menu + [SAVE_ROW])
+        )
+        return
+    toggles, nav_row = found
+    keyboard = [[on if skill_id in staged['selected'] else off] for skill_id, off, on in toggles]
+    if nav_row:
+        keyboard.append(nav_row)
+    keyboard.append(BACK_TO_CATEGORIES_ROW)
+    keyboard.append(SAVE_ROW)
+    page_count = len(skill_keyboards.pages[category_index])
+    await query.edit_message_text(
+        f"{skill_keyboards.categories[category_index]} (page {page + 1} of {page_count})\n\n{staged_summary(staged)}",
+        reply_markup=InlineKeyboardMarkup(keyboard)
+    )
+
+@query_budget(1)
+async def show_skill_category(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Shows one page of a category's skills. callback_data: skill_cat_<category index>_<page>."""
+    query = update.callback_query
+    await query.answer()
+    _, _, category_index, page = query.data.split('_')
+    await render_category_page(query, await staged_skills(context), int(category_index), int(page))
+
+@query_budget(1)
+async def toggle_skill(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Flips a skill in the staged selection only; nothing is written until Save."""
+    query = update.callback_query
+    parts = query.data.split('_')
+    if len(parts) != 5:
+        # A button from the old single-list editor
+        await show_skill_categories(update, context)
+        return
+    _, _, skill_id, category_index, page = parts
+    skill_id = int(skill_id)
+    staged = await staged_skills(context)
+    entry = skill_registry.get(skill_id)
+    if skill_id in staged['selected']:
+        staged['selected'].discard(skill_id)
+        await query.answer(f"Removed '{entry.name}'" if entry else "Removed")
+    else:
+        staged['selected'].add(skill_id)
+        await query.answer(f"Added '{entry.name}'" if entry else "Added")
+    await render_category_page(query, staged, int(category_index), int(page))
+
+@query_budget(3)
+async def save_skills(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Writes the staged selection in one transaction, then updates the in-memory skill index."""
+    query = update.callback_query
+    staged = await staged_skills(context)
+    db_session = context.db_session
+    user_id = context.current_user.id
+    saved = await current_skills(db_session, user_id)
+    # Skills dropped from the catalog since they were staged can't be saved
+    selected = {skill_id for skill_id in staged['selected'] if skill_registry.get(skill_id)}
+    added, removed = selected - saved, saved - selected
+    if removed:
+        await db_session.execute(delete(user_skills_table).where(
+            user_skills_table.c.user_id == user_id, user_skills_table.c.skill_id.in_(removed)
+        ))
+    if added:
+        await db_session.execute(
+            insert(user_skills_table).on_conflict_do_nothing(),
+            [{'user_id': user_id, 'skill_id': skill_id} for skill_id in added]
+        )
+    for skill_id in removed:
+        context.after_commit.append(functools.partial(freelancer_index.remove_skill, user_id, skill_id))
+    for skill_id in added:
+        context.after_commit.append(functools.partial(freelancer_index.add_skill, user_id, skill_id))
+    context.user_data.pop('skill_editor', None)
+    if added or removed:
+        logger.info(f"User {user_id} saved skills: +{len(added)} -{len(removed)}")
+    context.after_commit.append(functools.partial(query.answer, f"Saved: {len(added)} added, {len(removed)} removed."))
+    context.after_commit.append(functools.partial(
+        query.edit_message_text,
+        f"Your skills have been saved. You now have {len(selected)} skills.",
+        reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("Back to Profile", callback_data="freelancer_profile")]])
+    ))
+
+async def discard_skills(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Drops the staged selection without writing anything."""
+    query = update.callback_query
+    await query.answer("Changes discarded.")
+    context.user_data.pop('skill_editor', None)
+    await query.edit_message_text(
+        "Your skill changes were discarded.",
+        reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("Back to Profile", callback_data="freelancer_profile")]])
+    )
@@ -0,0 +1,87 @@
+from database import SessionLocal, User, user_skills_table
+from .skill_bitmask import SkillBitmaskMatrix
+
+
+class FreelancerSkillIndex:
+    """
+    Inverted index from skill_id to the ids of freelancers who have that skill.
+    Built once at startup and kept current by the skill editor's Save and role selection,
+    so job matching is a union of in-memory sets instead of an EXISTS subquery.
+    Packed skill bitmasks are kept alongside for vectorized overlap scoring.
+    """
+
+    def __init__(self):
+        self.by_skill = {}
+        self.skills_of = {}
+        self.telegram_ids = {}
+        self.bitmasks = SkillBitmaskMatrix()
+
+    def set_freelancer(self, user_id: int, telegram_id: int, skill_ids):
+        self.remove_freelancer(user_id)
+        self.telegram_ids[user_id] = telegram_id
+        self.skills_of[user_id] = set()
+        self.bitmasks.set_skills(user_id, ())
+        for skill_id in skill_ids:
+            self.add_skill(user_id, skill_id)
+
+    def remove_freelancer(self, user_id: int):
+        for skill_id in self.skills_of.pop(user_id, ()):
+            self._discard(skill_id, user_id)
+        self.telegram_ids.pop(user_id, None)
+        self.bitmasks.remove_user(user_id)
+
+    def add_skill(self, user_id: int, skill_id: int):
+        if user_id not in self.skills_of:
+            return
+        self.skills_of[user_id].add(skill_id)
+        self.by_skill.setdefault(skill_id, set()).add(user_id)
+        self.bitmasks.add_skill(user_id, skill_id)
+
+    def remove_skill(self, user_id: int, skill_id: int):
+        if user_id not in self.skills_of:
+            return
+        self.skills_of[user_id].discard(skill_id)
+        self._discard(skill_id, user_id)
+        self.bitmasks.remove_skill(user_id, skill_id)
+
+    def _discard(self, skill_id: int, user_id: int):
+        holders = self.by_skill.get(skill_id)
+        if holders is not None:
+            holders.discard(user_id)
+            if not holders:
+                del self.by_skill[skill_id]
+
+    def overlap_counts(self, skill_ids) -> dict:
+        """Returns {freelancer id: number of `skill_ids` they hold} for every freelancer holding any."""
+        user_ids, counts = self.bitmasks.overlap(skill_ids)
+        return dict(zip(user_ids.tolist(), counts.tolist()))
+
+    def match(self, skill_ids) -> set:
+        """Returns the ids of freelancers holding at least one of `skill_ids`."""
+        matched = set()
+        for skill_id in skill_ids:
+            matched |= self.by_skill.get(skill_id, set())
+        return matched
+
+
+freelancer_index = FreelancerSkillIndex()
+
+def load_freelancer_index():
+    """Builds the index from the database. Called once at startup."""
+    db_session = SessionLocal()
+    try:
+        freelancers = db_session.query(User.id, User.telegram_id).filter(User.role == 'freelancer').all()
+        skill_rows = db_session.query(user_skills_table.c.user_id, user_skills_table.c.skill_id).join(
+            User, User.id == user_skills_table.c.user_id
+        ).filter(User.role == 'freelancer').all()
+    finally:
+        db_session.close()
+
+    skills_by_user = {}
+    for user_id, skill_id in skill_rows:
+        skills_by_user.setdefault(user_id, set()).add(skill_id)
+    index = FreelancerSkillIndex()
+    index.bitmasks = SkillBitmaskMatrix({skill_id for _, skill_id in skill_rows})
+    for user_id, telegram_id in freelancers:
+        index.set_freelancer(user_id, telegram_id, skills_by_user.get(user_id, ()))
+    freelancer_index.__dict__.update(index.__dict__)
@@ -0,0 +1,79 @@
+import logging
+from typing import NamedTuple, Optional
+
+from sqlalchemy import select
+
+from database import SessionLocal, Skill
+
+logger = logging.getLogger(__name__)
+
+
+class SkillEntry(NamedTuple):
+    id: int
+    name: str
+    category: Optional[str]
+
+
+class SkillRegistry:
+    """
+    In-memory copy of the skill catalog. The catalog only changes when populate_skill.py
+    runs, so it is loaded once at startup and reloaded explicitly after that.
+    """
+
+    def __init__(self):
+        self.by_id = {}
+        self.by_name = {}
+        self.by_category = {}
+        self._reload_listeners = []
+
+    def on_reload(self, listener):
+        """Registers a callable that receives the full entry list every time the catalog (re)loads."""
+        self._reload_listeners.append(listener)
+        if self.by_id:
+            listener(self.all())
+
+    def load(self, rows):
+        by_id, by_name, by_category = {}, {}, {}
+        for skill_id, name, category in rows:
+            entry = SkillEntry(skill_id, name, category)
+            by_id[skill_id] = entry
+            by_name[name.casefold()] = entry
+            by_category.setdefault(category or "Other", []).append(entry)
+        # Swap in whole dicts so readers never see a half-built catalog
+        self.by_id, self.by_name, self.by_category = by_id, by_name, by_category
+        for listener in self._reload_listeners:
+            listener(self.all())
+        logger.info(f"Skill registry loaded {len(by_id)} skills in {len(by_category)} categories.")
+
+    def get(self, skill_id: int) -> Optional[SkillEntry]:
+        return self.by_id.get(skill_id)
+
+    def find_by_name(self, name: str) -> Optional[SkillEntry]:
+        """Case-insensitive exact name lookup."""
+        return self.by_name.get(name.strip().casefold())
+
+    def all(self):
+        return list(self.by_id.values())
+
+    def categories(self):
+        return list(self.by_category)
+
+    def in_category(self, category: str):
+        return self.by_category.get(category, [])
+
+
+skill_registry = SkillRegistry()
+
+_catalog_query = select(Skill.id, Skill.name, Skill.category).order_by(Skill.id)
+
+def load_skill_registry():
+    """Loads the catalog synchronously; used at startup before the event loop runs."""
+    db_session = SessionLocal()
+    try:
+        skill_registry.load(db_session.execute(_catalog_query).all())
+    finally:
+        db_session.close()
+
+async def reload_skill_registry(db_session):
+    """Reloads the catalog from inside a running handler, e.g. after populate_skill.py has run."""
+    skill_registry.load((await db_session.execute(_catalog_query)).all())
@@ -0,0 +1,246 @@
+import heapq
+import re
+from bisect import bisect_left
+from collections import Counter
+from itertools import islice
+
+from .skill_registry import skill_registry
+
+# Common shorthand clients type, mapped to catalog names
+SKILL_ALIASES = {
+    'js': 'JavaScript Development',
+    'javascript': 'JavaScript Development',
+    'react': 'React / Next.js',
+    'nextjs': 'React / Next.js',
+    'node': 'Node.js Development',
+    'nodejs': 'Node.js Development',
+    'fullstack': 'Full-Stack Development',
+    'full stack': 'Full-Stack Development',
+    'telegram bot': 'Telegram Bot Development',
+    'ios': 'Mobile App Development (iOS/Android)',
+    'android': 'Mobile App Development (iOS/Android)',
+    'mobile': 'Mobile App Development (iOS/Android)',
+    'web3': 'Blockchain & Web3',
+    'solidity': 'Smart Contract Development',
+    'go': 'Go (Golang) Development',
+    'golang': 'Go (Golang) Development',
+    'ai': 'AI/ML Engineering',
+    'ml': 'Machine Learning',
+    'genai': 'Generative AI',
+    'llm': 'Generative AI',
+    'nlp': 'Natural Language Processing (NLP)',
+    'aws': 'Cloud Computing (AWS/Azure/GCP)',
+    'azure': 'Cloud Computing (AWS/Azure/GCP)',
+    'gcp': 'Cloud Computing (AWS/Azure/GCP)',
+    'docker': 'Containerization (Docker/Kubernetes)',
+    'kubernetes': 'Containerization (Docker/Kubernetes)',
+    'k8s': 'Containerization (Docker/Kubernetes)',
+    'ci/cd': 'CI/CD Implementation',
+    'cicd': 'CI/CD Implementation',
+    'terraform': 'Infrastructure as Code (IaC)',
+    'iac': 'Infrastructure as Code (IaC)',
+    'pentesting': 'Ethical Hacking',
+    'ux': 'UI/UX Design',
+    'ui': 'UI/UX Design',
+    'figma': 'UI/UX Design',
+    'seo': 'SEO Specialist',
+    'smm': 'Social Media Marketing',
+    'ppc': 'Ad Campaign Management',
+    'va': 'Virtual Assistant',
+    'pm': 'Project Management',
+}
+
+# Score bands for each kind of match; the best band a skill reaches is its score
+EXACT_SCORE = 1.0
+ALIAS_SCORE = 0.95
+TOKEN_BASE_SCORE = 0.6
+TYPO_BASE_SCORE = 0.5
+TRIGRAM_WEIGHT = 0.7
+MIN_TRIGRAM_SIMILARITY = 0.3
+
+# Only exact names and aliases are accepted without asking; every other band
+# (prefix, typo, trigram) is offered back as suggestions.
+CONFIDENT_SCORE = ALIAS_SCORE
+MIN_SCORE = 0.35
+
+# Caps that keep a lookup well under a millisecond however common the query's words are
+MAX_PREFIX_EXPANSIONS = 32
+MAX_POSTINGS_SCANNED = 1000
+TRIGRAM_RECHECK = 50
+
+
+def normalize(text: str) -> str:
+    return " ".join(re.sub(r"[^\w/+#.]+", " ", text.casefold()).split())
+
+def tokenize(text: str):
+    return re.findall(r"\w+", text.casefold())
+
+def trigrams(text: str):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def single_deletes(token: str):
+    return {token[:i] + token[i + 1:] for i in range(len(token))}
+
+
+class SkillResolver:
+    """
+    Resolves free-text skill names against the catalog entirely in memory.
+    Tries, in order of confidence: exact name, alias, token prefix, one-edit typo
+    correction (symmetric-delete index) and character-trigram similarity. Each band
+    only runs when the ones before it found nothing.
+    """
+
+    def __init__(self):
+        self.rebuild([])
+
+    def rebuild(self, entries):
+        self.entries = {entry.id: entry for entry in entries}
+        self.exact = {normalize(entry.name): entry.id for entry in entries}
+        name_ids = {entry.name.casefold(): entry.id for entry in entries}
+        self.aliases = {
+            normalize(alias): name_ids[name.casefold()]
+            for alias, name in SKILL_ALIASES.items() if name.casefold() in name_ids
+        }
+        self.name_tokens = {entry.id: tokenize(entry.name) for entry in entries}
+        # Shorter names rank first within a band, so postings are kept in that order
+        ranked = sorted(entries, key=lambda entry: (len(self.name_tokens[entry.id]), entry.name, entry.id))
+        self.rank = {entry.id: position for position, entry in enumerate(ranked)}
+
+        token_postings = {}
+        for entry in ranked:
+            for token in dict.fromkeys(self.name_tokens[entry.id]):
+                token_postings.setdefault(token, []).append(entry.id)
+        self.token_postings = token_postings
+        self.sorted_tokens = sorted(token_postings)
+
+        deletes = {}
+        for token in token_postings:
+            if len(token) >= 4:
+                for variant in single_deletes(token) | {token}:
+                    deletes.setdefault(variant, set()).add(token)
+        self.deletes = deletes
+
+        trigram_postings = {}
+        self.trigram_sets = {}
+        for entry in entries:
+            grams = trigrams(normalize(entry.name))
+            self.trigram_sets[entry.id] = grams
+            for gram in grams:
+                trigram_postings.setdefault(gram, []).append(entry.id)
+        self.trigram_postings = trigram_postings
+
+    def _prefix_tokens(self, prefix: str):
+        start = bisect_left(self.sorted_tokens, prefix)
+        for token in self.sorted_tokens[start:]:
+            if not token.startswith(prefix):
+                break
+            yield token
+
+    def _typo_tokens(self, token: str):
+        if len(token) < 4:
+            return set()
+        corrected = set()
+        for variant in single_deletes(token) | {token}:
+            corrected |= self.deletes.get(variant, set())
+        return corrected
+
+    def _token_matches(self, query_tokens, expand, limit: int):
+        """
+        Returns {skill_id: coverage} for the best `limit` skills whose name tokens cover
+        every query token, using `expand` to map a query token to name tokens. Walks the
+        most selective query token's postings in rank order and stops at `limit` matches.
+        """
+        expansions = [set(expand(token)) for token in query_tokens]
+        if not all(expansions):
+            return {}
+        pivot = min(expansions, key=lambda names: sum(len(self.token_postings[name]) for name in names))
+        others = [names for names in expansions if names is not pivot]
+        postings = heapq.merge(*(self.token_postings[name] for name in pivot), key=self.rank.__getitem__)
+        matched = {}
+        for skill_id in islice(postings, MAX_POSTINGS_SCANNED):
+            if skill_id in matched:
+                continue
+            name_tokens = self.name_tokens[skill_id]
+            if all(not names.isdisjoint(name_tokens) for names in others):
+                matched[skill_id] = min(len(query_tokens), len(name_tokens)) / len(name_tokens)
+                if len(matched) >= limit:
+                    break
+        return matched
+
+    def _trigram_matches(self, query: str):
+        """
+        Returns {skill_id: similarity} by trigram Jaccard similarity. Candidates come from
+        the rarest query trigrams' postings (at most MAX_POSTINGS_SCANNED ids); only the
+        TRIGRAM_RECHECK most promising get an exact similarity.
+        """
+        query_grams = trigrams(query)
+        shared = Counter()
+        budget = MAX_POSTINGS_SCANNED
+        for gram in sorted(query_grams, key=lambda gram: len(self.trigram_postings.get(gram, ()))):
+            postings = self.trigram_postings.get(gram)
+            if not postings:
+                continue
+            shared.update(postings[:budget])
+            budget -= len(postings)
+            if budget <= 0:
+                break
+        similarities = {}
+        for skill_id, _ in shared.most_common(TRIGRAM_RECHECK):
+            grams = self.trigram_sets[skill_id]
+            common = len(query_grams & grams)
+            similarities[skill_id] = common / (len(query_grams) + len(grams) - common)
+        return similarities
+
+    def candidates(self, text: str, limit: int = 3):
+        """Returns up to `limit` (SkillEntry, score) pairs, best first."""
+        query = normalize(text)
+        if not query:
+            return []
+        scores = {}
+
+        def offer(skill_id, score):
+            if score > scores.get(skill_id, 0):
+                scores[skill_id] = score
+
+        if query in self.exact:
+            return [(self.entries[self.exact[query]], EXACT_SCORE)]
+        if query in self.aliases:
+            return [(self.entries[self.aliases[query]], ALIAS_SCORE)]
+
+        query_tokens = tokenize(query)
+        if query_tokens:
+            prefix_expand = lambda token: islice(self._prefix_tokens(token), MAX_PREFIX_EXPANSIONS)
+            for skill_id, coverage in self._token_matches(query_tokens, prefix_expand, limit).items():
+                offer(skill_id, TOKEN_BASE_SCORE + 0.3 * coverage)
+            if not scores:
+                for skill_id, coverage in self._token_matches(query_tokens, self._typo_tokens, limit).items():
+                    offer(skill_id, TYPO_BASE_SCORE + 0.3 * coverage)
+
+        if not scores:
+            for skill_id, similarity in self._trigram_matches(query).items():
+                if similarity >= MIN_TRIGRAM_SIMILARITY:
+                    offer(skill_id, TRIGRAM_WEIGHT * similarity)
+
+        ranked = sorted(
+            ((self.entries[skill_id], score) for skill_id, score in scores.items() if score >= MIN_SCORE),
+            key=lambda pair: (-pair[1], pair[0].name)
+        )
+        return ranked[:limit]
+
+    def resolve(self, text: str, limit: int = 3):
+        """
+        Returns (entry, suggestions). `entry` is set only for an exact name or alias match;
+        otherwise `suggestions` are the ranked alternatives to offer instead.
+        """
+        ranked = self.candidates(text, limit)
+        if not ranked:
+            return None, []
+        top_entry, top_score = ranked[0]
+        if top_score >= CONFIDENT_SCORE:
+            return top_entry, []
+        return None, [entry for entry, _ in ranked]
+
+
+skill_resolver = SkillResolver()
+skill_registry.on_reload(skill_resolver.rebuild)
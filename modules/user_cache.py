@@ -0,0 +1,77 @@
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from sqlalchemy import select
+
+from database import User
+from config import USER_CACHE_SIZE, USER_CACHE_TTL
+
+
+class CachedUser(NamedTuple):
+    """The handful of User fields every handler needs, detached from any session."""
+    id: int
+    telegram_id: int
+    role: Optional[str]
+    status: str
+    first_name: Optional[str]
+    username: Optional[str]
+
+
+class UserCache:
+    """Bounded LRU cache of CachedUser records keyed by telegram_id, with a TTL per entry."""
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, telegram_id: int) -> Optional[CachedUser]:
+        entry = self._entries.get(telegram_id)
+        if entry is None or entry[0] < time.monotonic():
+            self._entries.pop(telegram_id, None)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(telegram_id)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, user: User) -> CachedUser:
+        record = CachedUser(user.id, user.telegram_id, user.role, user.status, user.first_name, user.username)
+        self._entries[user.telegram_id] = (time.monotonic() + self.ttl, record)
+        self._entries.move_to_end(user.telegram_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return record
+
+    def invalidate(self, telegram_id: int) -> None:
+        self._entries.pop(telegram_id, None)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+
+user_cache = UserCache(USER_CACHE_SIZE, USER_CACHE_TTL)
+
+
+async def get_cached_user(db_session, telegram_id: int) -> Optional[CachedUser]:
+    """Returns the caller's CachedUser, loading it from the database on a cache miss."""
+    record = user_cache.get(telegram_id)
+    if record is not None:
+        return record
+    row = (await db_session.execute(
+        select(User.id, User.telegram_id, User.role, User.status, User.first_name, User.username)
+        .where(User.telegram_id == telegram_id)
+    )).first()
+    if row is None:
+        return None
+    return user_cache.put(row)
@@ -1,103 +1,67 @@
-# To be placed in: freelancer_bot/populate_skills.py
+import argparse
+import json
+import os
 
-from database import SessionLocal, Skill
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
 
-def populate_skills():
-    """Adds a predefined list of skills to the database if they don't already exist."""
-    
-    db_session = SessionLocal()
-    
-    skill_list = [
-        # Development & Engineering
-        {'name': 'Python Development', 'category': 'Development & Engineering'},
-        {'name': 'JavaScript Development', 'category': 'Development & Engineering'},
-        {'name': 'React / Next.js', 'category': 'Development & Engineering'},
-        {'name': 'Node.js Development', 'category': 'Development & Engineering'},
-        {'name': 'Full-Stack Development', 'category': 'Development & Engineering'},
-        {'name': 'Telegram Bot Development', 'category': 'Development & Engineering'},
-        {'name': 'Mobile App Development (iOS/Android)', 'category': 'Development & Engineering'},
-        {'name': 'Software Development', 'category': 'Development & Engineering'},
-        {'name': 'Web Development', 'category': 'Development & Engineering'},
-        {'name': 'Ethical Hacking', 'category': 'Development & Engineering'},
-        {'name': 'Smart Contract Development', 'category': 'Development & Engineering'},
-        {'name': 'Blockchain & Web3', 'category': 'Development & Engineering'},
-        {'name': 'Game Development', 'category': 'Development & Engineering'},
-        {'name': 'Go (Golang) Development', 'category': 'Development & Engineering'},
+from database import engine, Skill
 
-        # AI & Data Science
-        {'name': 'AI/ML Engineering', 'category': 'AI & Data Science'},
-        {'name': 'Data Analysis', 'category': 'AI & Data Science'},
-        {'name': 'Data Engineering', 'category': 'AI & Data Science'},
-        {'name': 'Data Science', 'category': 'AI & Data Science'},
-        {'name': 'Generative AI', 'category': 'AI & Data Science'},
-        {'name': 'Machine Learning', 'category': 'AI & Data Science'},
-        {'name': 'Prompt Engineering', 'category': 'AI & Data Science'},
-        {'name': 'Data Visualization', 'category': 'AI & Data Science'},
-        {'name': 'Natural Language Processing (NLP)', 'category': 'AI & Data Science'},
+SKILLS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'skills.json')
 
-        # Cloud & DevOps
-        {'name': 'Cloud Computing (AWS/Azure/GCP)', 'category': 'Cloud & DevOps'},
-        {'name': 'Cloud Architecture', 'category': 'Cloud & DevOps'},
-        {'name': 'DevOps Engineering', 'category': 'Cloud & DevOps'},
-        {'name': 'Containerization (Docker/Kubernetes)', 'category': 'Cloud & DevOps'},
-        {'name': 'CI/CD Implementation', 'category': 'Cloud & DevOps'},
-        {'name': 'Infrastructure as Code (IaC)', 'category': 'Cloud & DevOps'},
+def load_taxonomy(path=SKILLS_FILE):
+    """Reads the versioned skill taxonomy file. Returns (version, [{'name', 'category'}, ...])."""
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    skills = {}
+    for skill in data['skills']:
+        # Later entries win if the file lists a name twice
+        skills[skill['name']] = {'name': skill['name'], 'category': skill.get('category')}
+    return data['version'], list(skills.values())
 
-        # Cybersecurity
-        {'name': 'Cybersecurity Analysis', 'category': 'Cybersecurity'},
-        {'name': 'Network Security', 'category': 'Cybersecurity'},
-        {'name': 'Cloud Security', 'category': 'Cybersecurity'},
-        {'name': 'Incident Response', 'category': 'Cybersecurity'},
+def diff_taxonomy(conn, skill_list):
+    """Compares the taxonomy against the skills table. Returns (added, changed) lists."""
+    existing = dict(conn.execute(select(Skill.name, Skill.category)).all())
+    added = [skill for skill in skill_list if skill['name'] not in existing]
+    changed = [
+        (skill, existing[skill['name']]) for skill in skill_list
+        if skill['name'] in existing and existing[skill['name']] != skill['category']
+    ]
+    return added, changed
 
-        # Design & Product
-        {'name': 'UI/UX Design', 'category': 'Design & Product'},
-        {'name': 'Graphic Design', 'category': 'Design & Product'},
-        {'name': 'Product Management', 'category': 'Design & Product'},
-        {'name': 'User Research', 'category': 'Design & Product'},
-        {'name': 'AR/VR Development', 'category': 'Design & Product'},
-        {'name': 'Motion Graphics', 'category': 'Design & Product'},
-        
-        # Writing & Marketing
-        {'name': 'Copywriting', 'category': 'Writing & Marketing'},
-        {'name': 'Content Creation', 'category': 'Writing & Marketing'},
-        {'name': 'Digital Marketing', 'category': 'Writing & Marketing'},
-        {'name': 'SEO Specialist', 'category': 'Writing & Marketing'},
-        {'name': 'Social Media Marketing', 'category': 'Writing & Marketing'},
-        {'name': 'Technical Writing', 'category': 'Writing & Marketing'},
-        {'name': 'Ad Campaign Management', 'category': 'Writing & Marketing'},
+def populate_skills(path=SKILLS_FILE, dry_run=False):
+    """
+    Upserts the taxonomy into the skills table in a single transaction.
+    Safe to run on every deploy: existing names only get their category updated when it changed.
+    """
+    version, skill_list = load_taxonomy(path)
+    print(f"Populating skills from taxonomy v{version} ({len(skill_list)} skills)...")
 
-        # Admin & Business Support
-        {'name': 'Project Management', 'category': 'Admin & Business Support'},
-        {'name': 'Virtual Assistant', 'category': 'Admin & Business Support'},
-        {'name': 'Community Management', 'category': 'Admin & Business Support'},
-        {'name': 'Customer Support', 'category': 'Admin & Business Support'},
-        {'name': 'Translation', 'category': 'Admin & Business Support'},
-        {'name': 'Business Analysis', 'category': 'Admin & Business Support'},
-        {'name': 'Financial Management', 'category': 'Admin & Business Support'},
-    ]
-    
-    print("Populating skills...")
-    
-    try:
-        for skill_data in skill_list:
-            # Check if the skill already exists
-            exists = db_session.query(Skill).filter(Skill.name == skill_data['name']).first()
-            if not exists:
-                new_skill = Skill(name=skill_data['name'], category=skill_data['category'])
-                db_session.add(new_skill)
-                print(f"  - Added '{skill_data['name']}' under '{skill_data['category']}'")
-        
-        db_session.commit()
-        print("Skills populated successfully.")
-        
-    except Exception as e:
-        print(f"An error occurred: {e}")
-        db_session.rollback()
-        
-    finally:
-        db_session.close()
+    with engine.begin() as conn:
+        added, changed = diff_taxonomy(conn, skill_list)
+        for skill in added:
+            print(f"  + '{skill['name']}' under '{skill['category']}'")
+        for skill, old_category in changed:
+            print(f"  ~ '{skill['name']}': '{old_category}' -> '{skill['category']}'")
 
-if __name__ == '__main__':
-    populate_skills()
+        if dry_run:
+            print(f"Dry run: {len(added)} to add, {len(changed)} to update. No changes written.")
+            return
 
+        stmt = insert(Skill.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Skill.name],
+            set_={'category': stmt.excluded.category},
+            where=Skill.category.is_distinct_from(stmt.excluded.category)
+        )
+        if skill_list:
+            conn.execute(stmt, skill_list)
 
+    print(f"Skills populated successfully: {len(added)} added, {len(changed)} updated.")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Seed the skills table from the taxonomy file.")
+    parser.add_argument('--file', default=SKILLS_FILE, help="Path to the taxonomy JSON file.")
+    parser.add_argument('--dry-run', action='store_true', help="Show what would change without writing.")
+    args = parser.parse_args()
+    populate_skills(args.file, dry_run=args.dry_run)
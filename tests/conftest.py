@@ -0,0 +1,121 @@
+import asyncio
+import os
+import sys
+import tempfile
+import types
+
+# Point the app at a throwaway database before config is imported anywhere
+os.environ["DATABASE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="freelancer_bot_tests_"), "test.db")
+os.environ.setdefault("ADMIN_ID", "999")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import database
+import populate_skill
+from database import async_engine
+
+
+@pytest.fixture(scope="session")
+def db():
+    """Creates the schema, indexes and skill catalog once for the whole test run."""
+    database.init_db()
+    populate_skill.populate_skills()
+    return database
+
+
+class Obj(types.SimpleNamespace):
+    pass
+
+
+class FakeBot:
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.sent.append((chat_id, text))
+
+
+class FakeJobQueue:
+    def __init__(self):
+        self.scheduled = []
+
+    def run_once(self, callback, when, data=None, name=None):
+        self.scheduled.append(name)
+
+    def get_jobs_by_name(self, name):
+        return []
+
+
+class FakeQuery:
+    def __init__(self, data, telegram_id):
+        self.data = data
+        self.from_user = Obj(id=telegram_id, first_name=f"user{telegram_id}", username=f"user{telegram_id}")
+        self.edits = []
+
+    async def answer(self, *args, **kwargs):
+        pass
+
+    async def edit_message_text(self, text=None, reply_markup=None, **kwargs):
+        buttons = [button.text for row in reply_markup.inline_keyboard for button in row] if reply_markup else []
+        self.edits.append("\n".join([text, *buttons]))
+
+
+def callback_update(data, telegram_id):
+    query = FakeQuery(data, telegram_id)
+    return Obj(callback_query=query, message=None, effective_user=query.from_user, effective_message=None)
+
+
+class FakeMessage:
+    def __init__(self, text, telegram_id):
+        self.text = text
+        self.chat_id = telegram_id
+        self.replies = []
+
+    async def reply_text(self, text, reply_markup=None, **kwargs):
+        self.replies.append(text)
+
+
+def message_update(text, telegram_id):
+    message = FakeMessage(text, telegram_id)
+    user = Obj(id=telegram_id, first_name=f"user{telegram_id}", username=f"user{telegram_id}")
+    return Obj(callback_query=None, message=message, effective_user=user, effective_message=message)
+
+
+def run_update(handler, update, user_data):
+    import bot
+    context = Obj(bot=FakeBot(), user_data=user_data if user_data is not None else {}, bot_data={}, job_queue=FakeJobQueue())
+
+    async def run():
+        try:
+            await bot.unit_of_work(handler)(update, context)
+        finally:
+            await async_engine.dispose()
+
+    asyncio.run(run())
+
+
+def drive_callback(handler, data, telegram_id, user_data=None):
+    """Runs one callback-query update through unit_of_work, the way the application would."""
+    update = callback_update(data, telegram_id)
+    run_update(handler, update, user_data)
+    return update.callback_query.edits[-1]
+
+
+def drive_message(handler, text, telegram_id, user_data=None):
+    """Runs one text-message update through unit_of_work; returns the last reply."""
+    update = message_update(text, telegram_id)
+    run_update(handler, update, user_data)
+    return update.message.replies[-1]
+
+
+@pytest.fixture
+def drive():
+    """Runs a handler for one callback-query update; returns the last text it showed."""
+    return drive_callback
+
+
+@pytest.fixture
+def drive_text():
+    """Runs a handler for one text-message update; returns the last reply it sent."""
+    return drive_message
@@ -0,0 +1,73 @@
+import datetime
+import time
+from collections import deque
+
+import pytest
+
+from database import SessionLocal, Outbox
+from modules import alert_digest as alert_digest_module
+from modules.alert_digest import AlertDigest, JobAlert
+from modules.open_jobs import OpenJob, open_jobs
+
+OPEN_JOB_ID, CLOSED_JOB_ID = 10**9 + 1, 10**9 + 2
+
+
+class FakeNotifier:
+    def __init__(self):
+        self.sent = []
+
+    def submit(self, chat_id, text, **kwargs):
+        self.sent.append((chat_id, text))
+
+
+@pytest.fixture
+def notifier(monkeypatch):
+    fake = FakeNotifier()
+    monkeypatch.setattr(alert_digest_module, "notifier", fake)
+    return fake
+
+
+@pytest.fixture
+def open_job():
+    job = OpenJob(OPEN_JOB_ID, "Still open", "", 10.0, frozenset(), None, datetime.datetime(2020, 1, 1), 0)
+    open_jobs.add(job)
+    yield job
+    open_jobs.remove(job.id)
+
+
+def test_duplicate_alerts_are_not_counted():
+    digest = AlertDigest(window=3600)
+    alert = JobAlert(OPEN_JOB_ID, "Still open", 10.0)
+    digest.add(1, alert)
+    digest.add(1, alert)
+    assert digest.alerts_in == 1
+
+
+def test_alerts_for_closed_jobs_are_dropped(notifier, open_job):
+    digest = AlertDigest(window=3600)
+    digest.add(1, JobAlert(OPEN_JOB_ID, "Still open", 10.0))
+    digest.add(1, JobAlert(CLOSED_JOB_ID, "Already hired", 10.0))
+    digest.add(2, JobAlert(CLOSED_JOB_ID, "Already hired", 10.0))
+    assert digest.flush(force=True) == 1
+    assert [chat_id for chat_id, _ in notifier.sent] == [1]
+    assert "Still open" in notifier.sent[0][1] and "Already hired" not in notifier.sent[0][1]
+    assert digest.alerts_closed == 2
+    assert not digest.pending
+
+
+def test_forced_flush_saves_capped_alerts_to_the_outbox(db, notifier, open_job):
+    digest = AlertDigest(window=3600, max_per_hour=1)
+    digest.recent_sends[7001] = deque([time.monotonic()])
+    digest.add(7001, JobAlert(OPEN_JOB_ID, "Still open", 10.0))
+    assert digest.flush(force=True) == 0
+    assert not notifier.sent and not digest.pending
+
+    db_session = SessionLocal()
+    try:
+        rows = db_session.query(Outbox).filter(Outbox.chat_id == 7001).all()
+        assert len(rows) == 1 and "Still open" in rows[0].text
+        for row in rows:
+            db_session.delete(row)
+        db_session.commit()
+    finally:
+        db_session.close()
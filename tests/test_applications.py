@@ -0,0 +1,30 @@
+from sqlalchemy import select
+
+from database import SessionLocal, User, Job, Application
+
+
+def test_bids_on_closed_jobs_are_rejected(db, drive_text):
+    from modules import freelancer_flow
+    db_session = SessionLocal()
+    try:
+        client = User(telegram_id=9101, first_name="Client", role='client', balance=0)
+        freelancer = User(telegram_id=9102, first_name="Bidder", role='freelancer', balance=0)
+        db_session.add_all([client, freelancer])
+        db_session.flush()
+        open_job, hired_job = (Job(title=title, description="d", budget=20, client_id=client.id, status=status) for title, status in (("Open", 'open'), ("Hired", 'in_progress')))
+        db_session.add_all([open_job, hired_job])
+        db_session.commit()
+        open_id, hired_id, freelancer_id = open_job.id, hired_job.id, freelancer.id
+    finally:
+        db_session.close()
+
+    assert drive_text(freelancer_flow.received_bid_amount, "15", 9102, {'applying_for_job_id': hired_id, 'proposal_text': "p"}) == "This job is no longer accepting proposals."
+    assert drive_text(freelancer_flow.received_bid_amount, "15", 9102, {'applying_for_job_id': open_id, 'proposal_text': "p"}) == "Your application has been submitted!"
+
+    db_session = SessionLocal()
+    try:
+        bids = db_session.execute(select(Application.job_id, Job.application_count).join(Job, Job.id == Application.job_id).where(Application.freelancer_id == freelancer_id)).all()
+        assert bids == [(open_id, 1)]
+        assert db_session.get(Job, hired_id).application_count == 0
+    finally:
+        db_session.close()
@@ -0,0 +1,58 @@
+import pytest
+from sqlalchemy import func, select
+
+from database import engine, Job, Application, Transaction, Review, user_skills_table, job_skills_table
+
+# The hot queries, built the same way the handlers build them, and the index each must use
+HOT_QUERIES = [
+    ("open job listing",
+     select(Job).where(Job.status == 'open').order_by(Job.created_at.desc()),
+     "ix_jobs_status_created_at"),
+    ("client's open jobs",
+     select(Job.id, Job.title, Job.application_count).where(Job.client_id == 1, Job.status == 'open'),
+     "ix_jobs_client_status"),
+    ("freelancer's ongoing jobs",
+     select(Job).where(Job.hired_freelancer_id == 1, Job.status.in_(['in_progress', 'pending_completion'])),
+     "ix_jobs_hired_freelancer_status"),
+    ("proposal page",
+     select(Application.id, Application.bid_amount).where(Application.job_id == 1).order_by(Application.id).limit(1).offset(3),
+     "ix_applications_job_freelancer"),
+    ("duplicate application check",
+     select(Application).where(Application.job_id == 1, Application.freelancer_id == 2),
+     "ix_applications_job_freelancer"),
+    ("my applications page",
+     select(Application.status, Application.bid_amount).where(Application.freelancer_id == 1)
+     .order_by(Application.created_at.desc(), Application.id.desc()).limit(1).offset(3),
+     "ix_applications_freelancer_created_at"),
+    ("my application count",
+     select(func.count(Application.id)).where(Application.freelancer_id == 1),
+     "ix_applications_freelancer_created_at"),
+    ("freelancers with a skill",
+     select(user_skills_table.c.user_id).where(user_skills_table.c.skill_id == 1),
+     "ix_user_skills_skill_id"),
+    ("a freelancer's skills",
+     select(user_skills_table.c.skill_id).where(user_skills_table.c.user_id == 1),
+     "ux_user_skills_user_skill"),
+    ("jobs needing a skill",
+     select(job_skills_table.c.job_id).where(job_skills_table.c.skill_id == 1),
+     "ix_job_skills_skill_id"),
+    ("transaction history",
+     select(Transaction).where(Transaction.user_id == 1).order_by(Transaction.created_at.desc()).limit(5),
+     "ix_transactions_user_created_at"),
+    ("reviews received",
+     select(Review.rating).where(Review.reviewee_id == 1),
+     "ix_reviews_reviewee_id"),
+]
+
+
+def query_plan(statement) -> list:
+    compiled = statement.compile(engine, compile_kwargs={"literal_binds": True})
+    with engine.connect() as conn:
+        return [row[3] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}")]
+
+
+@pytest.mark.parametrize("statement, index_name", [q[1:] for q in HOT_QUERIES], ids=[q[0] for q in HOT_QUERIES])
+def test_hot_query_uses_its_index(db, statement, index_name):
+    plan = query_plan(statement)
+    assert any(f"USING INDEX {index_name}" in step or f"USING COVERING INDEX {index_name}" in step for step in plan), plan
+    assert not any(step.startswith("SCAN") for step in plan), plan
@@ -0,0 +1,35 @@
+import asyncio
+
+from telegram.error import RetryAfter
+
+from database import SessionLocal, Outbox
+from modules.notifier import NotificationDispatcher
+
+
+class FloodedBot:
+    async def send_message(self, chat_id, text, **kwargs):
+        raise RetryAfter(3600)
+
+
+def test_stop_saves_pending_retries_to_the_outbox(db):
+    dispatcher = NotificationDispatcher(rate=100, per_chat_interval=0, concurrency=1, max_retries=3)
+
+    async def run():
+        await dispatcher.start(FloodedBot())
+        dispatcher.submit(7101, "Held back by flood control", parse_mode='Markdown')
+        await dispatcher.queue.join()
+        assert dispatcher.retried == 1
+        await dispatcher.stop(timeout=0.1)
+
+    asyncio.run(run())
+    assert not dispatcher._retries
+
+    db_session = SessionLocal()
+    try:
+        rows = db_session.query(Outbox).filter(Outbox.chat_id == 7101).all()
+        assert [(row.text, row.parse_mode) for row in rows] == [("Held back by flood control", 'Markdown')]
+        for row in rows:
+            db_session.delete(row)
+        db_session.commit()
+    finally:
+        db_session.close()
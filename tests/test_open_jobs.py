@@ -0,0 +1,36 @@
+import asyncio
+import datetime
+
+from database import SessionLocal, async_engine, Job
+from modules.open_jobs import OpenJob, open_jobs, load_open_jobs, check_open_jobs
+
+
+def run_check():
+    async def run():
+        try:
+            return await check_open_jobs()
+        finally:
+            await async_engine.dispose()
+    return asyncio.run(run())
+
+
+def test_check_open_jobs_repairs_drift(db):
+    db_session = SessionLocal()
+    job = Job(title="Drift job", description="d", budget=10, status='open')
+    db_session.add(job)
+    db_session.commit()
+    try:
+        load_open_jobs()
+        assert run_check() == (0, 0)
+
+        open_jobs.remove(job.id)
+        ghost = OpenJob(10**9, "Ghost", "", 1.0, frozenset(), None, datetime.datetime(2020, 1, 1), 0)
+        open_jobs.add(ghost)
+        assert run_check() == (1, 1)
+        assert open_jobs.get(job.id).title == "Drift job"
+        assert open_jobs.get(ghost.id) is None
+    finally:
+        db_session.delete(job)
+        db_session.commit()
+        db_session.close()
+        load_open_jobs()
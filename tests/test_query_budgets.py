@@ -0,0 +1,118 @@
+import types
+
+import pytest
+from sqlalchemy import select
+
+from database import SessionLocal, User, Job, Application, Review, Skill
+from modules import query_guard
+from modules.query_guard import QueryBudgetExceeded, query_budget
+
+
+@pytest.fixture(autouse=True)
+def query_guard_raise(monkeypatch):
+    """Fails the test on any handler that exceeds its @query_budget or lazy-loads."""
+    monkeypatch.setattr(query_guard, "QUERY_GUARD", "raise")
+
+
+@pytest.fixture(scope="module")
+def marketplace(db):
+    """A client, two freelancers, an open job with both their proposals and a completed, reviewed job."""
+    from modules.skill_registry import load_skill_registry
+    from modules.skill_index import load_freelancer_index
+    from modules.ranking import load_freelancer_stats
+    from modules.open_jobs import load_open_jobs
+
+    db_session = SessionLocal()
+    try:
+        skills = db_session.scalars(select(Skill).order_by(Skill.id).limit(2)).all()
+        client = User(telegram_id=5001, first_name="Client", role='client', balance=500)
+        freelancers = [
+            User(telegram_id=5002 + offset, first_name=f"Freelancer{offset}", role='freelancer', skills=list(skills))
+            for offset in range(2)
+        ]
+        db_session.add_all([client, *freelancers])
+        db_session.flush()
+        open_job = Job(title="Open job", description="d", budget=100, client_id=client.id, status='open', skills_required=list(skills))
+        done_job = Job(title="Done job", description="d", budget=50, client_id=client.id, status='completed', hired_freelancer_id=freelancers[0].id)
+        db_session.add_all([open_job, done_job])
+        db_session.flush()
+        for freelancer in freelancers:
+            db_session.add(Application(job_id=open_job.id, freelancer_id=freelancer.id, proposal_text="p", bid_amount=90))
+        open_job.application_count = len(freelancers)
+        db_session.add(Review(job_id=done_job.id, reviewer_id=client.id, reviewee_id=freelancers[0].id, rating=5))
+        db_session.commit()
+        ids = types.SimpleNamespace(
+            client=client.id, client_tg=client.telegram_id,
+            freelancer=freelancers[0].id, freelancer_tg=freelancers[0].telegram_id,
+            open_job=open_job.id,
+            application=db_session.scalar(select(Application.id).where(Application.freelancer_id == freelancers[0].id)),
+        )
+    finally:
+        db_session.close()
+    load_skill_registry()
+    load_freelancer_index()
+    load_freelancer_stats()
+    load_open_jobs()
+    return ids
+
+
+def test_guard_raises_over_budget(db, drive):
+    @query_budget(0)
+    async def reads_once(update, context):
+        await context.db_session.execute(select(User.id).limit(1))
+
+    with pytest.raises(QueryBudgetExceeded):
+        drive(reads_once, "noop", 1)
+
+
+def test_client_handlers_stay_within_budget(marketplace, drive):
+    from modules import client_flow
+    m = marketplace
+    assert "Open job (2 proposals)" in drive(client_flow.select_job_to_view_proposals, "client_view_proposals", m.client_tg)
+    assert "Proposal 1 of 2" in drive(client_flow.view_proposals_for_job, f"view_proposals_{m.open_job}_0", m.client_tg)
+    assert "Freelancer Profile" in drive(client_flow.show_public_profile, f"view_profile_{m.freelancer}_{m.open_job}_0", m.client_tg)
+    assert "Done job" in drive(client_flow.show_completed_jobs, "client_completed_jobs", m.client_tg)
+
+
+def test_freelancer_handlers_stay_within_budget(marketplace, drive):
+    from modules import freelancer_flow
+    m = marketplace
+    assert "Freelancer Profile" in drive(freelancer_flow.show_my_profile, "freelancer_profile", m.freelancer_tg)
+    assert "Client Profile" in drive(freelancer_flow.show_client_profile, f"view_client_{m.client}", m.freelancer_tg)
+    assert "Open job" in drive(freelancer_flow.browse_feed, "freelancer_browse_jobs", m.freelancer_tg)
+    assert "Open job" in drive(freelancer_flow.browse_jobs, "browse_jobs_newest", m.freelancer_tg)
+    assert "Open job" in drive(freelancer_flow.show_my_applications, "freelancer_my_bids", m.freelancer_tg)
+
+
+def test_skill_editor_stays_within_budget(marketplace, drive):
+    from modules import skill_editor
+    from modules.skill_index import freelancer_index
+    m = marketplace
+    user_data = {}
+    drive(skill_editor.edit_skills_menu, "edit_skills_menu", m.freelancer_tg, user_data)
+    drive(skill_editor.show_skill_categories, "skill_categories", m.freelancer_tg, user_data)
+    drive(skill_editor.show_skill_category, "skill_cat_0_0", m.freelancer_tg, user_data)
+    toggles, _ = skill_editor.skill_keyboards.page(0, 0)
+    skill_id = toggles[0][0]
+    had_skill = skill_id in freelancer_index.skills_of.get(m.freelancer, ())
+    drive(skill_editor.toggle_skill, f"toggle_skill_{skill_id}_0_0", m.freelancer_tg, user_data)
+    assert "saved" in drive(skill_editor.save_skills, "skill_save", m.freelancer_tg, user_data)
+    assert (skill_id in freelancer_index.skills_of.get(m.freelancer, ())) != had_skill
+
+
+def test_accept_application_stays_within_budget(marketplace, drive):
+    from modules import client_flow
+    from modules.open_jobs import open_jobs
+    m = marketplace
+    assert "You have hired" in drive(client_flow.accept_application, f"accept_app_{m.application}", m.client_tg)
+    assert open_jobs.get(m.open_job) is None
+
+
+def test_application_viewer_corrects_a_stale_total(marketplace, drive):
+    from modules import freelancer_flow
+    m = marketplace
+    # The buttons were drawn when there were 9 applications; only one is left
+    page = drive(freelancer_flow.show_my_applications, "view_app_5_9", m.freelancer_tg)
+    assert "Your Application (1/1)" in page and "Next" not in page and "Previous" not in page
+    page = drive(freelancer_flow.show_my_applications, "view_app_0_9", m.freelancer_tg)
+    assert "Your Application (1/1)" in page and "Next" not in page
@@ -0,0 +1,59 @@
+import pytest
+
+from database import SessionLocal, User, Job, UserReputation, rebuild_user_reputation
+
+
+def jobs_posted(user_id):
+    db_session = SessionLocal()
+    try:
+        return db_session.get(UserReputation, user_id).jobs_posted
+    finally:
+        db_session.close()
+
+
+def test_jobs_posted_counts_the_same_incrementally_and_on_rebuild(db, drive):
+    from modules import payments
+    db_session = SessionLocal()
+    try:
+        client = User(telegram_id=6001, first_name="Poster", role='client', balance=0)
+        db_session.add(client)
+        db_session.flush()
+        paid, unpaid = (Job(title=title, description="d", budget=20, client_id=client.id, status='pending_deposit') for title in ("Paid", "Unpaid"))
+        db_session.add_all([paid, unpaid])
+        db_session.commit()
+        client_id, client_tg, paid_id = client.id, client.telegram_id, paid.id
+    finally:
+        db_session.close()
+
+    assert "Payment confirmed" in drive(payments.auto_confirm_payment, f"payment_sent_{paid_id}", client_tg)
+    assert jobs_posted(client_id) == 1
+    rebuild_user_reputation()
+    assert jobs_posted(client_id) == 1
+
+
+def test_failed_payment_confirmation_is_rolled_back(db, drive, monkeypatch):
+    from modules import payments
+
+    async def broken_record_reputation(db_session, user_id, **deltas):
+        raise RuntimeError("reputation table locked")
+    monkeypatch.setattr(payments, "record_reputation", broken_record_reputation)
+
+    db_session = SessionLocal()
+    try:
+        client = User(telegram_id=6002, first_name="Unlucky", role='client', balance=0)
+        db_session.add(client)
+        db_session.flush()
+        job = Job(title="Half paid", description="d", budget=20, client_id=client.id, status='pending_deposit')
+        db_session.add(job)
+        db_session.commit()
+        job_id = job.id
+    finally:
+        db_session.close()
+
+    with pytest.raises(RuntimeError):
+        drive(payments.auto_confirm_payment, f"payment_sent_{job_id}", 6002)
+    db_session = SessionLocal()
+    try:
+        assert db_session.get(Job, job_id).status == 'pending_deposit'
+    finally:
+        db_session.close()
@@ -0,0 +1,68 @@
+from sqlalchemy import text
+
+from database import engine
+from modules import search_flow
+from modules.search_flow import SEARCH_SQL, SEARCH_CANDIDATES, parse_search
+from modules.skill_registry import SkillEntry
+from modules.skill_resolver import SkillResolver
+
+
+def test_last_word_is_a_prefix_only_from_three_letters():
+    assert parse_search(["telegram", "bo"])['match'] == '"telegram" "bo"'
+    assert parse_search(["telegram", "bot"])['match'] == '"telegram" "bot"*'
+
+
+def test_trailing_star_forces_a_prefix():
+    assert parse_search(["te*"])['match'] == '"te"*'
+
+
+def test_filters_without_words_are_not_a_search():
+    assert parse_search(["min:10", "max:20"]) is None
+
+
+def test_unresolved_skill_filter_is_reported(monkeypatch):
+    resolver = SkillResolver()
+    resolver.rebuild([SkillEntry(1, "Python Development", None)])
+    monkeypatch.setattr(search_flow, "skill_resolver", resolver)
+    assert parse_search(["bot", "skill:python_development"])['skill_id'] == 1
+    search = parse_search(["bot", "skill:cobol"])
+    assert search['skill_id'] is None and search['unknown_skill'] == ("cobol", [])
+
+
+def run_search(conn, words, candidates=SEARCH_CANDIDATES):
+    search = parse_search(words)
+    return conn.execute(text(SEARCH_SQL), {
+        'match': search['match'], 'min_budget': None, 'max_budget': None, 'skill_id': None,
+        'candidates': candidates, 'limit': 6, 'offset': 0,
+    }).all()
+
+
+def test_search_flags_results_past_the_candidate_cap(db):
+    with engine.connect() as conn, conn.begin() as transaction:
+        conn.execute(text(
+            "INSERT INTO jobs (title, description, budget, status, client_id) VALUES "
+            "('Zebra survey', 'old', 10, 'open', NULL), "
+            "('Zebra logo', 'newer', 20, 'open', NULL), "
+            "('Zebra zebra site', 'newest', 30, 'open', NULL)"
+        ))
+        capped = run_search(conn, ["zebra"], candidates=2)
+        uncapped = run_search(conn, ["zebra"], candidates=3)
+        transaction.rollback()
+    # Only the two newest jobs are ranked, and the rows say more matched
+    assert [row.title for row in capped] == ['Zebra zebra site', 'Zebra logo']
+    assert all(row.truncated for row in capped)
+    assert len(uncapped) == 3 and not any(row.truncated for row in uncapped)
+
+
+def test_search_ranks_title_matches_first(db):
+    # Rolled back at the end so other tests don't see these jobs
+    with engine.connect() as conn, conn.begin() as transaction:
+        conn.execute(text(
+            "INSERT INTO jobs (title, description, budget, status, client_id) VALUES "
+            "('Logo refresh', 'Needs a scraper for prices', 40, 'open', NULL), "
+            "('Price scraper', 'Python please', 60, 'open', NULL), "
+            "('Old scraper', 'Closed already', 80, 'completed', NULL)"
+        ))
+        rows = run_search(conn, ["scraper"])
+        transaction.rollback()
+    assert [row.title for row in rows] == ['Price scraper', 'Logo refresh']
@@ -0,0 +1,40 @@
+from modules.skill_registry import SkillEntry
+from modules.skill_resolver import SkillResolver
+
+CATALOG = [
+    SkillEntry(1, "JavaScript Development", None),
+    SkillEntry(2, "Python Development", None),
+    SkillEntry(3, "Web Development", None),
+    SkillEntry(4, "Graphic Design", None),
+]
+
+
+def make_resolver():
+    resolver = SkillResolver()
+    resolver.rebuild(CATALOG)
+    return resolver
+
+
+def test_exact_name_and_alias_are_accepted():
+    resolver = make_resolver()
+    assert resolver.resolve("python development") == (CATALOG[1], [])
+    assert resolver.resolve("JS") == (CATALOG[0], [])
+
+
+def test_single_prefix_match_is_only_suggested():
+    entry, suggestions = make_resolver().resolve("java")
+    assert entry is None
+    assert suggestions == [CATALOG[0]]
+
+
+def test_typo_and_trigram_matches_are_only_suggested():
+    resolver = make_resolver()
+    assert resolver.resolve("graphc design") == (None, [CATALOG[3]])
+    entry, suggestions = resolver.resolve("pythn developmnt")
+    assert entry is None and CATALOG[1] in suggestions
+
+
+def test_common_word_returns_at_most_limit_suggestions():
+    entry, suggestions = make_resolver().resolve("development", limit=2)
+    assert entry is None
+    assert len(suggestions) == 2
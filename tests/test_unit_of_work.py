@@ -0,0 +1,41 @@
+from sqlalchemy import delete, select
+
+from database import SessionLocal, User
+
+
+def committed(telegram_id):
+    db_session = SessionLocal()
+    try:
+        return db_session.scalar(select(User.id).where(User.telegram_id == telegram_id)) is not None
+    finally:
+        db_session.close()
+
+
+def test_replies_run_after_the_commit(db, drive):
+    async def writes_then_replies(update, context):
+        context.db_session.add(User(telegram_id=8001, first_name="Writer"))
+
+        async def reply():
+            await update.callback_query.edit_message_text(f"committed={committed(8001)}")
+        context.after_commit.append(reply)
+
+    try:
+        assert drive(writes_then_replies, "noop", 8001) == "committed=True"
+    finally:
+        with SessionLocal() as db_session:
+            db_session.execute(delete(User).where(User.telegram_id == 8001))
+            db_session.commit()
+
+
+def test_failed_reply_does_not_skip_later_actions(db, drive):
+    ran = []
+
+    async def replies_twice(update, context):
+        async def failing_reply():
+            raise RuntimeError("Telegram is down")
+        context.after_commit.append(failing_reply)
+        context.after_commit.append(lambda: ran.append("view update"))
+        await update.callback_query.edit_message_text("handled")
+
+    drive(replies_twice, "noop", 8002)
+    assert ran == ["view update"]